@@ -0,0 +1 @@
+"""Benchmarks for the Video Downloader engine (desktop only, not shipped in the APK)."""
@@ -0,0 +1,118 @@
+"""
+Compare the "Original" (keep/remux) and "MP3" (transcode) audio paths.
+
+Usage:
+    python -m benchmarks.audio_paths [--fixtures DIR] [--count 4] [--seconds 120]
+
+Without --fixtures, sine-wave m4a (AAC) and webm (Opus) files are generated
+with ffmpeg. Each fixture is copied to a scratch folder and finished through
+both paths; wall time and ffmpeg CPU time (children rusage) are reported as
+JSON.
+"""
+
+import argparse
+import json
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+from core.transcode import finish_audio, plan_audio, run_ffmpeg
+
+# Codec of each fixture, by extension (generated fixtures follow this)
+FIXTURE_CODECS = {
+    ".m4a": "mp4a",
+    ".webm": "opus",
+    ".opus": "opus",
+    ".ogg": "vorbis",
+    ".mp3": "mp3",
+}
+
+
+def generate_fixtures(directory, count, seconds, ffmpeg_location=None):
+    paths = []
+    for index in range(count):
+        tone = f"sine=frequency={220 + 110 * index}:duration={seconds}"
+        for ext, codec in ((".m4a", "aac"), (".webm", "libopus")):
+            path = os.path.join(directory, f"fixture_{index}{ext}")
+            try:
+                run_ffmpeg(
+                    ffmpeg_location,
+                    ["-f", "lavfi", "-i", tone, "-c:a", codec, "-b:a", "128k", path],
+                )
+                paths.append(path)
+            except (RuntimeError, OSError) as e:
+                # OSError: no ffmpeg binary at all
+                print(f"Skipping {ext} fixture: {e}", file=sys.stderr)
+    return paths
+
+
+def _children_cpu():
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def run_path(fixtures, scratch, require_mp3, ffmpeg_location=None):
+    actions = {}
+    wall_start, cpu_start = time.perf_counter(), _children_cpu()
+    for fixture in fixtures:
+        ext = os.path.splitext(fixture)[1].lower()
+        work_path = os.path.join(scratch, os.path.basename(fixture))
+        shutil.copyfile(fixture, work_path)
+        plan = plan_audio(
+            {"acodec": FIXTURE_CODECS.get(ext, ""), "ext": ext[1:]}, require_mp3
+        )
+        actions[plan[0]] = actions.get(plan[0], 0) + 1
+        final_path = finish_audio(ffmpeg_location, work_path, plan)
+        os.remove(final_path)
+    return {
+        "files": len(fixtures),
+        "actions": actions,
+        "wall_seconds": round(time.perf_counter() - wall_start, 3),
+        "cpu_seconds": round(_children_cpu() - cpu_start, 3),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--fixtures", help="folder of audio files to use")
+    parser.add_argument("--count", type=int, default=4, help="generated fixtures per codec")
+    parser.add_argument("--seconds", type=int, default=120, help="length of generated fixtures")
+    parser.add_argument("--ffmpeg", help="ffmpeg binary or folder")
+    parser.add_argument("--output", help="write the JSON report here")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="bench_audio_")
+    try:
+        if args.fixtures:
+            fixtures = sorted(
+                os.path.join(args.fixtures, name)
+                for name in os.listdir(args.fixtures)
+                if os.path.splitext(name)[1].lower() in FIXTURE_CODECS
+            )
+        else:
+            fixtures = generate_fixtures(workdir, args.count, args.seconds, args.ffmpeg)
+        if not fixtures:
+            parser.error("no audio fixtures available")
+
+        scratch = os.path.join(workdir, "scratch")
+        os.makedirs(scratch)
+        report = {
+            "benchmark": "audio_paths",
+            "original": run_path(fixtures, scratch, False, args.ffmpeg),
+            "mp3": run_path(fixtures, scratch, True, args.ffmpeg),
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
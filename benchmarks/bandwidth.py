@@ -0,0 +1,203 @@
+"""
+Bandwidth scheduling against the local media server.
+
+Usage:
+    python -m benchmarks.bandwidth [--rate-limit 2M] [--jobs 3]
+        [--background 1] [--promote-after 6] [--size 16M]
+        [--bandwidth 8M] [--latency 0.02] [--output results.json]
+
+Runs `--jobs` NORMAL and `--background` BACKGROUND progressive downloads
+at once through DownloadEngine with a global `--rate-limit`, and promotes
+the first NORMAL job `--promote-after` seconds in (negative: never). The
+server (a child process, see benchmarks.media_server) is faster than the
+cap per connection, so the scheduler is what decides who gets the link.
+
+Reports each job's throughput while all jobs ran unpromoted and while
+the promoted job ran, the aggregate rate over each second and on
+average, and how far the busiest second went over the cap.
+"""
+
+import argparse
+import collections
+import contextlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+from core import BACKGROUND, DONE, FAILED, PAUSED, DownloadEngine, parse_rate
+
+from .downloads import FixedTuning, _git_commit, start_server
+from .media_server import parse_size
+
+
+class ByteCounter:
+    """Bytes each job received per wall-clock second, fed from progress hooks"""
+
+    def __init__(self, start):
+        self.start = start
+        self._lock = threading.Lock()
+        self._last = {}
+        self.seconds = collections.defaultdict(lambda: collections.Counter())
+
+    def hook(self, job_id, d):
+        if d.get("status") != "downloading":
+            return
+        name = d.get("tmpfilename") or d.get("filename")
+        downloaded = d.get("downloaded_bytes") or 0
+        with self._lock:
+            delta = max(0, downloaded - self._last.get((job_id, name), 0))
+            self._last[(job_id, name)] = downloaded
+            second = int(time.monotonic() - self.start)
+            self.seconds[second][job_id] += delta
+
+    def rates(self, job_id, first, last):
+        """Average bytes/second of a job over whole seconds [first, last)"""
+        if last <= first:
+            return None
+        with self._lock:
+            total = sum(self.seconds[s][job_id] for s in range(first, last))
+        return round(total / (last - first))
+
+    def totals(self):
+        with self._lock:
+            return [sum(self.seconds[s].values()) for s in sorted(self.seconds)]
+
+
+def run(base_url, args, workdir):
+    finished = threading.Event()
+    ended = {}
+    start = time.monotonic()
+    counter = ByteCounter(start)
+
+    def on_job_change(job):
+        if job.state in (DONE, FAILED, PAUSED):
+            ended[job.id] = int(time.monotonic() - start)
+            if len(ended) == len(jobs):
+                finished.set()
+
+    engine = DownloadEngine(
+        workdir,
+        ffmpeg_location=args.ffmpeg,
+        concurrency=args.jobs + args.background,
+        rate_limit=args.rate_limit,
+        persist_queue=False,
+        on_job_change=on_job_change,
+    )
+    engine.tuner = FixedTuning(
+        {"concurrent_fragment_downloads": 1, "http_chunk_size": parse_size("1M")}
+    )
+    progress_hook = engine.progress_hook
+
+    def counting_hook(d, job, entry_key=None):
+        counter.hook(job.id, d)
+        progress_hook(d, job, entry_key)
+
+    engine.progress_hook = counting_hook
+
+    # Distinct URLs so every job gets its own output and resume entry
+    jobs = []
+    for index in range(args.jobs + args.background):
+        priority = BACKGROUND if index >= args.jobs else None
+        url = f"{base_url}/progressive.mp4?job={index}"
+        jobs.append(engine.add(url, "Video", "Best", {"force": True}, priority))
+    engine.start()
+
+    promoted_at = None
+    deadline = start + args.timeout
+    while not finished.wait(0.1):
+        now = time.monotonic()
+        if promoted_at is None and 0 <= args.promote_after <= now - start:
+            engine.promote(jobs[0].id)
+            promoted_at = int(now - start) + 1
+        if now > deadline:
+            for job in jobs:
+                engine.queue.pause(job.id)
+            break
+    wall = time.monotonic() - start
+    engine.stop(wait=True)
+
+    # Whole seconds only: the first one is cut short, and so is each job's last
+    totals = counter.totals()
+    busy = min(ended.values(), default=len(totals))
+    unpromoted_end = min(busy, promoted_at or busy)
+    results = []
+    for index, job in enumerate(jobs):
+        row = {
+            "job": index,
+            "priority": job.priority,
+            "state": job.state,
+            "error": job.error,
+            "rate_all_running": counter.rates(job.id, 1, unpromoted_end),
+        }
+        if promoted_at is not None:
+            promoted_end = ended.get(jobs[0].id, busy)
+            row["rate_while_promoted"] = counter.rates(job.id, promoted_at, promoted_end)
+        results.append(row)
+    steady = totals[1 : max(ended.values(), default=len(totals))]
+    peak = max(steady or totals or [0])
+    aggregate = sum(steady) / len(steady) if steady else 0
+    over_cap = round(peak / args.rate_limit - 1, 3) if args.rate_limit else None
+    return {
+        "wall_seconds": round(wall, 2),
+        "promoted_at": promoted_at,
+        "jobs": results,
+        "aggregate_per_second": totals,
+        "aggregate_rate": round(aggregate),
+        "peak_over_cap": over_cap,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rate-limit", type=parse_rate, default=parse_rate("2M"))
+    parser.add_argument("--jobs", type=int, default=3, help="NORMAL downloads")
+    parser.add_argument("--background", type=int, default=1, help="BACKGROUND downloads")
+    parser.add_argument("--promote-after", type=float, default=6.0)
+    parser.add_argument("--size", default="16M", help="bytes per download")
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--bandwidth", default="8M", help="bytes/s per connection")
+    parser.add_argument("--total-bandwidth", default="0", help="bytes/s overall")
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--ffmpeg", help="ffmpeg binary or folder")
+    parser.add_argument("--output", help="write the JSON report here")
+    args = parser.parse_args(argv)
+    args.segments = 1
+
+    report = {
+        "benchmark": "bandwidth",
+        "commit": _git_commit(),
+        "time": time.time(),
+        "config": {
+            "rate_limit": args.rate_limit,
+            "jobs": args.jobs,
+            "background": args.background,
+            "promote_after": args.promote_after,
+            "size": parse_size(args.size),
+            "bandwidth": parse_size(args.bandwidth),
+        },
+    }
+
+    server, base_url = start_server(args)
+    workdir = tempfile.mkdtemp(prefix="bench_bandwidth_")
+    try:
+        # The engine's diagnostics would mix into the JSON report
+        with contextlib.redirect_stdout(sys.stderr):
+            report.update(run(base_url, args, os.path.join(workdir, "work")))
+    finally:
+        server.terminate()
+        server.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+"""
+Download throughput of the engine against the local media server.
+
+Usage:
+    python -m benchmarks.downloads [--kinds progressive,hls,dash]
+        [--fragments 1,4,8] [--chunk-sizes 1M,10M] [--size 32M]
+        [--latency 0.05] [--bandwidth 4M] [--total-bandwidth 0]
+        [--repeat 1] [--output results.json] [--compare old.json]
+
+Starts benchmarks.media_server in a child process (so its CPU and memory
+are not counted), then downloads each media kind through DownloadEngine
+and yt-dlp's generic extractor. Progressive files run once per
+`http_chunk_size`, HLS/DASH once per `concurrent_fragment_downloads`.
+
+Each scenario reports throughput, time to first byte, CPU time, peak RSS
+and how often a UI would have been called back (state changes, progress
+events, and redraws when draining at the app's rate). The JSON report
+carries the commit so runs can be compared with --compare.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from core import DONE, FAILED, PAUSED, RUNNING, DownloadEngine, ProgressAggregator
+
+from .media_server import parse_size
+
+# Matches the app's PROGRESS_FPS
+UI_FPS = 10
+
+# Seconds between RSS samples
+RSS_INTERVAL = 0.05
+
+KIND_PATHS = {
+    "progressive": "/progressive.mp4",
+    "hls": "/hls/index.m3u8",
+    "dash": "/dash/manifest.mpd",
+}
+
+
+class FixedTuning:
+    """Stands in for AdaptiveTuner so every run uses the scenario's settings"""
+
+    def __init__(self, settings):
+        self.settings = settings
+
+    def suggest(self, url, network):
+        return dict(self.settings)
+
+    def record(self, url, network, settings, meter):
+        pass
+
+
+class TimedProgress(ProgressAggregator):
+    """Notes when each job's first byte arrives"""
+
+    def __init__(self):
+        super().__init__()
+        self.first_byte = {}
+
+    def report(self, job_id, d):
+        if d.get("downloaded_bytes") and job_id not in self.first_byte:
+            self.first_byte[job_id] = time.monotonic()
+        super().report(job_id, d)
+
+
+class RssSampler:
+    """Peak resident memory of this process while running"""
+
+    def __init__(self):
+        self.peak = 0
+        self._stop = threading.Event()
+        self._page = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+    def _rss(self):
+        try:
+            with open("/proc/self/statm", "r") as f:
+                return int(f.read().split()[1]) * self._page
+        except (OSError, ValueError, IndexError):
+            # Process-lifetime peak; KiB on Linux
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self._rss())
+            self._stop.wait(RSS_INTERVAL)
+
+    def __enter__(self):
+        self.peak = self._rss()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def _cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def start_server(args):
+    """Run the media server in a child process; returns (process, base_url)"""
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.media_server",
+            "--size",
+            args.size,
+            "--segments",
+            str(args.segments),
+            "--latency",
+            str(args.latency),
+            "--bandwidth",
+            args.bandwidth,
+            "--total-bandwidth",
+            args.total_bandwidth,
+        ],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    port = int(process.stdout.readline())
+    return process, f"http://127.0.0.1:{port}"
+
+
+def run_scenario(url, settings, workdir, ffmpeg_location=None, timeout=600):
+    """Download `url` once with fixed tuning and measure it"""
+    finished = threading.Event()
+    started = {}
+    state_changes = [0]
+
+    def on_job_change(job):
+        state_changes[0] += 1
+        if job.state == RUNNING:
+            started.setdefault(job.id, time.monotonic())
+        elif job.state in (DONE, FAILED, PAUSED):
+            finished.set()
+
+    engine = DownloadEngine(
+        workdir,
+        ffmpeg_location=ffmpeg_location,
+        concurrency=1,
+        persist_queue=False,
+        on_job_change=on_job_change,
+    )
+    engine.tuner = FixedTuning(settings)
+    engine.progress = TimedProgress()
+
+    ui_updates = 0
+    cpu_start = _cpu_seconds()
+    with RssSampler() as rss:
+        wall_start = time.monotonic()
+        job = engine.add(url, "Video", "Best")
+        engine.start()
+        # Drain like the app's Clock callback would
+        while not finished.wait(1.0 / UI_FPS):
+            if engine.progress.drain():
+                ui_updates += 1
+            if time.monotonic() - wall_start > timeout:
+                engine.queue.pause(job.id)
+                break
+        if engine.progress.drain():
+            ui_updates += 1
+        wall = time.monotonic() - wall_start
+    engine.stop(wait=True)
+
+    paths = job.manifest.paths() if getattr(job, "manifest", None) else []
+    size = sum(os.path.getsize(p) for p in paths if os.path.exists(p))
+    first_byte = engine.progress.first_byte.get(job.id)
+    ttfb = first_byte - started[job.id] if first_byte and job.id in started else None
+    return {
+        "state": job.state,
+        "error": job.error,
+        "bytes": size,
+        "wall_seconds": round(wall, 3),
+        "throughput": round(size / wall) if wall > 0 else 0,
+        "ttfb_seconds": round(ttfb, 3) if ttfb is not None else None,
+        "cpu_seconds": round(_cpu_seconds() - cpu_start, 3),
+        "peak_rss_mb": round(rss.peak / (1024 * 1024), 1),
+        "state_changes": state_changes[0],
+        "progress_events": engine.progress.events_received,
+        "ui_updates": ui_updates,
+    }
+
+
+def scenarios(args):
+    """(name, kind, settings) for every combination asked for"""
+    for kind in args.kinds.split(","):
+        kind = kind.strip()
+        if kind not in KIND_PATHS:
+            raise SystemExit(f"unknown kind {kind!r}")
+        if kind == "progressive":
+            for chunk in args.chunk_sizes.split(","):
+                settings = {
+                    "concurrent_fragment_downloads": 1,
+                    "http_chunk_size": parse_size(chunk),
+                }
+                yield f"progressive/chunk={chunk}", kind, settings
+        else:
+            for fragments in args.fragments.split(","):
+                settings = {"concurrent_fragment_downloads": int(fragments)}
+                yield f"{kind}/fragments={fragments}", kind, settings
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report, previous):
+    """Per-scenario throughput / TTFB / CPU change against an earlier report"""
+    old = {s["name"]: s for s in previous.get("scenarios", [])}
+    rows = []
+    for scenario in report["scenarios"]:
+        before = old.get(scenario["name"])
+        if not before:
+            continue
+        row = {"name": scenario["name"]}
+        for key in ("throughput", "ttfb_seconds", "cpu_seconds", "peak_rss_mb"):
+            if before.get(key) and scenario.get(key) is not None:
+                row[key + "_change"] = round(scenario[key] / before[key] - 1, 3)
+        rows.append(row)
+    return {"commit": previous.get("commit"), "scenarios": rows}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--kinds", default="progressive,hls,dash")
+    parser.add_argument("--fragments", default="1,4,8", help="HLS/DASH levels")
+    parser.add_argument("--chunk-sizes", default="1M,10M", help="progressive levels")
+    parser.add_argument("--size", default="32M", help="bytes per media item")
+    parser.add_argument("--segments", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--bandwidth", default="4M", help="bytes/s per connection")
+    parser.add_argument("--total-bandwidth", default="0", help="bytes/s overall")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--ffmpeg", help="ffmpeg binary or folder")
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--compare", help="earlier JSON report to compare against")
+    args = parser.parse_args(argv)
+
+    import yt_dlp
+
+    report = {
+        "benchmark": "downloads",
+        "commit": _git_commit(),
+        "time": time.time(),
+        "python": platform.python_version(),
+        "yt_dlp": yt_dlp.version.__version__,
+        "config": {
+            "size": parse_size(args.size),
+            "segments": args.segments,
+            "latency": args.latency,
+            "bandwidth": parse_size(args.bandwidth),
+            "total_bandwidth": parse_size(args.total_bandwidth),
+        },
+        "scenarios": [],
+    }
+
+    server, base_url = start_server(args)
+    workdir = tempfile.mkdtemp(prefix="bench_downloads_")
+    try:
+        for name, kind, settings in scenarios(args):
+            for attempt in range(args.repeat):
+                # Fresh folder: no cached info, no partial files to resume
+                scenario_dir = os.path.join(workdir, f"{kind}_{len(report['scenarios'])}")
+                # The engine's diagnostics would mix into the JSON report
+                with contextlib.redirect_stdout(sys.stderr):
+                    result = run_scenario(
+                        base_url + KIND_PATHS[kind], settings, scenario_dir, args.ffmpeg
+                    )
+                shutil.rmtree(scenario_dir, ignore_errors=True)
+                report["scenarios"].append(
+                    dict(name=name, kind=kind, run=attempt, settings=settings, **result)
+                )
+                print(f"{name}: {result['state']} {result['throughput']} B/s", file=sys.stderr)
+    finally:
+        server.terminate()
+        server.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            report["compared_to"] = compare(report, json.load(f))
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+"""
+Local HTTP stand-in for a video host, with latency and bandwidth shaping.
+
+Usage:
+    python -m benchmarks.media_server [--port 0] [--size 32] [--segments 16]
+        [--latency 0.05] [--bandwidth 4M] [--total-bandwidth 0]
+
+Serves synthetic media that yt-dlp's generic extractor understands:
+
+    /progressive.mp4      single file, honours Range requests
+    /hls/index.m3u8       HLS media playlist of /hls/seg<N>.ts
+    /dash/manifest.mpd    DASH SegmentTemplate of /dash/seg-<N>.m4s
+    /playlist.rss         podcast feed of `entries` /entries/<N>.mp3 items
+                          (query: entries=5000&size=64K)
+    /stats                JSON request / byte counters
+
+Every response waits `latency` seconds before the first byte and is paced
+to `bandwidth` bytes/second per connection (and `total_bandwidth` across
+all connections). The bound port is printed on the first stdout line.
+"""
+
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+from xml.sax.saxutils import escape
+
+# Pattern the synthetic payload repeats
+BLOCK_SIZE = 64 * 1024
+_BLOCK = random.Random(0).randbytes(BLOCK_SIZE)
+
+# Bytes written between pacing checks
+WRITE_SIZE = 16 * 1024
+
+# Seconds of media per HLS / DASH segment
+SEGMENT_SECONDS = 4
+
+_RANGE_RE = re.compile(r"bytes=(\d*)-(\d*)")
+_SEGMENT_RE = re.compile(r"^/(hls|dash)/(?:seg|seg-)(\d+)\.(?:ts|m4s)$")
+_ENTRY_RE = re.compile(r"^/entries/(\d+)\.mp3$")
+
+# Playlist feed defaults
+FEED_ENTRIES = 5000
+ENTRY_SIZE = 64 * 1024
+
+
+def parse_size(text):
+    """'4M' / '512K' / '1000' -> bytes"""
+    text = str(text).strip().upper()
+    units = {"K": 1024, "M": 1024**2, "G": 1024**3}
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(float(text or 0))
+
+
+def payload(offset, length):
+    """Deterministic bytes [offset, offset + length) of an endless stream"""
+    out = bytearray()
+    while length > 0:
+        start = offset % BLOCK_SIZE
+        piece = _BLOCK[start : start + length]
+        out += piece
+        offset += len(piece)
+        length -= len(piece)
+    return bytes(out)
+
+
+class TokenBucket:
+    """Shared bytes/second budget; rate 0 means unlimited"""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self._lock = threading.Lock()
+        self._next = time.monotonic()
+
+    def take(self, nbytes):
+        if not self.rate:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + nbytes / self.rate
+            wait = self._next - now
+        if wait > 0:
+            time.sleep(wait)
+
+
+class MediaServer:
+    """ThreadingHTTPServer serving the synthetic catalogue (see module docstring)"""
+
+    def __init__(
+        self,
+        port=0,
+        size=32 * 1024 * 1024,
+        segments=16,
+        latency=0.0,
+        bandwidth=0,
+        total_bandwidth=0,
+    ):
+        self.size = size
+        self.segments = max(1, segments)
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.total = TokenBucket(total_bandwidth)
+        self.requests = 0
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    @property
+    def segment_size(self):
+        return self.size // self.segments
+
+    def serve_forever(self):
+        self.httpd.serve_forever()
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def stats(self):
+        with self._lock:
+            return {"requests": self.requests, "bytes_sent": self.bytes_sent}
+
+    def count(self, nbytes, request=False):
+        with self._lock:
+            self.bytes_sent += nbytes
+            self.requests += int(request)
+
+    def hls_playlist(self):
+        lines = [
+            "#EXTM3U",
+            "#EXT-X-VERSION:3",
+            f"#EXT-X-TARGETDURATION:{SEGMENT_SECONDS}",
+            "#EXT-X-MEDIA-SEQUENCE:0",
+            "#EXT-X-PLAYLIST-TYPE:VOD",
+        ]
+        for index in range(self.segments):
+            lines += [f"#EXTINF:{SEGMENT_SECONDS}.0,", f"seg{index}.ts"]
+        lines.append("#EXT-X-ENDLIST")
+        return "\n".join(lines) + "\n"
+
+    def dash_manifest(self):
+        seconds = self.segments * SEGMENT_SECONDS
+        bandwidth = self.segment_size * 8 // SEGMENT_SECONDS
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<MPD xmlns="urn:mpeg:dash:schema:mpd:2011" type="static" '
+            'profiles="urn:mpeg:dash:profile:isoff-on-demand:2011" '
+            f'minBufferTime="PT2S" mediaPresentationDuration="PT{seconds}S">\n'
+            f'  <Period id="0" duration="PT{seconds}S">\n'
+            '    <AdaptationSet mimeType="video/mp4" contentType="video">\n'
+            f'      <Representation id="v0" bandwidth="{bandwidth}" '
+            'codecs="avc1.64001f" width="1280" height="720">\n'
+            f'        <SegmentTemplate timescale="1" duration="{SEGMENT_SECONDS}" '
+            'startNumber="0" initialization="init.mp4" media="seg-$Number$.m4s"/>\n'
+            "      </Representation>\n"
+            "    </AdaptationSet>\n"
+            "  </Period>\n"
+            "</MPD>\n"
+        )
+
+    def playlist_feed(self, entries, entry_size):
+        items = []
+        for index in range(entries):
+            url = escape(f"{self.base_url}/entries/{index}.mp3?size={entry_size}")
+            items.append(
+                f"<item><title>Entry {index}</title><guid>entry-{index}</guid>"
+                f'<enclosure url="{url}" type="audio/mpeg" length="{entry_size}"/>'
+                "</item>"
+            )
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?>\n<rss version="2.0"><channel>'
+            f"<title>Synthetic playlist</title>{''.join(items)}</channel></rss>\n"
+        )
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_HEAD(self):
+                self._serve(body=False)
+
+            def do_GET(self):
+                self._serve(body=True)
+
+            def _serve(self, body):
+                server.count(0, request=True)
+                if server.latency:
+                    time.sleep(server.latency)
+                path, _, query = self.path.partition("?")
+                query = {k: v[-1] for k, v in parse_qs(query).items()}
+                segment = _SEGMENT_RE.match(path)
+                if path == "/progressive.mp4":
+                    self._send_media(server.size, "video/mp4", body)
+                elif path == "/hls/index.m3u8":
+                    self._send_text(
+                        server.hls_playlist(), "application/vnd.apple.mpegurl", body
+                    )
+                elif path == "/dash/manifest.mpd":
+                    self._send_text(server.dash_manifest(), "application/dash+xml", body)
+                elif path == "/dash/init.mp4":
+                    self._send_media(1024, "video/mp4", body)
+                elif segment and int(segment.group(2)) < server.segments:
+                    content_type = "video/mp2t" if segment.group(1) == "hls" else "video/mp4"
+                    self._send_media(server.segment_size, content_type, body)
+                elif path == "/playlist.rss":
+                    feed = server.playlist_feed(
+                        int(query.get("entries", FEED_ENTRIES)),
+                        parse_size(query.get("size", ENTRY_SIZE)),
+                    )
+                    self._send_text(feed, "application/rss+xml", body)
+                elif _ENTRY_RE.match(path):
+                    size = parse_size(query.get("size", ENTRY_SIZE))
+                    self._send_media(size, "audio/mpeg", body)
+                elif path == "/stats":
+                    self._send_text(json.dumps(server.stats()), "application/json", body)
+                else:
+                    self.send_error(404)
+
+            def _send_text(self, text, content_type, body):
+                data = text.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                if body:
+                    self.wfile.write(data)
+
+            def _send_media(self, size, content_type, body):
+                start, end = 0, size - 1
+                match = _RANGE_RE.fullmatch(self.headers.get("Range", "").strip())
+                if match and (match.group(1) or match.group(2)):
+                    if match.group(1):
+                        start = int(match.group(1))
+                        if match.group(2):
+                            end = min(int(match.group(2)), size - 1)
+                    else:
+                        start = max(0, size - int(match.group(2)))
+                    if start >= size:
+                        self.send_response(416)
+                        self.send_header("Content-Range", f"bytes */{size}")
+                        self.send_header("Content-Length", "0")
+                        self.end_headers()
+                        return
+                    self.send_response(206)
+                    self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+                else:
+                    self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Accept-Ranges", "bytes")
+                self.send_header("Content-Length", str(end - start + 1))
+                self.end_headers()
+                if body:
+                    self._write_paced(start, end + 1)
+
+            def _write_paced(self, start, stop):
+                began = time.monotonic()
+                sent = 0
+                offset = start
+                while offset < stop:
+                    chunk = payload(offset, min(WRITE_SIZE, stop - offset))
+                    server.total.take(len(chunk))
+                    try:
+                        self.wfile.write(chunk)
+                    except (BrokenPipeError, ConnectionResetError):
+                        return
+                    offset += len(chunk)
+                    sent += len(chunk)
+                    server.count(len(chunk))
+                    if server.bandwidth:
+                        ahead = sent / server.bandwidth - (time.monotonic() - began)
+                        if ahead > 0:
+                            time.sleep(ahead)
+
+        return Handler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--size", default="32M", help="bytes per media item, e.g. 32M")
+    parser.add_argument("--segments", type=int, default=16, help="HLS/DASH segments")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per request")
+    parser.add_argument("--bandwidth", default="0", help="bytes/s per connection, e.g. 4M")
+    parser.add_argument("--total-bandwidth", default="0", help="bytes/s for all connections")
+    args = parser.parse_args(argv)
+
+    server = MediaServer(
+        port=args.port,
+        size=parse_size(args.size),
+        segments=args.segments,
+        latency=args.latency,
+        bandwidth=parse_size(args.bandwidth),
+        total_bandwidth=parse_size(args.total_bandwidth),
+    )
+    print(server.port, flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
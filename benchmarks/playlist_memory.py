@@ -0,0 +1,189 @@
+"""
+Memory of a very long playlist job against the local media server.
+
+Usage:
+    python -m benchmarks.playlist_memory [--entries 5000] [--entry-size 16K]
+        [--workers 3] [--crash-after 1000] [--latency 0] [--output results.json]
+
+Downloads the media server's synthetic podcast feed (`--entries` mp3
+items, kept as they are so no ffmpeg is needed) as one "Playlist
+(Audio)" job through DownloadEngine, sampling resident memory the whole
+time. With `--crash-after N` a child process runs the job first and is
+killed (SIGKILL) once N entries are on disk; this process then re-adds
+the URL to a fresh engine, which has to pick up from the playlist
+checkpoint. The feed's entries carry no IDs, so without the checkpoint
+every entry done before the crash would be resolved again.
+
+Reports peak RSS above the baseline taken before the job (the engine,
+yt-dlp and its extractors already loaded), entries finished and how
+many requests went to entries that were already done.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+from core import DONE, FAILED, FINAL, PAUSED, DownloadEngine
+
+from .downloads import FixedTuning, RssSampler, _git_commit, start_server
+from .media_server import parse_size
+
+
+def server_requests(base_url):
+    with urllib.request.urlopen(f"{base_url}/stats") as response:
+        return json.load(response)["requests"]
+
+
+def files_done(workdir):
+    return sum(1 for name in os.listdir(workdir) if name.endswith(".mp3"))
+
+
+def run_once(url, workdir, args):
+    """One engine lifetime; returns (job, entries finished, seconds)"""
+    finished = threading.Event()
+
+    def on_job_change(job):
+        if job.state in (DONE, FAILED, PAUSED):
+            finished.set()
+
+    engine = DownloadEngine(
+        workdir,
+        concurrency=1,
+        playlist_workers=args.workers,
+        persist_queue=False,
+        on_job_change=on_job_change,
+    )
+    engine.tuner = FixedTuning({"concurrent_fragment_downloads": 1})
+    start = time.monotonic()
+    job = engine.add(url, "Playlist (Audio)", "Best", {"audio": "MP3"})
+    engine.start()
+
+    def done_count():
+        manifest = getattr(job, "manifest", None)
+        return len(manifest.paths(FINAL)) if manifest else 0
+
+    while not finished.wait(0.1):
+        if time.monotonic() - start > args.timeout:
+            engine.queue.pause(job.id)
+            finished.wait()
+            break
+    wall = time.monotonic() - start
+    engine.stop(wait=True)
+    return job, done_count(), wall
+
+
+def crash(url, workdir, args):
+    """Run the job in a child process and kill it after `crash_after` entries"""
+    child = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.playlist_memory", "--child", workdir]
+        + [f"--url={url}", f"--workers={args.workers}"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    start = time.monotonic()
+    while child.poll() is None and files_done(workdir) < args.crash_after:
+        time.sleep(0.05)
+    child.send_signal(signal.SIGKILL)
+    child.wait()
+    return {"entries_done": files_done(workdir), "seconds": round(time.monotonic() - start, 2)}
+
+
+def run(base_url, args, workdir):
+    url = f"{base_url}/playlist.rss?entries={args.entries}&size={args.entry_size}"
+    os.makedirs(workdir, exist_ok=True)
+    report = {}
+    if args.crash_after:
+        report["crashed_run"] = crash(url, workdir, args)
+    done_before = files_done(workdir)
+    requests_before = server_requests(base_url)
+
+    sampler = RssSampler()
+    baseline = sampler._rss()
+    with sampler as rss:
+        job, done, wall = run_once(url, workdir, args)
+    # The feed, then one request to resolve and one to download each entry
+    expected = 1 + 2 * (args.entries - done_before)
+    report.update(
+        {
+            "state": job.state,
+            "error": job.error,
+            "entries_done": done,
+            "seconds": round(wall, 2),
+            "files": files_done(workdir),
+            "requests_for_done_entries": server_requests(base_url)
+            - requests_before
+            - expected,
+            "baseline_rss_mb": round(baseline / (1024 * 1024), 1),
+            "peak_rss_mb": round(rss.peak / (1024 * 1024), 1),
+            "peak_growth_mb": round((rss.peak - baseline) / (1024 * 1024), 1),
+        }
+    )
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--entries", type=int, default=5000)
+    parser.add_argument("--entry-size", default="16K", help="bytes per entry")
+    parser.add_argument("--workers", type=int, default=3, help="playlist downloads")
+    parser.add_argument("--crash-after", type=int, default=0, help="entries, 0: never")
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--bandwidth", default="0", help="bytes/s per connection")
+    parser.add_argument("--timeout", type=float, default=3600)
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--url", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child:
+        run_once(args.url, args.child, args)
+        return
+    args.entry_size = parse_size(args.entry_size)
+    args.size, args.segments, args.total_bandwidth = "1M", 1, "0"
+
+    import yt_dlp
+
+    report = {
+        "benchmark": "playlist_memory",
+        "commit": _git_commit(),
+        "time": time.time(),
+        "python": platform.python_version(),
+        "yt_dlp": yt_dlp.version.__version__,
+        "config": {
+            "entries": args.entries,
+            "entry_size": args.entry_size,
+            "workers": args.workers,
+            "crash_after": args.crash_after,
+            "latency": args.latency,
+        },
+    }
+
+    server, base_url = start_server(args)
+    workdir = tempfile.mkdtemp(prefix="bench_playlist_")
+    try:
+        # Per-entry diagnostics would mix into the JSON report
+        with contextlib.redirect_stdout(sys.stderr):
+            report.update(run(base_url, args, workdir))
+    finally:
+        server.terminate()
+        server.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+Frame times of the progress bars under high-frequency progress updates.
+
+Usage:
+    python -m benchmarks.progress_render [--seconds 10] [--bars 6]
+        [--rate 200] [--download] [--output results.json]
+
+Opens a Kivy window with one main progress bar and `--bars` more, one per
+simulated job, and pushes `--rate` progress updates per second into them
+while a FrameMeter records frame intervals. Runs twice, each in its own
+process: "legacy" (the old bar that cleared and rebuilt its canvas on every
+change) and "retained" (the current widgets). With --download a real
+download through DownloadEngine and benchmarks.media_server runs at the
+same time and drives the main bar via the ProgressAggregator, like the app.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+
+def _legacy_bar_class():
+    from kivy.graphics import Color, RoundedRectangle
+    from kivy.properties import NumericProperty
+    from kivy.uix.widget import Widget
+
+    class LegacyProgressBar(Widget):
+        """StyledProgressBar as it was: canvas rebuilt on every update"""
+
+        progress = NumericProperty(0)
+
+        def __init__(self, **kwargs):
+            super().__init__(**kwargs)
+            self.bind(pos=self._update, size=self._update, progress=self._update)
+            self._update()
+
+        def _update(self, *args):
+            self.canvas.clear()
+            with self.canvas:
+                Color(0.2, 0.2, 0.28, 1)
+                RoundedRectangle(pos=self.pos, size=self.size, radius=[10])
+                if self.progress > 0:
+                    Color(0.4, 0.6, 1, 1)
+                    fill_width = (self.width - 4) * (self.progress / 100)
+                    RoundedRectangle(
+                        pos=(self.x + 2, self.y + 2),
+                        size=(fill_width, self.height - 4),
+                        radius=[8],
+                    )
+
+    return LegacyProgressBar
+
+
+def run_mode(mode, seconds, bars, rate, download):
+    """Child process: open the window, measure, print one JSON line"""
+    from kivy.config import Config
+
+    Config.set("graphics", "maxfps", "60")
+
+    from kivy.app import App
+    from kivy.clock import Clock
+    from kivy.uix.boxlayout import BoxLayout
+
+    from ui import FrameMeter, StyledProgressBar
+
+    class BenchApp(App):
+        def build(self):
+            root = BoxLayout(orientation="vertical", padding=20, spacing=10)
+            bar = _legacy_bar_class() if mode == "legacy" else StyledProgressBar
+            self.main_bar = bar(size_hint=(1, 0.2))
+            self.rows = [bar(size_hint=(1, 0.6 / bars)) for _ in range(bars)]
+            for row in [self.main_bar] + self.rows:
+                root.add_widget(row)
+            self.tick = 0
+            self.meter = FrameMeter()
+            self.engine = None
+            self.server = None
+            Clock.schedule_interval(self._feed, 1.0 / rate)
+            Clock.schedule_once(lambda dt: self._begin(), 0.5)
+            return root
+
+        def _begin(self):
+            if download:
+                self._start_download()
+            self.meter.start()
+            Clock.schedule_once(lambda dt: self._finish(), seconds)
+
+        def _start_download(self):
+            from core import DownloadEngine
+
+            from .downloads import start_server
+
+            args = argparse.Namespace(
+                size="64M",
+                segments=32,
+                latency=0.02,
+                bandwidth="8M",
+                total_bandwidth="0",
+            )
+            self.server, base_url = start_server(args)
+            self.engine = DownloadEngine(
+                tempfile.mkdtemp(prefix="bench_render_"), persist_queue=False
+            )
+            self.engine.start()
+            self.engine.add(base_url + "/hls/index.m3u8", "Video", "Best")
+            # Drained at the app's rate, like DownloaderApp._flush_progress
+            Clock.schedule_interval(self._drain, 1.0 / 10)
+
+        def _drain(self, dt):
+            for snap in self.engine.progress.drain():
+                self.main_bar.progress = snap.percent
+
+        def _feed(self, dt):
+            # Synthetic per-job updates, as raw hook events would arrive
+            self.tick += 1
+            for index in range(bars):
+                self.rows[index].progress = (self.tick * (index + 1) * 0.05) % 100
+            if not self.engine:
+                self.main_bar.progress = (self.tick * 0.1) % 100
+
+        def _finish(self):
+            stats = self.meter.stop()
+            if self.engine:
+                self.engine.stop()
+            if self.server:
+                self.server.terminate()
+            print(json.dumps(dict(stats, mode=mode)), file=result_out, flush=True)
+            self.stop()
+
+    # Only the result line goes to stdout, diagnostics go to stderr
+    result_out = sys.stdout
+    sys.stdout = sys.stderr
+    BenchApp().run()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--bars", type=int, default=6)
+    parser.add_argument("--rate", type=float, default=200, help="updates per second")
+    parser.add_argument("--download", action="store_true", help="run a real download too")
+    parser.add_argument("--modes", default="legacy,retained")
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--mode", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.mode:
+        run_mode(args.mode, args.seconds, args.bars, args.rate, args.download)
+        return
+
+    report = {
+        "benchmark": "progress_render",
+        "config": {
+            "seconds": args.seconds,
+            "bars": args.bars,
+            "rate": args.rate,
+            "download": args.download,
+        },
+        "modes": {},
+    }
+    for mode in args.modes.split(","):
+        command = [
+            sys.executable,
+            "-m",
+            "benchmarks.progress_render",
+            "--mode",
+            mode,
+            "--seconds",
+            str(args.seconds),
+            "--bars",
+            str(args.bars),
+            "--rate",
+            str(args.rate),
+        ]
+        if args.download:
+            command.append("--download")
+        env = dict(os.environ, KIVY_NO_ARGS="1", KIVY_NO_CONSOLELOG="1")
+        done = subprocess.run(command, capture_output=True, text=True, env=env)
+        lines = [l for l in done.stdout.splitlines() if l.startswith("{")]
+        if not lines:
+            print(done.stderr[-2000:], file=sys.stderr)
+            report["modes"][mode] = {"error": f"exit code {done.returncode}"}
+            continue
+        report["modes"][mode] = json.loads(lines[-1])
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
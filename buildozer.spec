@@ -22,7 +22,7 @@ source.include_exts = py,png,jpg,kv,atlas,json
 #source.exclude_exts = spec
 
 # (list) List of directory to exclude (let empty to not exclude anything)
-source.exclude_dirs = tests, bin, .git, .github, .venv, __pycache__
+source.exclude_dirs = tests, benchmarks, bin, .git, .github, .venv, __pycache__
 
 # (list) List of exclusions using pattern matching
 source.exclude_patterns = license,images/*/*.jpg
@@ -53,7 +53,9 @@ requirements = python3,kivy,yt-dlp,pyjnius,android,certifi
 orientation = portrait
 
 # (list) List of service to declare
-#services = NAME:ENTRYPOINT_TO_PY,NAME2:ENTRYPOINT2_TO_PY
+# Downloads run in this foreground service so they outlive the activity
+# (Android 14 needs the foreground service type in the manifest)
+services = Downloader:service.py:foreground:sticky:foregroundServiceType=dataSync
 
 #
 # OSX Specific
@@ -94,7 +96,7 @@ android.presplash_color = #14141E
 
 # (list) Permissions
 # (See https://python-for-android.readthedocs.io/en/latest/android-specifics/#permissions)
-android.permissions = INTERNET, WRITE_EXTERNAL_STORAGE, READ_EXTERNAL_STORAGE, ACCESS_NETWORK_STATE, MANAGE_EXTERNAL_STORAGE
+android.permissions = INTERNET, WRITE_EXTERNAL_STORAGE, READ_EXTERNAL_STORAGE, ACCESS_NETWORK_STATE, MANAGE_EXTERNAL_STORAGE, FOREGROUND_SERVICE, FOREGROUND_SERVICE_DATA_SYNC, POST_NOTIFICATIONS
 
 # (list) features (adds uses-feature -tags to manifest)
 #android.features = android.hardware.usb.host
@@ -0,0 +1,344 @@
+"""Headless batch downloader: runs the app's download engine without Kivy.
+
+    python cli.py urls.txt --format Audio --audio Original --jobs 4 -o ~/Music
+
+The input holds one URL per line (blank lines and `#` comments are
+skipped) or one JSON object per line with "url" and optional "format",
+"quality", "audio", "force" and "priority" ("background", "normal" or
+"promoted") keys overriding the command line defaults. All downloads share
+the `--rate-limit` budget, weighted by priority. Use `-` to read from
+stdin. Videos already in the work dir's download history finish at once
+unless forced. Progress, state changes and results are written to stdout
+as JSON lines; the exit code is 1 if any job failed.
+
+    python cli.py --serve --work-dir downloads
+    python cli.py urls.txt --connect --work-dir downloads
+
+`--serve` runs the engine as a long-lived download service (as the app
+does on Android) that other processes attach to; `--connect` hands the
+batch to the service of that work dir and reports it the same way.
+Interrupting a connected batch only detaches, the downloads go on.
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+from core import (
+    DownloadEngine,
+    EngineServer,
+    RemoteEngine,
+    NetworkPolicy,
+    NetworkState,
+    StaticConnectivity,
+    finalize_file,
+    parse_rate,
+    write_endpoint,
+    DONE,
+    FAILED,
+    PAUSED,
+    BACKGROUND,
+    NORMAL,
+    PROMOTED,
+)
+
+FORMATS = ("Audio", "Video", "Both", "Playlist (Audio)")
+
+PRIORITIES = {"background": BACKGROUND, "normal": NORMAL, "promoted": PROMOTED}
+
+# Seconds between progress lines per job
+PROGRESS_INTERVAL = 1.0
+
+# Service endpoint (port and token) inside the work dir
+ENDPOINT_FILE = ".service.json"
+
+# Seconds --connect waits for the service
+CONNECT_TIMEOUT = 10.0
+
+
+def read_jobs(lines, defaults):
+    """Parse input lines into (url, format_type, quality, options, priority) tuples"""
+    jobs = []
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        spec = dict(defaults)
+        if line.startswith("{"):
+            try:
+                spec.update(json.loads(line))
+            except ValueError as e:
+                raise SystemExit(f"line {number}: invalid JSON ({e})")
+        else:
+            spec["url"] = line
+        if not spec.get("url"):
+            raise SystemExit(f"line {number}: missing url")
+        if spec["format"] not in FORMATS:
+            raise SystemExit(f"line {number}: unknown format {spec['format']!r}")
+        priority = spec.get("priority")
+        if priority is not None and priority not in PRIORITIES:
+            raise SystemExit(f"line {number}: unknown priority {priority!r}")
+        options = {"audio": spec["audio"]}
+        if spec.get("force"):
+            options["force"] = True
+        jobs.append(
+            (
+                spec["url"],
+                spec["format"],
+                spec["quality"],
+                options,
+                PRIORITIES.get(priority),
+            )
+        )
+    return jobs
+
+
+class BatchRunner:
+    """Feeds a batch into a DownloadEngine and reports it as JSON lines"""
+
+    def __init__(self, out=sys.stdout):
+        self.engine = None
+        self.out = out
+        self._lock = threading.Lock()
+        self._finished = threading.Event()
+        self._job_ids = set()
+        self._all_added = False
+        self.results = {}
+
+    def emit(self, event, **fields):
+        line = json.dumps(dict(event=event, time=round(time.time(), 3), **fields))
+        with self._lock:
+            self.out.write(line + "\n")
+            self.out.flush()
+
+    def on_job_change(self, job):
+        """Queue listener, called from worker threads"""
+        self.emit("state", job=job.id, url=job.url, state=job.state, error=job.error)
+        if job.state not in (DONE, FAILED, PAUSED):
+            return
+        manifest = getattr(job, "manifest", None)
+        trace = getattr(job, "trace", None)
+        self.emit(
+            "result",
+            job=job.id,
+            url=job.url,
+            state=job.state,
+            error=job.error,
+            files=manifest.paths() if manifest else [],
+            phases=trace.phase_totals() if trace else {},
+            first_byte=trace.marks.get("first_byte") if trace else None,
+            counters=dict(trace.counters) if trace else {},
+        )
+        with self._lock:
+            self.results[job.id] = job.state
+        self._check_finished()
+
+    def _check_finished(self):
+        with self._lock:
+            if self._all_added and self._job_ids <= set(self.results):
+                self._finished.set()
+
+    def on_status(self, job, message):
+        self.emit("status", job=job.id, message=message)
+
+    def run(self, engine, jobs):
+        self.engine = engine
+        start = time.monotonic()
+        # A local engine runs nothing before start(); a service may finish a
+        # job before its id is recorded here, so completion is checked again
+        for args in jobs:
+            job_id = self.engine.add(*args).id
+            with self._lock:
+                self._job_ids.add(job_id)
+        with self._lock:
+            self._all_added = True
+        self._check_finished()
+        self.engine.start()
+        try:
+            while not self._finished.wait(PROGRESS_INTERVAL):
+                for snap in self.engine.progress.drain():
+                    self.emit(
+                        "progress",
+                        job=snap.job_id,
+                        status=snap.status,
+                        percent=round(snap.percent, 1),
+                        downloaded=snap.downloaded,
+                        total=snap.total,
+                        speed=snap.speed,
+                        eta=snap.eta,
+                    )
+            # Read while a connected service is still attached
+            cache_stats = self.engine.info_cache.stats()
+        finally:
+            # Wait for in-flight ffmpeg work only if the batch completed
+            self.engine.stop(wait=self._finished.is_set())
+        # A service also reports jobs of other batches
+        states = [self.results[job_id] for job_id in self._job_ids if job_id in self.results]
+        self.emit(
+            "summary",
+            jobs=len(self._job_ids),
+            done=states.count(DONE),
+            failed=states.count(FAILED),
+            seconds=round(time.monotonic() - start, 2),
+            info_cache=cache_stats,
+        )
+        return states.count(FAILED) == 0 and len(states) == len(self._job_ids)
+
+
+def serve(engine, endpoint_path):
+    """Run `engine` as a download service until interrupted or shut down"""
+    server = EngineServer()
+    engine.on_job_change = server.job_changed
+    engine.on_status = server.job_status
+    engine.on_network_change = server.network_changed
+    server.serve(engine)
+    write_endpoint(endpoint_path, server.address, server.token)
+    engine.start()
+    print(f"Download service on {server.address[0]}:{server.address[1]}")
+    try:
+        server.stopped.wait()
+    finally:
+        server.close()
+        try:
+            os.remove(endpoint_path)
+        except OSError:
+            pass
+        engine.stop(wait=True)
+
+
+def connect(endpoint_path, runner):
+    """A RemoteEngine attached to the service at `endpoint_path`"""
+    engine = RemoteEngine(
+        endpoint_path, on_job_change=runner.on_job_change, on_status=runner.on_status
+    )
+    engine.start()
+    if not engine.connected.wait(CONNECT_TIMEOUT):
+        engine.stop()
+        raise SystemExit(f"no download service answering at {endpoint_path}")
+    return engine
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "input", nargs="?", help="file of URLs or JSON lines, '-' for stdin"
+    )
+    parser.add_argument("-f", "--format", default="Both", choices=FORMATS)
+    parser.add_argument("-q", "--quality", default="Best", help="e.g. Best, 720p")
+    parser.add_argument("-a", "--audio", default="MP3", choices=("MP3", "Original"))
+    parser.add_argument("-j", "--jobs", type=int, default=3, help="parallel downloads")
+    parser.add_argument(
+        "-r",
+        "--rate-limit",
+        type=parse_rate,
+        default=0,
+        help="bytes/s for all downloads together, e.g. 2M (default: no cap)",
+    )
+    parser.add_argument(
+        "-o", "--output", help="move finished files here (default: work dir)"
+    )
+    parser.add_argument(
+        "--work-dir",
+        default="downloads",
+        help="partial files, caches and tuning data (default: ./downloads)",
+    )
+    parser.add_argument("--ffmpeg", help="ffmpeg binary or its folder")
+    parser.add_argument(
+        "--metered",
+        action="store_true",
+        help="treat the link as metered: video at most 720p, fewer connections",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="download again even if the history has the video",
+    )
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--serve",
+        action="store_true",
+        help="run as a download service for --connect to attach to",
+    )
+    mode.add_argument(
+        "--connect",
+        action="store_true",
+        help="hand the batch to the --serve process using the same work dir",
+    )
+    args = parser.parse_args(argv)
+    if args.serve == bool(args.input):
+        parser.error("give an input file, or --serve without one")
+
+    defaults = {
+        "format": args.format,
+        "quality": args.quality,
+        "audio": args.audio,
+        "force": args.force,
+    }
+    if args.serve:
+        jobs = []
+    elif args.input == "-":
+        jobs = read_jobs(sys.stdin, defaults)
+    else:
+        with open(args.input, "r", encoding="utf-8") as f:
+            jobs = read_jobs(f, defaults)
+    work_dir = os.path.abspath(args.work_dir)
+    endpoint_path = os.path.join(work_dir, ENDPOINT_FILE)
+
+    try:
+        import certifi
+
+        os.environ.setdefault("SSL_CERT_FILE", certifi.where())
+    except ImportError:
+        pass
+
+    publish = None
+    if args.output:
+        args.output = os.path.abspath(args.output)
+        os.makedirs(args.output, exist_ok=True)
+        publish = lambda path: finalize_file(path, args.output)  # noqa: E731
+
+    # The engine's diagnostics go to stderr, stdout carries only JSON lines
+    runner = BatchRunner(sys.stdout)
+    sys.stdout = sys.stderr
+    if args.connect:
+        # Output and engine settings are the service's own
+        try:
+            ok = runner.run(connect(endpoint_path, runner), jobs)
+        except KeyboardInterrupt:
+            return 130
+        return 0 if ok else 1
+
+    # Jobs from an earlier batch are not resumed, their partial files are;
+    # a service keeps its queue like the app does
+    engine = DownloadEngine(
+        work_dir,
+        ffmpeg_location=args.ffmpeg,
+        concurrency=max(1, args.jobs),
+        rate_limit=args.rate_limit,
+        persist_queue=args.serve,
+        skip_dirs=(args.output,) if args.output else (),
+        publish=publish,
+        connectivity=StaticConnectivity(NetworkState(metered=args.metered)),
+        # The link never changes here, so Best is capped rather than held back
+        network_policy=NetworkPolicy(defer_best_on_metered=False),
+        on_job_change=runner.on_job_change,
+        on_status=runner.on_status,
+    )
+    if args.serve:
+        try:
+            serve(engine, endpoint_path)
+        except KeyboardInterrupt:
+            pass
+        return 0
+    try:
+        ok = runner.run(engine, jobs)
+    except KeyboardInterrupt:
+        return 130
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
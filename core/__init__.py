@@ -0,0 +1,205 @@
+"""Core download engine package for Video Downloader app."""
+
+from .bandwidth import BandwidthScheduler, parse_rate
+from .download_queue import (
+    DownloadQueue,
+    DownloadJob,
+    JobPaused,
+    QUEUED,
+    RUNNING,
+    PROCESSING,
+    PAUSED,
+    FAILED,
+    DONE,
+    BACKGROUND,
+    NORMAL,
+    PROMOTED,
+)
+from .engine import DownloadEngine
+from .finalize import (
+    FinalizeStats,
+    finalize_file,
+    stream_copy,
+    stats as finalize_stats,
+)
+from .formats import (
+    format_string,
+    quality_height,
+    quality_options,
+    DEFAULT_QUALITIES,
+)
+from .history import DownloadHistory, history_variant
+from .info_cache import InfoCache, canonical_url_key
+from .ipc import EngineServer, RemoteEngine, RemoteError, read_endpoint, write_endpoint
+from .manifest import JobManifest, DOWNLOADED, PROCESSED, FINAL
+from .media_index import MediaIndexer
+from .metrics import (
+    JobTrace,
+    TraceLogger,
+    MetricsLog,
+    summarize,
+    format_summary,
+    EXTRACT,
+    DOWNLOAD,
+    POSTPROCESS,
+    MOVE,
+    SCAN,
+    PHASES,
+)
+from .network import (
+    NetworkPolicy,
+    NetworkState,
+    NetworkWatcher,
+    StaticConnectivity,
+    WIFI,
+    CELLULAR,
+    ETHERNET,
+    OTHER,
+    OFFLINE,
+    UNKNOWN,
+)
+from .playlist import (
+    PlaylistCheckpoint,
+    PlaylistDownloader,
+    ids_on_disk,
+    SKIPPED,
+    DOWNLOADING,
+    TRANSCODING,
+    ENTRY_DONE,
+    ENTRY_FAILED,
+)
+from .progress import (
+    ProgressAggregator,
+    ProgressSnapshot,
+    format_speed,
+    format_eta,
+    format_size,
+)
+from .resume import ResumeLedger, content_key
+from .retry import (
+    RetryPolicy,
+    RetryRule,
+    call_with_retries,
+    classify,
+    NETWORK,
+    THROTTLED,
+    FORBIDDEN,
+    EXTRACTOR,
+    POSTPROCESSOR,
+)
+from .startup import StartupTimer
+from .transcode import (
+    TranscodeStage,
+    FFmpegError,
+    ffmpeg_binary,
+    run_ffmpeg,
+    extract_audio_mp3,
+    merge_streams,
+    plan_audio,
+    remux_audio,
+    finish_audio,
+    KEEP,
+    REMUX,
+    TRANSCODE,
+)
+from .tuning import AdaptiveTuner, ThroughputMeter
+
+__all__ = [
+    "BandwidthScheduler",
+    "parse_rate",
+    "DownloadQueue",
+    "DownloadJob",
+    "JobPaused",
+    "QUEUED",
+    "RUNNING",
+    "PROCESSING",
+    "PAUSED",
+    "FAILED",
+    "DONE",
+    "BACKGROUND",
+    "NORMAL",
+    "PROMOTED",
+    "DownloadEngine",
+    "FinalizeStats",
+    "finalize_file",
+    "stream_copy",
+    "finalize_stats",
+    "format_string",
+    "quality_height",
+    "quality_options",
+    "DEFAULT_QUALITIES",
+    "DownloadHistory",
+    "history_variant",
+    "InfoCache",
+    "canonical_url_key",
+    "EngineServer",
+    "RemoteEngine",
+    "RemoteError",
+    "read_endpoint",
+    "write_endpoint",
+    "JobManifest",
+    "DOWNLOADED",
+    "PROCESSED",
+    "FINAL",
+    "MediaIndexer",
+    "JobTrace",
+    "TraceLogger",
+    "MetricsLog",
+    "summarize",
+    "format_summary",
+    "EXTRACT",
+    "DOWNLOAD",
+    "POSTPROCESS",
+    "MOVE",
+    "SCAN",
+    "PHASES",
+    "NetworkPolicy",
+    "NetworkState",
+    "NetworkWatcher",
+    "StaticConnectivity",
+    "WIFI",
+    "CELLULAR",
+    "ETHERNET",
+    "OTHER",
+    "OFFLINE",
+    "UNKNOWN",
+    "PlaylistCheckpoint",
+    "PlaylistDownloader",
+    "ids_on_disk",
+    "SKIPPED",
+    "DOWNLOADING",
+    "TRANSCODING",
+    "ENTRY_DONE",
+    "ENTRY_FAILED",
+    "ProgressAggregator",
+    "ProgressSnapshot",
+    "format_speed",
+    "format_eta",
+    "format_size",
+    "ResumeLedger",
+    "content_key",
+    "RetryPolicy",
+    "RetryRule",
+    "call_with_retries",
+    "classify",
+    "NETWORK",
+    "THROTTLED",
+    "FORBIDDEN",
+    "EXTRACTOR",
+    "POSTPROCESSOR",
+    "StartupTimer",
+    "TranscodeStage",
+    "FFmpegError",
+    "ffmpeg_binary",
+    "run_ffmpeg",
+    "extract_audio_mp3",
+    "merge_streams",
+    "plan_audio",
+    "remux_audio",
+    "finish_audio",
+    "KEEP",
+    "REMUX",
+    "TRANSCODE",
+    "AdaptiveTuner",
+    "ThroughputMeter",
+]
@@ -0,0 +1,264 @@
+"""Shared bandwidth budget: a global rate cap split between jobs by priority."""
+
+import threading
+import time
+
+from .download_queue import BACKGROUND, PROMOTED
+
+# Seconds without progress after which a job stops taking a share
+IDLE_AFTER = 2.0
+
+# Unused budget a job may catch up on in one go, in seconds of its share
+BURST_SECONDS = 0.5
+
+# Longest single sleep in a hook, so pauses and cap changes apply quickly
+SLEEP_SLICE = 0.25
+
+# Background jobs keep this trickle while preempted, so servers don't drop them
+PREEMPTED_RATE = 16 * 1024
+
+# Seconds per throughput sample, and weight of the newest one
+SAMPLE_SECONDS = 1.0
+EMA_WEIGHT = 0.5
+
+# A job that ran below its fair share without being held back (a slow
+# server) is given this much headroom over what it achieved; the rest of
+# its share goes to the others
+DEMAND_HEADROOM = 1.25
+
+# Shares are recomputed at most this often (and whenever jobs come and go)
+RECOMPUTE_SECONDS = 0.5
+
+
+def parse_rate(text):
+    """'2M' / '512K' / '1000' -> bytes per second (0 means unlimited)"""
+    text = str(text).strip().upper().rstrip("B/S") or "0"
+    units = {"K": 1024, "M": 1024**2, "G": 1024**3}
+    if text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(float(text))
+
+
+class _Lane:
+    """One job's pacing and measured throughput"""
+
+    def __init__(self, priority):
+        self.priority = priority
+        self.share = None
+        self.next_send = None
+        self.last_seen = 0.0
+        self.files = {}
+        self.rate = None
+        self.sample_start = None
+        self.sample_bytes = 0
+        # Whether the scheduler slowed this job down in the last sample
+        self.held = True
+        self.sample_held = False
+        # Whether the job was ever held back or shared the link with another
+        self.contended = False
+
+    def observe(self, nbytes, now):
+        self.last_seen = now
+        if self.sample_start is None:
+            self.sample_start = now
+        self.sample_bytes += nbytes
+        elapsed = now - self.sample_start
+        if elapsed >= SAMPLE_SECONDS:
+            rate = self.sample_bytes / elapsed
+            if self.rate is None:
+                self.rate = rate
+            else:
+                self.rate += EMA_WEIGHT * (rate - self.rate)
+            self.held = self.sample_held
+            self.sample_start = now
+            self.sample_bytes = 0
+            self.sample_held = False
+
+
+class BandwidthScheduler:
+    """
+    Paces every running job from its progress hooks so that together they
+    stay under `rate` bytes/second (0 means no cap).
+
+    The cap is split between jobs that moved bytes in the last IDLE_AFTER
+    seconds, weighted by priority. A job that stays below its share without
+    being held back (a slow server) is given what it achieves plus some
+    headroom, and the rest is shared out among the others. While a PROMOTED job is
+    downloading, BACKGROUND jobs are held at PREEMPTED_RATE, with or without
+    a cap.
+
+    Sleeping in a hook holds back yt-dlp's read loop (or one fragment
+    thread), and yt-dlp sizes its next read from the time that took, so the
+    pacing stays smooth without touching the downloader.
+    """
+
+    def __init__(self, rate=0):
+        self.rate = max(0, int(rate or 0))
+        self._lock = threading.Lock()
+        self._lanes = {}
+        self._computed = 0.0
+
+    def set_rate(self, rate):
+        with self._lock:
+            self.rate = max(0, int(rate or 0))
+            self._computed = 0.0
+
+    def register(self, job_id, priority):
+        with self._lock:
+            lane = self._lanes.get(job_id)
+            if lane is None:
+                self._lanes[job_id] = _Lane(priority)
+            else:
+                lane.priority = priority
+            self._computed = 0.0
+
+    def unregister(self, job_id):
+        with self._lock:
+            self._lanes.pop(job_id, None)
+            self._computed = 0.0
+
+    def set_priority(self, job_id, priority):
+        with self._lock:
+            lane = self._lanes.get(job_id)
+            if lane is not None:
+                lane.priority = priority
+                self._computed = 0.0
+
+    def throttle(self, job_id, d, interrupt=None):
+        """
+        Progress hook body: account the bytes `d` reports and sleep until
+        the job may continue. `interrupt()` is called between sleeps and may
+        raise to abort the download (e.g. on pause).
+        """
+        if d.get("status") != "downloading":
+            return
+        wait = self._reserve(job_id, d)
+        while wait > 0:
+            time.sleep(min(wait, SLEEP_SLICE))
+            if interrupt is not None:
+                interrupt()
+            # Shares may have changed meanwhile (a job promoted or finished)
+            wait = self._remaining(job_id)
+
+    def shares(self):
+        """{job_id: bytes/second or None for unlimited} as currently assigned"""
+        with self._lock:
+            self._recompute_locked(time.monotonic())
+            return {job_id: lane.share for job_id, lane in self._lanes.items()}
+
+    def throughput(self):
+        """{job_id: measured bytes/second} of jobs that have been sampled"""
+        with self._lock:
+            return {
+                job_id: lane.rate
+                for job_id, lane in self._lanes.items()
+                if lane.rate is not None
+            }
+
+    def contended(self, job_id):
+        """Whether the job was held back or ran alongside others since it registered"""
+        with self._lock:
+            lane = self._lanes.get(job_id)
+            return lane is not None and lane.contended
+
+    def _reserve(self, job_id, d):
+        now = time.monotonic()
+        with self._lock:
+            lane = self._lanes.get(job_id)
+            if lane is None:
+                return 0.0
+            # Hooks report running totals per file
+            name = d.get("tmpfilename") or d.get("filename")
+            downloaded = d.get("downloaded_bytes") or 0
+            nbytes = max(0, downloaded - lane.files.get(name, 0))
+            lane.files[name] = downloaded
+            was_idle = now - lane.last_seen > IDLE_AFTER
+            lane.observe(nbytes, now)
+            if len(self._lanes) > 1:
+                lane.contended = True
+            if was_idle or now - self._computed > RECOMPUTE_SECONDS:
+                self._recompute_locked(now)
+            if not lane.share or not nbytes:
+                return 0.0
+            start = now
+            if lane.next_send is not None:
+                start = max(now - BURST_SECONDS, lane.next_send)
+            lane.next_send = start + nbytes / lane.share
+            wait = lane.next_send - now
+            if wait > 0:
+                lane.sample_held = True
+                lane.contended = True
+            return wait
+
+    def _remaining(self, job_id):
+        now = time.monotonic()
+        with self._lock:
+            lane = self._lanes.get(job_id)
+            if lane is None or lane.next_send is None:
+                return 0.0
+            if now - self._computed > RECOMPUTE_SECONDS:
+                self._recompute_locked(now)
+            return lane.next_send - now
+
+    def _recompute_locked(self, now):
+        self._computed = now
+        # Jobs sleeping off their last read count as active too
+        active = {
+            job_id: lane
+            for job_id, lane in self._lanes.items()
+            if now - lane.last_seen <= IDLE_AFTER
+            or (lane.next_send is not None and lane.next_send > now)
+        }
+        old_shares = {job_id: lane.share for job_id, lane in self._lanes.items()}
+        for lane in self._lanes.values():
+            lane.share = None
+        self._assign_locked(active)
+
+        # Bytes still owed at the old share are paid at the new one
+        for job_id, lane in self._lanes.items():
+            old = old_shares[job_id]
+            if lane.next_send is None or lane.next_send <= now or old == lane.share:
+                continue
+            if lane.share is None:
+                lane.next_send = now
+            elif old is not None:
+                owed = (lane.next_send - now) * old
+                lane.next_send = now + owed / lane.share
+
+    def _assign_locked(self, active):
+        """Set `share` on every active lane (None = unlimited)"""
+        promoted = any(lane.priority >= PROMOTED for lane in active.values())
+        weighted = {}
+        for job_id, lane in active.items():
+            if promoted and lane.priority <= BACKGROUND:
+                lane.share = PREEMPTED_RATE
+            else:
+                weighted[job_id] = lane
+
+        if not self.rate:
+            return
+        budget = max(
+            self.rate - PREEMPTED_RATE * (len(active) - len(weighted)),
+            self.rate // 2,
+        )
+        # Weighted max-min fairness: jobs that can't use their share keep
+        # what they achieve, the rest is split again among the others
+        while weighted:
+            total_weight = sum(max(1, lane.priority) for lane in weighted.values())
+            capped = {}
+            for job_id, lane in weighted.items():
+                fair = budget * max(1, lane.priority) / total_weight
+                if (
+                    not lane.held
+                    and lane.rate is not None
+                    and lane.rate * DEMAND_HEADROOM < fair
+                ):
+                    capped[job_id] = lane.rate * DEMAND_HEADROOM
+            if not capped:
+                for lane in weighted.values():
+                    lane.share = budget * max(1, lane.priority) / total_weight
+                return
+            for job_id, share in capped.items():
+                weighted.pop(job_id).share = share
+                budget -= share
+            budget = max(budget, PREEMPTED_RATE)
@@ -0,0 +1,369 @@
+"""Persistent multi-job download queue with a bounded worker pool."""
+
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+
+QUEUED = "queued"
+RUNNING = "running"
+# Downloaded, post-processing (merge/transcode) still running off the worker
+PROCESSING = "processing"
+PAUSED = "paused"
+FAILED = "failed"
+DONE = "done"
+
+# Job priorities: queue order and bandwidth weight
+BACKGROUND = 1
+NORMAL = 4
+PROMOTED = 16
+
+# How many finished (done/failed) jobs to keep in the store
+MAX_FINISHED_JOBS = 200
+
+
+class JobPaused(Exception):
+    """Raised from a progress hook to stop a running job that was paused"""
+
+
+class DownloadJob:
+    """A single queued download and its persisted state"""
+
+    def __init__(
+        self,
+        url,
+        format_type,
+        quality,
+        options=None,
+        priority=NORMAL,
+        job_id=None,
+        state=QUEUED,
+        error="",
+        created=None,
+        updated=None,
+    ):
+        self.id = job_id or uuid.uuid4().hex[:12]
+        self.url = url
+        self.format_type = format_type
+        self.quality = quality
+        # Extra per-job settings, e.g. {"audio": "Original"}
+        self.options = dict(options or {})
+        self.priority = priority
+        self.state = state
+        self.error = error
+        self.created = created or time.time()
+        self.updated = updated or self.created
+        # Runtime-only flag, checked from progress hooks
+        self.pause_requested = False
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "url": self.url,
+            "format_type": self.format_type,
+            "quality": self.quality,
+            "options": self.options,
+            "priority": self.priority,
+            "state": self.state,
+            "error": self.error,
+            "created": self.created,
+            "updated": self.updated,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data["url"],
+            data.get("format_type", "Both"),
+            data.get("quality", "Best"),
+            options=data.get("options"),
+            priority=data.get("priority", NORMAL),
+            job_id=data.get("id"),
+            state=data.get("state", QUEUED),
+            error=data.get("error", ""),
+            created=data.get("created"),
+            updated=data.get("updated"),
+        )
+
+
+class JobStore:
+    """Small JSON file holding every job, written atomically"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return []
+        except (OSError, ValueError) as e:
+            print(f"Job store unreadable, starting empty: {e}")
+            return []
+
+        jobs = []
+        for item in data.get("jobs", []):
+            try:
+                jobs.append(DownloadJob.from_dict(item))
+            except (KeyError, TypeError):
+                continue
+        return jobs
+
+    def save(self, jobs):
+        tmp_path = self.path + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"jobs": [job.to_dict() for job in jobs]}, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Could not save job store: {e}")
+
+
+class DownloadQueue:
+    """
+    Runs queued jobs on a bounded pool of worker threads.
+
+    `runner(job)` does the actual download and raises on failure. It may
+    return a Future for work that continues off the worker (e.g. a
+    transcode); the job is then PROCESSING, no longer holding a download
+    slot, and is finished when that Future completes. A PROCESSING job
+    can't be paused; ffmpeg runs to the end.
+    `on_change(job)` is called from worker threads on every state change.
+    Queued jobs for which `admit(job)` returns False are passed over until
+    `wake()` is called and they are admitted.
+    """
+
+    def __init__(
+        self, runner, store_path=None, concurrency=3, on_change=None, admit=None
+    ):
+        self.runner = runner
+        self.on_change = on_change
+        self.admit = admit
+        self.store = JobStore(store_path) if store_path else None
+        self.concurrency = max(1, int(concurrency))
+
+        self._jobs = []
+        self._cond = threading.Condition()
+        self._workers = []
+        self._running = 0
+        self._stopped = False
+
+        if self.store:
+            for job in self.store.load():
+                # Anything interrupted by the app dying is queued again
+                if job.state in (RUNNING, PROCESSING):
+                    job.state = QUEUED
+                self._jobs.append(job)
+
+    def start(self):
+        """Start the worker threads (resumes unfinished jobs from the store)"""
+        with self._cond:
+            self._stopped = False
+            self._spawn_workers()
+            self._cond.notify_all()
+
+    def stop(self):
+        """Ask workers to exit once their current job is finished"""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+    def wake(self):
+        """Look at the queued jobs again, e.g. after admission rules changed"""
+        with self._cond:
+            self._cond.notify_all()
+
+    def set_concurrency(self, concurrency):
+        with self._cond:
+            self.concurrency = max(1, int(concurrency))
+            self._spawn_workers()
+            self._cond.notify_all()
+
+    def add(self, url, format_type, quality, options=None, priority=NORMAL):
+        job = DownloadJob(url, format_type, quality, options, priority)
+        with self._cond:
+            self._jobs.append(job)
+            self._save_locked()
+            self._cond.notify()
+        self._notify(job)
+        return job
+
+    def get(self, job_id):
+        with self._cond:
+            for job in self._jobs:
+                if job.id == job_id:
+                    return job
+        return None
+
+    def jobs(self, states=None):
+        with self._cond:
+            if states is None:
+                return list(self._jobs)
+            return [job for job in self._jobs if job.state in states]
+
+    def counts(self):
+        counts = {QUEUED: 0, RUNNING: 0, PROCESSING: 0, PAUSED: 0, FAILED: 0, DONE: 0}
+        with self._cond:
+            for job in self._jobs:
+                counts[job.state] = counts.get(job.state, 0) + 1
+        return counts
+
+    def pause(self, job_id):
+        """
+        Pause a queued job, or stop a running one at its next progress
+        update. Returns False for a PROCESSING job, which finishes as is.
+        """
+        with self._cond:
+            job = self._find_locked(job_id)
+            if job is None:
+                return False
+            if job.state == QUEUED:
+                self._set_state_locked(job, PAUSED)
+            elif job.state == RUNNING:
+                job.pause_requested = True
+                return True
+            else:
+                return False
+        self._notify(job)
+        return True
+
+    def resume(self, job_id):
+        """Put a paused or failed job back in the queue"""
+        with self._cond:
+            job = self._find_locked(job_id)
+            if job is None or job.state not in (PAUSED, FAILED):
+                return False
+            job.error = ""
+            self._set_state_locked(job, QUEUED)
+            self._cond.notify()
+        self._notify(job)
+        return True
+
+    def set_priority(self, job_id, priority):
+        """Change a job's priority; queued jobs are started highest first"""
+        with self._cond:
+            job = self._find_locked(job_id)
+            if job is None:
+                return False
+            job.priority = priority
+            self._save_locked()
+            self._cond.notify()
+        self._notify(job)
+        return True
+
+    def raise_if_paused(self, job):
+        """Call from progress hooks so a pause request interrupts yt-dlp"""
+        if job.pause_requested:
+            raise JobPaused()
+
+    def _spawn_workers(self):
+        self._workers = [w for w in self._workers if w.is_alive()]
+        while len(self._workers) < self.concurrency:
+            worker = threading.Thread(target=self._worker_loop, daemon=True)
+            self._workers.append(worker)
+            worker.start()
+
+    def _worker_loop(self):
+        while True:
+            with self._cond:
+                job = None
+                while not self._stopped:
+                    if self._running < self.concurrency:
+                        job = self._next_queued_locked()
+                        if job is not None:
+                            break
+                    self._cond.wait()
+                if job is None:
+                    return
+                self._running += 1
+                self._set_state_locked(job, RUNNING)
+            self._notify(job)
+
+            try:
+                result = self.runner(job)
+            except Exception as e:
+                self._finish(job, e)
+                continue
+
+            if isinstance(result, Future):
+                # Post-processing continues elsewhere; free the slot for the
+                # next download and finish the job when it completes. A
+                # pause that came after the last progress update is dropped:
+                # the download is complete and ffmpeg isn't paused.
+                with self._cond:
+                    self._running -= 1
+                    job.pause_requested = False
+                    self._set_state_locked(job, PROCESSING)
+                    self._cond.notify_all()
+                self._notify(job)
+                result.add_done_callback(
+                    lambda f, job=job: self._finish_future(job, f)
+                )
+            else:
+                self._finish(job, None)
+
+    def _finish_future(self, job, future):
+        if future.cancelled():
+            error = RuntimeError("Post-processing was cancelled")
+        else:
+            error = future.exception()
+        self._finish(job, error, counted=False)
+
+    def _finish(self, job, error, counted=True):
+        if error is None:
+            new_state, message = DONE, ""
+        # yt-dlp may wrap the JobPaused raised from a hook, so trust the flag
+        elif isinstance(error, JobPaused) or job.pause_requested:
+            new_state, message = PAUSED, ""
+        else:
+            new_state, message = FAILED, str(error)[:200]
+
+        with self._cond:
+            if counted:
+                self._running -= 1
+            job.pause_requested = False
+            job.error = message
+            self._set_state_locked(job, new_state)
+            self._cond.notify_all()
+        self._notify(job)
+
+    def _next_queued_locked(self):
+        """Oldest of the highest-priority admitted queued jobs"""
+        best = None
+        for job in self._jobs:
+            if job.state != QUEUED or (best is not None and job.priority <= best.priority):
+                continue
+            if self.admit is None or self.admit(job):
+                best = job
+        return best
+
+    def _find_locked(self, job_id):
+        for job in self._jobs:
+            if job.id == job_id:
+                return job
+        return None
+
+    def _set_state_locked(self, job, state):
+        job.state = state
+        job.updated = time.time()
+        self._save_locked()
+
+    def _save_locked(self):
+        if not self.store:
+            return
+        finished = [job for job in self._jobs if job.state in (DONE, FAILED)]
+        if len(finished) > MAX_FINISHED_JOBS:
+            drop = set(id(job) for job in finished[:-MAX_FINISHED_JOBS])
+            self._jobs = [job for job in self._jobs if id(job) not in drop]
+        self.store.save(self._jobs)
+
+    def _notify(self, job):
+        if self.on_change:
+            try:
+                self.on_change(job)
+            except Exception as e:
+                print(f"Job listener error: {e}")
@@ -0,0 +1,707 @@
+"""UI-independent download engine shared by the Kivy app and the command line."""
+
+import os
+import threading
+from concurrent.futures import Future
+from contextlib import nullcontext
+
+from .bandwidth import BandwidthScheduler
+from .download_queue import (
+    BACKGROUND,
+    DONE,
+    FAILED,
+    NORMAL,
+    PAUSED,
+    PROMOTED,
+    RUNNING,
+    DownloadQueue,
+)
+from .formats import format_string, quality_height, quality_options
+from .history import DownloadHistory, history_variant
+from .info_cache import InfoCache, canonical_url_key, extract_unprocessed
+from .manifest import FINAL, PROCESSED, JobManifest
+from .media_index import MediaIndexer
+from .network import NetworkPolicy, NetworkState, NetworkWatcher, StaticConnectivity
+from .metrics import (
+    DOWNLOAD,
+    EXTRACT,
+    MOVE,
+    POSTPROCESS,
+    SCAN,
+    JobTrace,
+    MetricsLog,
+    TraceLogger,
+)
+from .playlist import (
+    ENTRY_DONE,
+    ENTRY_FAILED,
+    SKIPPED,
+    PlaylistCheckpoint,
+    PlaylistDownloader,
+)
+from .progress import ProgressAggregator
+from .resume import ResumeLedger, content_key
+from .retry import (
+    NETWORK,
+    POSTPROCESSOR,
+    RetryPolicy,
+    call_with_retries,
+)
+from .transcode import (
+    KEEP,
+    TranscodeStage,
+    fallback_plan,
+    finish_audio,
+    merge_streams,
+    plan_audio,
+)
+from .tuning import AdaptiveTuner, ThroughputMeter
+
+# yt-dlp's own immediate retries per request and fragment. Anything longer
+# is left to `retry_policy`, which resumes the .part files and whose waits
+# a pause interrupts
+YTDLP_RETRIES = 1
+
+
+# Custom logger for Android compatibility
+class QuietLogger:
+    def debug(self, msg):
+        pass
+
+    def warning(self, msg):
+        pass
+
+    def error(self, msg):
+        pass
+
+
+class DownloadEngine:
+    """
+    Queue, extraction cache, tuning, resume ledger and post-processing
+    wired together, with no UI dependency.
+
+    Front ends plug in through callbacks, all called from worker threads:
+    `publish(path)` moves a finished file to its final place and returns
+    the new path, `scan_batch(paths)` makes files visible to other apps
+    (batched and de-duplicated by a MediaIndexer),
+    `on_job_change(job)` reports queue state changes and
+    `on_status(job, message)` reports notable events (e.g. a fallback).
+    Progress is collected in `self.progress` for the front end to drain;
+    each run's timeline is kept on `job.trace` and logged to `self.metrics`.
+    Finished files are recorded in `self.history`, and a job (or playlist
+    entry) already in it finishes at once unless its options set "force".
+    `direct_output_dir()` may return a folder that downloads needing no
+    post-processing are written into directly.
+    All downloads share `self.bandwidth`, capped at `rate_limit` bytes/s
+    (0 for none) and split by job priority; playlists run as BACKGROUND
+    and `promote(job_id)` lets a job take the link from them.
+    `connectivity` (anything with a `current()` returning a NetworkState)
+    is polled while the engine runs; `network_policy` turns its state into
+    queue admission, quality and concurrency caps, pauses running jobs the
+    new link doesn't allow and resumes them when it does again.
+    `on_network_change(state)` reports each change.
+    Failures are classified and retried per `retry_policy`: network errors,
+    HTTP 429 and 403 (after extracting again) with backoff, and a failed
+    merge or transcode by redoing only that step on the downloaded files.
+    """
+
+    def __init__(
+        self,
+        download_path,
+        ffmpeg_location=None,
+        concurrency=3,
+        playlist_workers=3,
+        network_type="unknown",
+        rate_limit=0,
+        persist_queue=True,
+        skip_dirs=(),
+        publish=None,
+        scan_batch=None,
+        direct_output_dir=None,
+        connectivity=None,
+        network_policy=None,
+        retry_policy=None,
+        on_job_change=None,
+        on_status=None,
+        on_network_change=None,
+    ):
+        self.download_path = download_path
+        self.ffmpeg_location = ffmpeg_location
+        self.playlist_workers = playlist_workers
+        self.network_type = network_type
+        self.rate_limit = rate_limit
+        self.skip_dirs = tuple(skip_dirs)
+        self.publish = publish
+        self.direct_output_dir = direct_output_dir
+        self.on_job_change = on_job_change
+        self.on_status = on_status
+        self.on_network_change = on_network_change
+
+        os.makedirs(download_path, exist_ok=True)
+
+        # Global rate cap and per-priority shares, paced from progress hooks
+        self.bandwidth = BandwidthScheduler(rate_limit)
+
+        # Hook events from every job, drained by the front end
+        self.progress = ProgressAggregator()
+
+        # Finished files are announced to the media scanner in batches
+        self.media_index = None
+        if scan_batch:
+            self.media_index = MediaIndexer(
+                scan_batch, os.path.join(download_path, ".media_index.json")
+            )
+
+        # Per-job timelines, for finding where the seconds go
+        self.metrics = MetricsLog(os.path.join(download_path, ".metrics", "jobs.jsonl"))
+
+        # Everything downloaded so far, for duplicate detection and search
+        self.history = DownloadHistory(os.path.join(download_path, ".history.sqlite3"))
+
+        # Extracted video info, shared by retries, fallbacks and re-downloads
+        self.info_cache = InfoCache(os.path.join(download_path, ".info_cache"))
+
+        # Partial downloads left by earlier runs
+        self.resume_ledger = ResumeLedger(os.path.join(download_path, ".resume.json"))
+        self.resume_ledger.reset_active()
+        self.resume_ledger.prune()
+
+        # Learns fragment concurrency / chunk size per host
+        self.tuner = AdaptiveTuner(os.path.join(download_path, ".tuning.json"))
+
+        # FFmpeg merges and transcodes, one process per CPU core
+        self.transcoder = TranscodeStage(ffmpeg_location)
+
+        # Backoff for transient failures, in our steps and yt-dlp's own retries
+        self.retry_policy = retry_policy or RetryPolicy()
+
+        # Connectivity decides which jobs may start and with what limits;
+        # without a provider the link is taken to be `network_type`
+        self.network_policy = network_policy or NetworkPolicy()
+        self.network = NetworkWatcher(
+            connectivity or StaticConnectivity(NetworkState(network_type)),
+            self._network_changed,
+        )
+        # Running jobs the policy paused, resumed when the link allows them;
+        # touched by the watcher thread and the queue workers
+        self._held_jobs = set()
+        self._lock = threading.Lock()
+        self._apply_network(self.network.state)
+
+        # Download queue (resumes jobs left unfinished by the last run)
+        store_path = None
+        if persist_queue:
+            store_path = os.path.join(download_path, ".download_queue.json")
+        self.queue = DownloadQueue(
+            self.run_download,
+            store_path=store_path,
+            concurrency=concurrency,
+            on_change=self._job_changed,
+            admit=lambda job: self.defer_reason(job) is None,
+        )
+
+    def start(self):
+        self.network.start()
+        self.queue.start()
+
+    def stop(self, wait=False):
+        self.network.stop()
+        self.queue.stop()
+        if self.media_index:
+            self.media_index.flush()
+        self.transcoder.shutdown(wait=wait)
+
+    def add(self, url, format_type="Both", quality="Best", options=None, priority=None):
+        if priority is None:
+            # Long playlists shouldn't hold up single videos added after them
+            priority = BACKGROUND if format_type == "Playlist (Audio)" else NORMAL
+        return self.queue.add(url, format_type, quality, options, priority)
+
+    def promote(self, job_id):
+        """Start a job before the others and give it the bandwidth of background jobs"""
+        if not self.queue.set_priority(job_id, PROMOTED):
+            return False
+        self.bandwidth.set_priority(job_id, PROMOTED)
+        # A promoted job no longer waits for an unmetered link
+        self.queue.wake()
+        return True
+
+    def defer_reason(self, job):
+        """Why a queued job is waiting on the network, or None"""
+        return self.network_policy.defer_reason(job, self.network.state)
+
+    def check_network(self):
+        """Re-read connectivity now (e.g. when the app comes to the foreground)"""
+        return self.network.check()
+
+    def _network_changed(self, state):
+        """Watcher callback: apply the new link's limits to running and held jobs"""
+        self._apply_network(state)
+        for job in self.queue.jobs((RUNNING,)):
+            if self.network_policy.defer_reason(job, state) is not None:
+                with self._lock:
+                    self._held_jobs.add(job.id)
+                self.queue.pause(job.id)
+        with self._lock:
+            held = list(self._held_jobs)
+        for job_id in held:
+            job = self.queue.get(job_id)
+            if job is None or job.state not in (RUNNING, PAUSED):
+                with self._lock:
+                    self._held_jobs.discard(job_id)
+            elif job.state == PAUSED and self.defer_reason(job) is None:
+                with self._lock:
+                    self._held_jobs.discard(job_id)
+                self.queue.resume(job_id)
+        # Deferred queued jobs may be allowed now
+        self.queue.wake()
+        if self.on_network_change:
+            try:
+                self.on_network_change(state)
+            except Exception as e:
+                print(f"Network listener error: {e}")
+
+    def _apply_network(self, state):
+        # The tuner keeps separate measurements per kind of link
+        self.network_type = state.kind
+        self.bandwidth.set_rate(self.network_policy.rate_limit(state, self.rate_limit))
+
+    def prefetch(self, url):
+        """
+        Extract a single video's info into the cache and return it,
+        unprocessed: the format picked afterwards is selected on a copy
+        """
+        import yt_dlp
+
+        opts = {
+            "quiet": True,
+            "no_warnings": True,
+            "logger": QuietLogger(),
+            "noplaylist": True,
+        }
+        with yt_dlp.YoutubeDL(opts) as ydl:
+            return self.info_cache.get_or_extract(
+                canonical_url_key(url),
+                lambda: ydl.sanitize_info(extract_unprocessed(ydl, url)),
+            )
+
+    def quality_options(self, url):
+        """Qualities offered for a single video, labelled with their sizes"""
+        return quality_options(self.prefetch(url))
+
+    def run_download(self, job):
+        """Main download function with retry handling (runs on a queue worker)"""
+        url, format_type = job.url, job.format_type
+        download_path = self.download_path
+        network = self.network.state
+        # Capped on metered links; part of the resume key, so a job resumed
+        # on another link never continues a different format's .part file
+        quality = self.network_policy.quality(job, network)
+        job.quality_used = quality
+
+        # Output names depend only on what is downloaded, so a job re-run
+        # after the app was killed continues its .part files
+        resume_key, resumed = self.resume_ledger.acquire(
+            content_key(
+                canonical_url_key(url),
+                format_type,
+                quality_height(quality),
+                job.options.get("audio", "MP3"),
+            ),
+            job.id,
+            url,
+        )
+        # Phase timings, first byte, throughput and retries of this run
+        trace = JobTrace(job.id, url, format_type)
+        job.trace = trace
+
+        if resumed:
+            print(f"Resuming {url} from {resumed.get('bytes', 0)} bytes")
+            trace.event("resumed", bytes=resumed.get("bytes", 0))
+
+        # Fragment concurrency and chunk size learned from earlier downloads
+        tuning = self.tuner.suggest(url, network.kind)
+        meter = ThroughputMeter()
+
+        # Exact output paths, filled in from yt-dlp's hooks and results
+        manifest = JobManifest(job.id, os.path.join(download_path, ".manifests"))
+        job.manifest = manifest
+
+        # Base yt-dlp options
+        ydl_opts = {
+            "format": format_string(format_type, quality),
+            "outtmpl": {
+                "default": os.path.join(
+                    download_path, f"download_{resume_key}.%(ext)s"
+                )
+            },
+            "progress_hooks": [
+                lambda d: self.progress_hook(d, job),
+                meter.sample,
+                manifest.progress_hook,
+                lambda d: self.resume_ledger.progress_hook(resume_key, d),
+            ],
+            "continuedl": True,
+            "postprocessor_hooks": [manifest.postprocessor_hook],
+            "quiet": True,
+            "no_warnings": True,
+            "noprogress": True,
+            "logger": TraceLogger(trace),
+            "buffersize": 1024 * 64,
+            "format_sort": ["res", "ext:mp4:m4a:webm", "proto:https"],
+            "retries": YTDLP_RETRIES,
+            "fragment_retries": YTDLP_RETRIES,
+            "extractor_retries": YTDLP_RETRIES,
+            # A fragment that still fails stops the download for the retry
+            # policy instead of leaving a hole in the file
+            "skip_unavailable_fragments": False,
+        }
+        ydl_opts.update(self.network_policy.tuning(tuning, network))
+
+        ydl_opts["noplaylist"] = True  # Single video only
+
+        if self.ffmpeg_location:
+            ydl_opts["ffmpeg_location"] = self.ffmpeg_location
+
+        self.bandwidth.register(job.id, job.priority)
+        try:
+            # Retries continue the same .part files, so no byte is fetched twice
+            result = call_with_retries(
+                lambda: self._run_steps(job, ydl_opts),
+                self.retry_policy,
+                on_retry=lambda *args: self._on_retry(job, *args),
+                interrupt=lambda: self.queue.raise_if_paused(job),
+            )
+            meter.contended = self.bandwidth.contended(job.id)
+        except BaseException:
+            # Keep the partial files and their ledger entry for the next attempt
+            self.resume_ledger.release(resume_key, finished=False)
+            raise
+        finally:
+            self.bandwidth.unregister(job.id)
+        if isinstance(result, Future):
+            # The entry stays active (and its files unpruned) until the
+            # merge/transcode is through; a failed one keeps them for a retry
+            result.add_done_callback(
+                lambda f: self.resume_ledger.release(
+                    resume_key, finished=not f.cancelled() and f.exception() is None
+                )
+            )
+        else:
+            self.resume_ledger.release(resume_key, finished=True)
+
+        self.tuner.record(url, network.kind, tuning, meter)
+        return result
+
+    def _on_retry(self, job, error, category, attempt, delay):
+        """Before a download is retried: trace it, tell the user, maybe hold it"""
+        job.trace.event(
+            "retry",
+            category=category,
+            attempt=attempt + 1,
+            delay=round(delay, 1),
+            reason=str(error)[:200],
+        )
+        if category == NETWORK and not self.network.state.connected:
+            # Resumed by _network_changed once the link is back
+            with self._lock:
+                self._held_jobs.add(job.id)
+            job.pause_requested = True
+            raise error
+        if self.retry_policy.rule(category).refresh_info:
+            # Signed media URLs have likely expired
+            self.info_cache.invalidate(canonical_url_key(job.url))
+        self._status(job, f"Retrying ({category}) in {delay:.0f}s...")
+
+    def progress_hook(self, d, job, entry_key=None):
+        # Lets a pause request interrupt yt-dlp mid-download
+        self.queue.raise_if_paused(job)
+        job.trace.progress_hook(d)
+        # Only records the event; the front end picks it up when it drains
+        key = f"{job.id}/{entry_key}" if entry_key is not None else job.id
+        self.progress.report(key, d)
+        # Holds this download back while it is over its share of the cap
+        self.bandwidth.throttle(job.id, d, lambda: self.queue.raise_if_paused(job))
+
+    def _run_steps(self, job, ydl_opts):
+        """Download for the job's format and hand off post-processing"""
+        format_type = job.format_type
+
+        if not job.options.get("force") and self._already_downloaded(job, ydl_opts):
+            return None
+
+        # Playlists fan out to their own pool of download workers
+        if format_type == "Playlist (Audio)":
+            self._run_playlist(job, ydl_opts)
+            return None
+
+        # FFmpeg work runs on the transcode stage so this worker can move on
+        # to the next download while it happens
+        result = None
+        if format_type == "Audio":
+            require_mp3 = job.options.get("audio", "MP3") == "MP3"
+            plan = plan_audio(self._select_format(ydl_opts, job), require_mp3)
+            if plan[0] == KEEP:
+                self._write_direct(ydl_opts)
+            paths = self._do_download(ydl_opts, job)
+            if plan[0] == KEEP:
+                for path in paths:
+                    self._finalize_file(path, job)
+            else:
+                result = self.transcoder.submit(
+                    self._finish_audio_and_finalize, job, paths, plan
+                )
+        elif format_type == "Both":
+            result = self._download_and_merge(job, ydl_opts)
+        else:
+            self._write_direct(ydl_opts)
+            for path in self._do_download(ydl_opts, job):
+                self._finalize_file(path, job)
+        return result
+
+    def history_variant(self, job):
+        # What this run downloads, which a metered link may have capped
+        quality = getattr(job, "quality_used", job.quality)
+        return history_variant(job.format_type, quality, job.options.get("audio", "MP3"))
+
+    def _already_downloaded(self, job, ydl_opts):
+        """
+        Finish the job from the history if it was downloaded before: by URL
+        with no network at all, else by extractor and video ID once the
+        (cached) info is known. Playlists are checked entry by entry.
+        """
+        if job.format_type == "Playlist (Audio)":
+            return False
+        variant = self.history_variant(job)
+        row = self.history.find_url(canonical_url_key(job.url), variant)
+        if row is None:
+            import yt_dlp
+
+            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                info = self._extract_info(ydl, job, ydl_opts)
+            if not info or info.get("_type") == "playlist":
+                return False
+            row = self.history.find(
+                info.get("extractor_key") or info.get("extractor"),
+                info.get("id"),
+                variant,
+            )
+            if row is None:
+                return False
+        job.manifest.add(
+            row["path"],
+            {
+                "id": row["video_id"],
+                "extractor_key": row["extractor"],
+                "title": row["title"],
+                "format_id": row["format_id"],
+            },
+            FINAL,
+        )
+        job.trace.event("duplicate", path=row["path"])
+        self._status(job, f"Already downloaded: {os.path.basename(row['path'])}")
+        return True
+
+    def _write_direct(self, ydl_opts):
+        """Download straight into the final folder when no post-processing follows"""
+        direct_dir = self.direct_output_dir() if self.direct_output_dir else None
+        if direct_dir:
+            name = os.path.basename(ydl_opts["outtmpl"]["default"])
+            ydl_opts["outtmpl"] = {"default": os.path.join(direct_dir, name)}
+
+    def _select_format(self, ydl_opts, job):
+        """Run format selection on the (cached) info without downloading"""
+        import yt_dlp
+
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            info = self._extract_info(ydl, job, ydl_opts)
+            selected = ydl.process_ie_result(info, download=False) if info else None
+        return selected or {}
+
+    def _download_and_merge(self, job, ydl_opts):
+        """Download video and audio streams separately and merge them off-thread"""
+        streams = self._select_format(ydl_opts, job).get("requested_formats")
+
+        if not streams:
+            # A pre-muxed format was picked, nothing to merge
+            for path in self._do_download(ydl_opts, job):
+                self._finalize_file(path, job)
+            return None
+
+        base_path = os.path.splitext(ydl_opts["outtmpl"]["default"])[0]
+        stream_opts = dict(ydl_opts)
+        stream_opts["format"] = ",".join(f["format_id"] for f in streams)
+        stream_opts["outtmpl"] = {"default": base_path + ".f%(format_id)s.%(ext)s"}
+        paths = self._do_download(stream_opts, job)
+
+        return self.transcoder.submit(
+            self._merge_and_finalize, job, paths, base_path + ".mkv"
+        )
+
+    def _merge_and_finalize(self, job, paths, output_path):
+        """
+        Transcode stage: mux the streams. A failed mux is retried on the
+        same files with timestamp repair; if that fails too the job fails
+        with the streams kept, so retrying the job only merges again.
+        """
+        attempts = [0]
+
+        def merge():
+            repair = attempts[0] > 0
+            attempts[0] += 1
+            with job.trace.phase(POSTPROCESS):
+                return merge_streams(
+                    self.transcoder.ffmpeg_location, paths, output_path, repair=repair
+                )
+
+        merged = self._retry_postprocess(job, "Merge", merge)
+        job.manifest.update(paths, merged, PROCESSED)
+        self._finalize_file(merged, job)
+
+    def _finish_audio_and_finalize(self, job, paths, plan):
+        """Transcode stage: remux or convert downloaded audio and publish it"""
+        for path in paths:
+            attempts = [0]
+
+            def finish(path=path):
+                # A stream that won't remux is converted instead
+                current = fallback_plan(plan) if attempts[0] else plan
+                attempts[0] += 1
+                with job.trace.phase(POSTPROCESS):
+                    return finish_audio(self.transcoder.ffmpeg_location, path, current)
+
+            final_path = self._retry_postprocess(job, "Audio conversion", finish)
+            job.manifest.update(path, final_path, PROCESSED)
+            self._finalize_file(final_path, job)
+
+    def _retry_postprocess(self, job, step, fn):
+        """Run a post-processing step, redoing only that step if ffmpeg fails"""
+
+        def on_retry(error, category, attempt, delay):
+            if category != POSTPROCESSOR:
+                raise error
+            print(f"{step} failed: {error}")
+            job.trace.event(
+                "retry", category=category, step=step, reason=str(error)[:200]
+            )
+            self._status(job, f"{step} failed, retrying...")
+
+        return call_with_retries(fn, self.retry_policy, on_retry=on_retry)
+
+    def _run_playlist(self, job, ydl_opts):
+        """Download a playlist's audio with parallel downloads and transcodes"""
+
+        def on_entry(index, entry_id, status):
+            if status in (ENTRY_DONE, ENTRY_FAILED, SKIPPED):
+                self.progress.forget(f"{job.id}/{index}:{entry_id}")
+            if status == ENTRY_FAILED:
+                job.trace.event("entry_failed", entry=entry_id)
+
+        variant = self.history_variant(job)
+
+        def is_downloaded(entry):
+            if job.options.get("force"):
+                return False
+            extractor = entry.get("ie_key") or entry.get("extractor_key")
+            return self.history.has(extractor, entry.get("id"), variant)
+
+        # Where a crashed, paused or retried run of this playlist picks up
+        checkpoint = PlaylistCheckpoint(
+            os.path.join(
+                self.download_path,
+                ".playlists",
+                content_key(canonical_url_key(job.url, playlist=True), variant)
+                + ".json",
+            )
+        )
+        if job.options.get("force"):
+            checkpoint.reset()
+
+        playlist = PlaylistDownloader(
+            ydl_opts,
+            self.download_path,
+            ffmpeg_location=self.ffmpeg_location,
+            download_workers=self.playlist_workers,
+            skip_dirs=self.skip_dirs,
+            on_entry=on_entry,
+            transcoder=self.transcoder,
+            require_mp3=job.options.get("audio", "MP3") == "MP3",
+            manifest=job.manifest,
+            on_file=lambda path: self._finalize_file(path, job),
+            progress_hook=lambda key, d: self.progress_hook(d, job, key),
+            is_downloaded=is_downloaded,
+            retry_policy=self.retry_policy,
+            checkpoint=checkpoint,
+            interrupt=lambda: self.queue.raise_if_paused(job),
+        )
+        # Entry downloads and transcodes overlap, so the playlist is one phase
+        with job.trace.phase(DOWNLOAD):
+            playlist.run(job.url)
+        if playlist.failed:
+            raise RuntimeError(f"{len(playlist.failed)} playlist entries failed")
+
+    def _extract_info(self, ydl, job, ydl_opts):
+        """Extract through the info cache, so retries and fallbacks skip the round-trip"""
+        url = job.url
+        key = canonical_url_key(url, playlist=not ydl_opts.get("noplaylist"))
+        with job.trace.phase(EXTRACT):
+            return self.info_cache.get_or_extract(
+                key, lambda: ydl.sanitize_info(extract_unprocessed(ydl, url))
+            )
+
+    def _do_download(self, ydl_opts, job):
+        """Execute the actual download and return the paths of the files written"""
+        import yt_dlp
+
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            info = self._extract_info(ydl, job, ydl_opts)
+            if info:
+                with job.trace.phase(DOWNLOAD):
+                    info = ydl.process_ie_result(info, download=True)
+            # Paths come from what yt-dlp reports, no guessing extensions
+            paths = job.manifest.add_result(info)
+        if not paths:
+            print(f"No files reported for: {job.url}")
+        return paths
+
+    def _finalize_file(self, path, job):
+        """Publish a finished file, queue its scan and record it in the history"""
+        final_path = path
+        if self.publish:
+            with job.trace.phase(MOVE):
+                final_path = self.publish(path) or path
+        if self.media_index:
+            self.media_index.add(final_path)
+        entry = job.manifest.update(path, final_path, FINAL)
+        if entry:
+            # Playlist entries are found by ID only, not by the playlist's URL
+            url_key = None
+            if job.format_type != "Playlist (Audio)":
+                url_key = canonical_url_key(job.url)
+            self.history.record(entry, self.history_variant(job), job.url, url_key)
+
+    def _job_changed(self, job):
+        if job.state in (DONE, FAILED, PAUSED):
+            self.progress.forget(job.id)
+            manifest = getattr(job, "manifest", None)
+            if manifest is not None:
+                manifest.save(force=True)
+            trace = getattr(job, "trace", None)
+            open_trace = trace is not None and trace.state is None
+            # Whatever the job produced is scanned now, not after the debounce;
+            # the SCAN phase is this scan_batch call (add() only queues)
+            if self.media_index:
+                with trace.phase(SCAN) if open_trace else nullcontext():
+                    self.media_index.flush()
+            if open_trace:
+                trace.finish(job.state, job.error)
+                self.metrics.record(trace)
+        if self.on_job_change:
+            self.on_job_change(job)
+
+    def _status(self, job, message):
+        if self.on_status:
+            try:
+                self.on_status(job, message)
+            except Exception as e:
+                print(f"Status listener error: {e}")
@@ -0,0 +1,129 @@
+"""Moving finished files into their final folder: rename first, copy last."""
+
+import errno
+import os
+import threading
+
+# Streaming copy buffer and how often dirty pages are flushed to disk
+COPY_BUFFER = 4 * 1024 * 1024
+FSYNC_EVERY = 64 * 1024 * 1024
+
+
+class FinalizeStats:
+    """Counts how finished files reached their destination"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.in_place_files = 0
+        self.renamed_files = 0
+        self.renamed_bytes = 0
+        self.copied_files = 0
+        self.copied_bytes = 0
+
+    def add(self, method, size):
+        with self._lock:
+            if method == "in_place":
+                self.in_place_files += 1
+            elif method == "rename":
+                self.renamed_files += 1
+                self.renamed_bytes += size
+            else:
+                self.copied_files += 1
+                self.copied_bytes += size
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                "in_place_files": self.in_place_files,
+                "renamed_files": self.renamed_files,
+                "renamed_bytes": self.renamed_bytes,
+                "copied_files": self.copied_files,
+                "copied_bytes": self.copied_bytes,
+            }
+
+
+# Process-wide counters used when no stats object is passed
+stats = FinalizeStats()
+
+
+def same_filesystem(path_a, path_b):
+    try:
+        return os.stat(path_a).st_dev == os.stat(path_b).st_dev
+    except OSError:
+        return False
+
+
+def stream_copy(src, dest):
+    """Copy src to dest with large buffers, syncing in batches; returns bytes copied"""
+    copied = 0
+    unsynced = 0
+    with open(src, "rb") as fin, open(dest, "wb") as fout:
+        in_fd, out_fd = fin.fileno(), fout.fileno()
+        use_sendfile = hasattr(os, "sendfile")
+        while True:
+            if use_sendfile:
+                try:
+                    # Kernel-side copy, no round trip through Python buffers
+                    sent = os.sendfile(out_fd, in_fd, copied, COPY_BUFFER)
+                except OSError:
+                    use_sendfile = False
+                    fin.seek(copied)
+                    fout.seek(copied)
+                    continue
+            else:
+                chunk = fin.read(COPY_BUFFER)
+                fout.write(chunk)
+                sent = len(chunk)
+            if not sent:
+                break
+            copied += sent
+            unsynced += sent
+            if unsynced >= FSYNC_EVERY:
+                fout.flush()
+                os.fsync(out_fd)
+                unsynced = 0
+        fout.flush()
+        os.fsync(out_fd)
+    return copied
+
+
+def finalize_file(src, dest_dir, filename=None, stats_obj=None):
+    """
+    Put `src` into `dest_dir` (as `filename`) and return the final path.
+
+    Already there -> nothing to do. Same filesystem -> atomic rename.
+    Otherwise a streaming copy to a temporary name, renamed into place,
+    then the source is removed.
+    """
+    stats_obj = stats_obj or stats
+    os.makedirs(dest_dir, exist_ok=True)
+    dest = os.path.join(dest_dir, filename or os.path.basename(src))
+    size = os.path.getsize(src)
+
+    if os.path.abspath(src) == os.path.abspath(dest):
+        stats_obj.add("in_place", size)
+        return dest
+
+    if same_filesystem(src, dest_dir):
+        try:
+            os.replace(src, dest)
+            stats_obj.add("rename", size)
+            return dest
+        except OSError as e:
+            # FUSE-backed storage can refuse renames it reports as same-device
+            if e.errno not in (errno.EXDEV, errno.EPERM, errno.EACCES):
+                raise
+
+    tmp_dest = dest + ".part"
+    try:
+        stream_copy(src, tmp_dest)
+        os.replace(tmp_dest, dest)
+    except BaseException:
+        try:
+            os.remove(tmp_dest)
+        except OSError:
+            pass
+        raise
+    os.remove(src)
+    stats_obj.add("copy", size)
+    return dest
@@ -0,0 +1,82 @@
+"""Format selection helpers built from extracted yt-dlp info."""
+
+import re
+
+DEFAULT_QUALITIES = ("Best", "1080p", "720p", "480p", "360p")
+
+_HEIGHT_RE = re.compile(r"^(\d+)p")
+
+
+def quality_height(quality):
+    """Max height for a quality label ("720p", "720p · avc1 · ~80 MB"), or None for Best"""
+    match = _HEIGHT_RE.match(quality or "")
+    return int(match.group(1)) if match else None
+
+
+def format_string(format_type, quality):
+    """Generate yt-dlp format string based on user selection"""
+    height = quality_height(quality)
+    q = f"[height<={height}]" if height else ""
+
+    if format_type == "Audio" or format_type == "Playlist (Audio)":
+        return "bestaudio/best"
+    elif format_type == "Video":
+        return f"bestvideo{q}/best{q}"
+    else:  # Both (Video + Audio)
+        # Prefer pre-muxed formats to avoid FFmpeg merge issues
+        if q:
+            return f"best{q}/bestvideo{q}+bestaudio/best"
+        return "best/bestvideo+bestaudio"
+
+
+def _format_size(fmt, duration=None):
+    size = fmt.get("filesize") or fmt.get("filesize_approx")
+    if not size and duration and fmt.get("tbr"):
+        # tbr is in KBit/s
+        size = fmt["tbr"] * 1000 / 8 * duration
+    return size or 0
+
+
+def _short_codec(codec):
+    return (codec or "").split(".")[0]
+
+
+def quality_options(info):
+    """
+    Build quality labels for the formats a video actually offers,
+    best first, e.g. "1080p · avc1 · ~85 MB".
+    """
+    if not info or info.get("_type") == "playlist":
+        return []
+    formats = info.get("formats") or []
+    duration = info.get("duration")
+
+    audio_size = 0
+    for fmt in formats:
+        if fmt.get("vcodec") == "none" and fmt.get("acodec") not in (None, "none"):
+            audio_size = max(audio_size, _format_size(fmt, duration))
+
+    # Best format per height
+    best = {}
+    for fmt in formats:
+        height = fmt.get("height")
+        if not height or fmt.get("vcodec") in (None, "none"):
+            continue
+        current = best.get(height)
+        if current is None or (fmt.get("tbr") or 0) > (current.get("tbr") or 0):
+            best[height] = fmt
+
+    options = []
+    for height in sorted(best, reverse=True):
+        fmt = best[height]
+        parts = [f"{height}p"]
+        codec = _short_codec(fmt.get("vcodec"))
+        if codec:
+            parts.append(codec)
+        size = _format_size(fmt, duration)
+        if fmt.get("acodec") in (None, "none"):
+            size += audio_size
+        if size:
+            parts.append(f"~{size / (1024 * 1024):.0f} MB")
+        options.append(" · ".join(parts))
+    return options
@@ -0,0 +1,206 @@
+"""SQLite index of completed downloads, for duplicate detection and search."""
+
+import os
+import sqlite3
+import threading
+import time
+
+from .formats import quality_height
+
+# Rows returned by a search when no limit is given
+SEARCH_LIMIT = 100
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS downloads (
+    id INTEGER PRIMARY KEY,
+    extractor TEXT NOT NULL,
+    video_id TEXT NOT NULL,
+    variant TEXT NOT NULL,
+    url_key TEXT,
+    url TEXT,
+    title TEXT,
+    format_id TEXT,
+    path TEXT NOT NULL,
+    size INTEGER,
+    finished REAL NOT NULL,
+    UNIQUE (extractor, video_id, variant)
+);
+CREATE INDEX IF NOT EXISTS downloads_url_key ON downloads (url_key, variant);
+CREATE INDEX IF NOT EXISTS downloads_finished ON downloads (finished);
+"""
+
+# Full-text index over titles and URLs, kept in sync by triggers
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS downloads_fts USING fts5(
+    title, url, content='downloads', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS downloads_ai AFTER INSERT ON downloads BEGIN
+    INSERT INTO downloads_fts (rowid, title, url) VALUES (new.id, new.title, new.url);
+END;
+CREATE TRIGGER IF NOT EXISTS downloads_ad AFTER DELETE ON downloads BEGIN
+    INSERT INTO downloads_fts (downloads_fts, rowid, title, url)
+    VALUES ('delete', old.id, old.title, old.url);
+END;
+CREATE TRIGGER IF NOT EXISTS downloads_au AFTER UPDATE ON downloads BEGIN
+    INSERT INTO downloads_fts (downloads_fts, rowid, title, url)
+    VALUES ('delete', old.id, old.title, old.url);
+    INSERT INTO downloads_fts (rowid, title, url) VALUES (new.id, new.title, new.url);
+END;
+"""
+
+_COLUMNS = (
+    "extractor",
+    "video_id",
+    "variant",
+    "url_key",
+    "url",
+    "title",
+    "format_id",
+    "path",
+    "size",
+    "finished",
+)
+
+
+def history_variant(format_type, quality, audio="MP3"):
+    """
+    What was downloaded, independent of the URL: "audio:mp3",
+    "video:720", "both:best". Playlist entries count as audio downloads.
+    """
+    if format_type in ("Audio", "Playlist (Audio)"):
+        return f"audio:{(audio or 'MP3').lower()}"
+    height = quality_height(quality)
+    kind = "video" if format_type == "Video" else "both"
+    return f"{kind}:{height or 'best'}"
+
+
+class DownloadHistory:
+    """
+    Completed downloads keyed by extractor + video ID + variant. Lookups
+    by canonical URL key need no extraction at all; lookups by ID catch
+    other URLs for the same video. Rows whose file is gone are ignored and
+    replaced when the video is downloaded again.
+
+    Titles and URLs are full-text indexed (FTS5 where SQLite has it,
+    LIKE otherwise), so searching stays fast with tens of thousands of rows.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(_SCHEMA)
+            try:
+                self._db.executescript(_FTS_SCHEMA)
+                self.full_text = True
+            except sqlite3.OperationalError:
+                # SQLite built without FTS5
+                self.full_text = False
+
+    def record(self, entry, variant, url=None, url_key=None):
+        """
+        Remember a finished file; `entry` is a JobManifest entry (needs
+        "extractor", "id" and "path"). Returns False if it cannot be keyed.
+        """
+        if not entry.get("extractor") or not entry.get("id") or not entry.get("path"):
+            return False
+        try:
+            size = os.path.getsize(entry["path"])
+        except OSError:
+            size = None
+        values = (
+            entry["extractor"],
+            entry["id"],
+            variant,
+            url_key,
+            url,
+            entry.get("title"),
+            entry.get("format_id"),
+            entry["path"],
+            size,
+            time.time(),
+        )
+        with self._lock, self._db:
+            self._db.execute(
+                f"INSERT OR REPLACE INTO downloads ({', '.join(_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(_COLUMNS))})",
+                values,
+            )
+        return True
+
+    def find(self, extractor, video_id, variant):
+        """The completed download of this video and variant whose file still exists"""
+        return self._existing(
+            "SELECT * FROM downloads WHERE extractor = ? AND video_id = ? AND variant = ?",
+            (extractor, video_id, variant),
+        )
+
+    def find_url(self, url_key, variant):
+        """Same as find(), by canonical URL key (no extraction needed)"""
+        return self._existing(
+            "SELECT * FROM downloads WHERE url_key = ? AND variant = ? "
+            "ORDER BY finished DESC LIMIT 1",
+            (url_key, variant),
+        )
+
+    def has(self, extractor, video_id, variant):
+        return self.find(extractor, video_id, variant) is not None
+
+    def search(self, text="", limit=SEARCH_LIMIT):
+        """Past downloads matching `text` in title or URL, newest first"""
+        words = text.split()
+        with self._lock:
+            if not words:
+                rows = self._db.execute(
+                    "SELECT * FROM downloads ORDER BY finished DESC LIMIT ?", (limit,)
+                ).fetchall()
+            elif self.full_text:
+                # Prefix match on every word, quoted so no FTS syntax leaks in
+                query = " ".join('"' + w.replace('"', '""') + '"*' for w in words)
+                rows = self._db.execute(
+                    "SELECT d.* FROM downloads_fts JOIN downloads d ON d.id = downloads_fts.rowid "
+                    "WHERE downloads_fts MATCH ? ORDER BY d.finished DESC LIMIT ?",
+                    (query, limit),
+                ).fetchall()
+            else:
+                where = " AND ".join("(title LIKE ? OR url LIKE ?)" for _ in words)
+                params = []
+                for w in words:
+                    params += [f"%{w}%", f"%{w}%"]
+                rows = self._db.execute(
+                    f"SELECT * FROM downloads WHERE {where} ORDER BY finished DESC LIMIT ?",
+                    params + [limit],
+                ).fetchall()
+        return [dict(row) for row in rows]
+
+    def count(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM downloads").fetchone()[0]
+
+    def forget(self, extractor, video_id, variant=None):
+        with self._lock, self._db:
+            if variant is None:
+                self._db.execute(
+                    "DELETE FROM downloads WHERE extractor = ? AND video_id = ?",
+                    (extractor, video_id),
+                )
+            else:
+                self._db.execute(
+                    "DELETE FROM downloads WHERE extractor = ? AND video_id = ? AND variant = ?",
+                    (extractor, video_id, variant),
+                )
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def _existing(self, sql, params):
+        with self._lock:
+            row = self._db.execute(sql, params).fetchone()
+        if row is None or not os.path.exists(row["path"]):
+            return None
+        return dict(row)
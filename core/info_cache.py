@@ -0,0 +1,258 @@
+"""Cache of yt-dlp info dicts keyed by canonical video/playlist IDs."""
+
+import collections
+import copy
+import hashlib
+import json
+import os
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+# Stream URLs inside an info dict expire, so entries must not live too long
+DEFAULT_TTL = 30 * 60
+DEFAULT_MEMORY_ENTRIES = 32
+DEFAULT_DISK_ENTRIES = 200
+
+YOUTUBE_HOSTS = ("youtube.com", "youtube-nocookie.com", "youtu.be")
+YOUTUBE_ID_PATHS = ("shorts", "embed", "live", "v")
+
+# Query parameters that never change what gets downloaded
+TRACKING_PARAMS = ("si", "feature", "fbclid", "gclid", "pp", "ab_channel")
+
+# "url" results followed before giving up on reaching a video or playlist
+MAX_URL_RESULTS = 5
+
+# Fields of a "url_transparent" result not passed on to what it points at
+_TRANSPARENT_EXEMPT = ("_type", "url", "ie_key", "id", "extractor", "extractor_key")
+
+
+def canonical_url_key(url, playlist=False):
+    """
+    Reduce a URL to a stable cache key, e.g. every form of a YouTube link
+    becomes "youtube:<video id>" (or "youtube:playlist:<id>" in playlist mode).
+    """
+    parts = urlsplit(url.strip())
+    if not parts.scheme:
+        parts = urlsplit("https://" + url.strip())
+
+    host = (parts.hostname or "").lower()
+    for prefix in ("www.", "m.", "music."):
+        if host.startswith(prefix):
+            host = host[len(prefix) :]
+    query = dict(parse_qsl(parts.query))
+    path = [p for p in parts.path.split("/") if p]
+
+    if host in YOUTUBE_HOSTS:
+        if playlist and query.get("list"):
+            return f"youtube:playlist:{query['list']}"
+        if host == "youtu.be" and path:
+            return f"youtube:{path[0]}"
+        if query.get("v"):
+            return f"youtube:{query['v']}"
+        if len(path) >= 2 and path[0] in YOUTUBE_ID_PATHS:
+            return f"youtube:{path[1]}"
+        if path == ["playlist"] and query.get("list"):
+            return f"youtube:playlist:{query['list']}"
+
+    query = sorted(
+        (k, v)
+        for k, v in query.items()
+        if k not in TRACKING_PARAMS and not k.startswith("utm_")
+    )
+    key = host + "/" + "/".join(path)
+    if query:
+        key += "?" + urlencode(query)
+    if playlist:
+        key = "playlist:" + key
+    return key
+
+
+def extract_unprocessed(ydl, url):
+    """
+    Extract `url` without format selection (process=False), following
+    "url" and "url_transparent" results (short links, redirects, YouTube
+    tabs) to the video or playlist they point at.
+
+    This is what gets cached: a processed dict keeps the selection it was
+    processed with (requested_formats, format_id, ...), and processing it
+    again for another format carries that stale selection along.
+    """
+    info = ydl.extract_info(url, download=False, process=False)
+    for _ in range(MAX_URL_RESULTS):
+        if not info or info.get("_type") not in ("url", "url_transparent"):
+            break
+        target = ydl.extract_info(
+            info["url"], download=False, ie_key=info.get("ie_key"), process=False
+        )
+        if target and info["_type"] == "url_transparent":
+            # As yt-dlp does: the outer result's metadata wins
+            target = dict(target)
+            target.update(
+                (k, v)
+                for k, v in info.items()
+                if v is not None and k not in _TRANSPARENT_EXEMPT
+            )
+        info = target
+    return info
+
+
+class InfoCache:
+    """
+    In-memory LRU in front of an on-disk JSON store, both with a TTL.
+
+    Info dicts must already be JSON-safe (pass them through
+    `YoutubeDL.sanitize_info`) and unprocessed (see `extract_unprocessed`),
+    so each use selects formats afresh. Callers always get a private copy,
+    since yt-dlp mutates the dicts it processes.
+    """
+
+    def __init__(
+        self,
+        cache_dir=None,
+        ttl=DEFAULT_TTL,
+        max_entries=DEFAULT_MEMORY_ENTRIES,
+        max_disk_entries=DEFAULT_DISK_ENTRIES,
+    ):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self._memory = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.seconds_saved = 0.0
+
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            self.prune()
+
+    def get(self, key):
+        """Return a copy of the cached info dict, or None"""
+        entry = self._lookup(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.seconds_saved += entry["extract_seconds"]
+        return copy.deepcopy(entry["info"])
+
+    def put(self, key, info, extract_seconds=0.0):
+        entry = {
+            "key": key,
+            "stored": time.time(),
+            "extract_seconds": extract_seconds,
+            "info": copy.deepcopy(info),
+        }
+        with self._lock:
+            self._remember(key, entry)
+        if self.cache_dir:
+            self._write(key, entry)
+
+    def get_or_extract(self, key, extract):
+        """Return the cached info, or call `extract()` and cache its result"""
+        info = self.get(key)
+        if info is not None:
+            return info
+        start = time.monotonic()
+        info = extract()
+        if info:
+            self.put(key, info, time.monotonic() - start)
+        return info
+
+    def invalidate(self, key):
+        with self._lock:
+            self._memory.pop(key, None)
+        if self.cache_dir:
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "seconds_saved": round(self.seconds_saved, 2),
+                "memory_entries": len(self._memory),
+            }
+
+    def prune(self):
+        """Delete expired files and trim the disk store to max_disk_entries"""
+        if not self.cache_dir:
+            return
+        now = time.time()
+        files = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                mtime = os.path.getmtime(path)
+                if now - mtime > self.ttl:
+                    os.remove(path)
+                else:
+                    files.append((mtime, path))
+            except OSError:
+                continue
+        files.sort()
+        for _, path in files[: max(0, len(files) - self.max_disk_entries)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _lookup(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if now - entry["stored"] <= self.ttl:
+                    self._memory.move_to_end(key)
+                    return entry
+                del self._memory[key]
+
+        if not self.cache_dir:
+            return None
+        entry = self._read(key)
+        if entry is None or entry.get("key") != key:
+            return None
+        if now - entry.get("stored", 0) > self.ttl:
+            self.invalidate(key)
+            return None
+        with self._lock:
+            self._remember(key, entry)
+        return entry
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _path(self, key):
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, digest + ".json")
+
+    def _read(self, key):
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, key, entry):
+        path = self._path(key)
+        tmp_path = path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"Could not write info cache entry: {e}")
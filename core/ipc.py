@@ -0,0 +1,562 @@
+"""Local IPC between a download engine in its own process and the front ends attached to it."""
+
+import json
+import os
+import queue
+import secrets
+import socket
+import socketserver
+import threading
+
+from .download_queue import (
+    DONE,
+    FAILED,
+    PAUSED,
+    PROCESSING,
+    QUEUED,
+    RUNNING,
+    DownloadJob,
+)
+from .manifest import DOWNLOADED, JobManifest
+from .network import NetworkState, NetworkWatcher, StaticConnectivity
+from .progress import ProgressAggregator
+
+HOST = "127.0.0.1"
+
+# How often progress is pushed to attached clients (per second)
+PUSH_FPS = 10
+
+# Seconds a client waits for the answer to a call
+CALL_TIMEOUT = 30.0
+
+# Seconds between connection attempts while the service isn't up
+RECONNECT_SECONDS = 1.0
+
+
+class RemoteError(RuntimeError):
+    """A call failed in the engine process, or the engine couldn't be reached"""
+
+
+def write_endpoint(path, address, token):
+    """Publish where the service listens (keep `path` in private storage)"""
+    data = {"host": address[0], "port": address[1], "token": token, "pid": os.getpid()}
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(path + ".tmp", path)
+
+
+def read_endpoint(path):
+    """((host, port), token) from an endpoint file, or None if there is none"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return (data["host"], int(data["port"])), data["token"]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def _send(sock, message):
+    sock.sendall(json.dumps(message).encode("utf-8") + b"\n")
+
+
+class _Client:
+    """One attached front end; a writer thread drains its outbox so a slow
+    client never blocks the engine's worker threads"""
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.outbox = queue.Queue()
+        threading.Thread(target=self._write, daemon=True).start()
+
+    def send(self, message):
+        self.outbox.put(message)
+
+    def close(self):
+        self.outbox.put(None)
+
+    def _write(self):
+        while True:
+            message = self.outbox.get()
+            if message is None:
+                break
+            try:
+                _send(self.sock, message)
+            except OSError:
+                break
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+
+class EngineServer:
+    """
+    Serves a DownloadEngine to front ends in other processes over a local
+    TCP socket speaking JSON lines.
+
+    A client first sends {"op": "hello", "token": ...} and gets every job
+    and the network state back. After that each {"id": n, "op": ...,
+    "args": [...]} is answered with {"id": n, "result": ...} or {"id": n,
+    "error": ...}, and job changes, status messages, network changes and
+    progress (coalesced, PUSH_FPS) are pushed to all clients as {"event":
+    ...} lines. Build the engine with `job_changed`, `job_status` and
+    `network_changed` as its listeners, then call `serve(engine)`.
+    """
+
+    def __init__(self, host=HOST, port=0, token=None):
+        self.token = token or secrets.token_hex(16)
+        self.engine = None
+        self._clients = set()
+        self._lock = threading.Lock()
+        self.stopped = threading.Event()
+        self._server = socketserver.ThreadingTCPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self.address = self._server.server_address[:2]
+
+    @property
+    def attached(self):
+        """Number of connected front ends"""
+        with self._lock:
+            return len(self._clients)
+
+    def serve(self, engine):
+        """Start accepting clients and pushing progress for `engine`"""
+        self.engine = engine
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        threading.Thread(target=self._push_progress, daemon=True).start()
+
+    def close(self):
+        if self.stopped.is_set():
+            return
+        self.stopped.set()
+        self._server.shutdown()
+        self._server.server_close()
+        with self._lock:
+            clients, self._clients = list(self._clients), set()
+        for client in clients:
+            client.close()
+
+    # Engine listeners (worker threads)
+
+    def job_changed(self, job):
+        self._broadcast({"event": "job", "job": self.job_dict(job)})
+
+    def job_status(self, job, message):
+        self._broadcast({"event": "status", "job": job.id, "message": message})
+
+    def network_changed(self, state):
+        if self.engine is None:
+            return
+        # Queued jobs may be held back or let go now; their reasons go first
+        for job in self.engine.queue.jobs((QUEUED,)):
+            self.job_changed(job)
+        self._broadcast({"event": "network", "state": state.to_dict()})
+
+    def job_dict(self, job):
+        data = job.to_dict()
+        manifest = getattr(job, "manifest", None)
+        if manifest is not None:
+            data["files"] = [
+                [entry["path"], entry["stage"]] for entry in manifest.to_dict()["entries"]
+            ]
+        if job.state == QUEUED and self.engine is not None:
+            data["defer_reason"] = self.engine.defer_reason(job)
+        return data
+
+    # Calls (one thread each, so a slow extraction doesn't hold up a pause)
+
+    def _call(self, op, args):
+        engine = self.engine
+        if op == "add":
+            return self.job_dict(engine.add(*args))
+        if op == "pause":
+            return engine.queue.pause(*args)
+        if op == "resume":
+            return engine.queue.resume(*args)
+        if op == "promote":
+            return engine.promote(*args)
+        if op == "check_network":
+            return engine.check_network().to_dict()
+        if op == "quality_options":
+            # The info dict stays in this process; the UI only needs labels
+            return engine.quality_options(*args)
+        if op == "history_search":
+            return engine.history.search(*args)
+        if op == "history_count":
+            return engine.history.count()
+        if op == "metrics_summary":
+            return engine.metrics.summary(*args)
+        if op == "info_cache_stats":
+            return engine.info_cache.stats()
+        if op == "shutdown":
+            threading.Thread(target=self.close, daemon=True).start()
+            return True
+        raise RemoteError(f"unknown call {op!r}")
+
+    def _answer(self, client, message):
+        reply = {"id": message.get("id")}
+        try:
+            reply["result"] = self._call(message.get("op"), message.get("args") or [])
+        except Exception as e:
+            reply["error"] = str(e) or type(e).__name__
+        client.send(reply)
+
+    def _serve_client(self, sock, lines):
+        try:
+            hello = json.loads(next(lines, b"{}"))
+        except ValueError:
+            return
+        if hello.get("op") != "hello" or not secrets.compare_digest(
+            str(hello.get("token")), self.token
+        ):
+            _send(sock, {"event": "error", "error": "bad token"})
+            return
+
+        client = _Client(sock)
+        # Snapshot and registration in one step: a broadcast can't fall
+        # between them, and later ones queue behind the hello
+        with self._lock:
+            client.send(
+                {
+                    "event": "hello",
+                    "jobs": [self.job_dict(job) for job in self.engine.queue.jobs()],
+                    "network": self.engine.network.state.to_dict(),
+                }
+            )
+            self._clients.add(client)
+        try:
+            for line in lines:
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    continue
+                threading.Thread(
+                    target=self._answer, args=(client, message), daemon=True
+                ).start()
+        finally:
+            with self._lock:
+                self._clients.discard(client)
+            client.close()
+
+    def _broadcast(self, message):
+        # Only queues the message, so it's cheap under the lock
+        with self._lock:
+            for client in self._clients:
+                client.send(message)
+
+    def _push_progress(self):
+        while not self.stopped.wait(1.0 / PUSH_FPS):
+            # Drained even with nobody attached, so events don't pile up
+            snapshots = self.engine.progress.drain()
+            if not snapshots or not self.attached:
+                continue
+            self._broadcast(
+                {
+                    "event": "progress",
+                    "snapshots": [
+                        [snap.job_id, snap.status, snap.filename, snap.downloaded, snap.total]
+                        for snap in snapshots
+                    ],
+                }
+            )
+
+    def _handler(self):
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                server._serve_client(self.connection, iter(self.rfile.readline, b""))
+
+        return Handler
+
+
+class _RemoteQueue:
+    """The DownloadQueue calls a front end makes; reads come from the client's copy"""
+
+    def __init__(self, remote):
+        self._remote = remote
+
+    def jobs(self, states=None):
+        jobs = self._remote._job_list()
+        if states is None:
+            return jobs
+        return [job for job in jobs if job.state in states]
+
+    def get(self, job_id):
+        return self._remote._jobs.get(job_id)
+
+    def counts(self):
+        counts = {QUEUED: 0, RUNNING: 0, PROCESSING: 0, PAUSED: 0, FAILED: 0, DONE: 0}
+        for job in self.jobs():
+            counts[job.state] = counts.get(job.state, 0) + 1
+        return counts
+
+    def pause(self, job_id):
+        return self._remote.call("pause", job_id)
+
+    def resume(self, job_id):
+        return self._remote.call("resume", job_id)
+
+
+class _RemoteHistory:
+    def __init__(self, remote):
+        self._remote = remote
+
+    def search(self, *args):
+        return self._remote.call("history_search", *args)
+
+    def count(self):
+        return self._remote.call("history_count")
+
+
+class _RemoteMetrics:
+    def __init__(self, remote):
+        self._remote = remote
+
+    def summary(self, *args):
+        return self._remote.call("metrics_summary", *args)
+
+
+class _RemoteInfoCache:
+    def __init__(self, remote):
+        self._remote = remote
+
+    def stats(self):
+        return self._remote.call("info_cache_stats")
+
+
+class RemoteEngine:
+    """
+    Front end side of an EngineServer, standing in for the DownloadEngine
+    it serves: `queue`, `progress` (fed by the pushed progress and drained
+    like the engine's own), `network`, `history`, `metrics`, `info_cache`
+    (stats only), `add()`, `promote()`, `defer_reason()`, `check_network()`
+    and `quality_options()`. Listeners are called from the reader thread.
+
+    Jobs are copies rebuilt from what the service pushes. `start()` keeps
+    (re)connecting to the endpoint in `endpoint_path` until `stop()`,
+    which only detaches: downloads go on in the service.
+    """
+
+    def __init__(
+        self,
+        endpoint_path,
+        on_job_change=None,
+        on_status=None,
+        on_network_change=None,
+        timeout=CALL_TIMEOUT,
+    ):
+        self.endpoint_path = endpoint_path
+        self.on_job_change = on_job_change
+        self.on_status = on_status
+        self.on_network_change = on_network_change
+        self.timeout = timeout
+        self.queue = _RemoteQueue(self)
+        self.history = _RemoteHistory(self)
+        self.metrics = _RemoteMetrics(self)
+        self.info_cache = _RemoteInfoCache(self)
+        self.progress = ProgressAggregator()
+        self._connectivity = StaticConnectivity()
+        self.network = NetworkWatcher(self._connectivity, self._network_changed)
+        self.connected = threading.Event()
+        self._lock = threading.Lock()
+        # Calls come from the UI thread, Clock callbacks and worker threads;
+        # one sendall at a time keeps their JSON lines from interleaving
+        self._send_lock = threading.Lock()
+        self._jobs = {}
+        # Progress keys seen per job, forgotten when the job stops
+        self._progress_keys = {}
+        self._sock = None
+        self._calls = {}
+        self._next_id = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self, wait=False):
+        """Detach from the service; its downloads keep running"""
+        self._stop.set()
+        self._disconnect()
+
+    def call(self, op, *args):
+        waiter = [threading.Event(), None]
+        with self._lock:
+            sock = self._sock
+            if sock is None:
+                raise RemoteError("download service not connected")
+            self._next_id += 1
+            call_id = self._next_id
+            self._calls[call_id] = waiter
+        try:
+            with self._send_lock:
+                _send(sock, {"id": call_id, "op": op, "args": list(args)})
+            if not waiter[0].wait(self.timeout):
+                raise RemoteError(f"{op}: the download service didn't answer")
+        except OSError as e:
+            raise RemoteError(f"{op}: {e}")
+        finally:
+            with self._lock:
+                self._calls.pop(call_id, None)
+        reply = waiter[1]
+        if "error" in reply:
+            raise RemoteError(reply["error"])
+        return reply.get("result")
+
+    # DownloadEngine interface
+
+    def add(self, url, format_type="Both", quality="Best", options=None, priority=None):
+        data = self.call("add", url, format_type, quality, options, priority)
+        # The pushed job events may already be newer than the answer
+        return self._jobs.get(data["id"]) or self._store_job(data)
+
+    def promote(self, job_id):
+        return self.call("promote", job_id)
+
+    def defer_reason(self, job):
+        return getattr(job, "defer_reason", None)
+
+    def check_network(self):
+        self._set_network(self.call("check_network"))
+        return self.network.state
+
+    def quality_options(self, url):
+        return self.call("quality_options", url)
+
+    def shutdown_service(self):
+        """Ask the service to stop serving (the process decides what follows)"""
+        return self.call("shutdown")
+
+    # Connection
+
+    def _connect(self):
+        endpoint = read_endpoint(self.endpoint_path)
+        if endpoint is None:
+            raise RemoteError(f"no download service endpoint at {self.endpoint_path}")
+        address, token = endpoint
+        try:
+            sock = socket.create_connection(address, timeout=self.timeout)
+            _send(sock, {"op": "hello", "token": token})
+            reader = sock.makefile("rb")
+            hello = json.loads(reader.readline() or b"{}")
+            sock.settimeout(None)
+        except (OSError, ValueError) as e:
+            raise RemoteError(f"download service unreachable: {e}")
+        if hello.get("event") != "hello":
+            sock.close()
+            raise RemoteError(hello.get("error") or "download service refused")
+        # Jobs the service dropped meanwhile (pruned, or a new process) go too
+        with self._lock:
+            self._sock = sock
+            self._jobs = {}
+        for data in hello.get("jobs", []):
+            self._job_event(data)
+        self._set_network(hello.get("network"))
+        self.connected.set()
+        return reader
+
+    def _disconnect(self):
+        with self._lock:
+            sock, self._sock = self._sock, None
+            calls, self._calls = list(self._calls.values()), {}
+        self.connected.clear()
+        for waiter in calls:
+            waiter[1] = {"error": "download service disconnected"}
+            waiter[0].set()
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            sock.close()
+
+    def _run(self):
+        reported = None
+        while not self._stop.is_set():
+            try:
+                reader = self._connect()
+            except RemoteError as e:
+                # Normal while the service process is starting; said once
+                if str(e) != reported:
+                    print(f"Waiting for the download service: {e}")
+                    reported = str(e)
+                self._stop.wait(RECONNECT_SECONDS)
+                continue
+            reported = None
+            print(f"Attached to the download service ({self.endpoint_path})")
+            for line in iter(reader.readline, b""):
+                try:
+                    self._dispatch(json.loads(line))
+                except Exception as e:
+                    print(f"Service event error: {e}")
+            self._disconnect()
+
+    def _dispatch(self, message):
+        if "id" in message:
+            with self._lock:
+                waiter = self._calls.get(message["id"])
+            if waiter is not None:
+                waiter[1] = message
+                waiter[0].set()
+            return
+        event = message.get("event")
+        if event == "job":
+            self._job_event(message["job"])
+        elif event == "progress":
+            for key, status, filename, downloaded, total in message["snapshots"]:
+                with self._lock:
+                    self._progress_keys.setdefault(key.partition("/")[0], set()).add(key)
+                self.progress.report(
+                    key,
+                    {
+                        "status": status,
+                        "filename": filename,
+                        "downloaded_bytes": downloaded,
+                        "total_bytes": total,
+                    },
+                )
+        elif event == "status":
+            job = self._jobs.get(message["job"])
+            if job is not None and self.on_status:
+                self.on_status(job, message["message"])
+        elif event == "network":
+            self._set_network(message["state"])
+
+    def _store_job(self, data):
+        job = DownloadJob.from_dict(data)
+        job.defer_reason = data.get("defer_reason")
+        job.manifest = JobManifest(job.id)
+        for path, stage in data.get("files") or []:
+            job.manifest.add(path, stage=stage or DOWNLOADED)
+        with self._lock:
+            self._jobs[job.id] = job
+        return job
+
+    def _job_event(self, data):
+        job = self._store_job(data)
+        if job.state in (DONE, FAILED, PAUSED):
+            with self._lock:
+                keys = self._progress_keys.pop(job.id, ())
+            for key in keys:
+                self.progress.forget(key)
+        if self.on_job_change:
+            self.on_job_change(job)
+
+    def _job_list(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return sorted(jobs, key=lambda job: job.created)
+
+    def _set_network(self, state):
+        if state:
+            self._connectivity.set(NetworkState(**state))
+            self.network.check()
+
+    def _network_changed(self, state):
+        if self.on_network_change:
+            self.on_network_change(state)
@@ -0,0 +1,141 @@
+"""Per-job manifest of the files a download actually produced."""
+
+import json
+import os
+import threading
+import time
+
+# Seconds between saves while a job keeps updating its manifest
+SAVE_INTERVAL = 2.0
+
+# Lifecycle of a manifest entry
+DOWNLOADED = "downloaded"
+PROCESSED = "processed"
+FINAL = "final"
+
+
+class JobManifest:
+    """
+    Exact output paths of one job, taken from what yt-dlp reports
+    (`requested_downloads`, progress and post-processor hooks) instead of
+    guessing file names. Later stages call `update()` as files are
+    merged, transcoded or moved, so media scanning and history can read
+    the final locations from here.
+    """
+
+    def __init__(self, job_id, store_dir=None):
+        self.job_id = job_id
+        self.store_dir = store_dir
+        self.entries = []
+        self._lock = threading.Lock()
+        self._last_save = 0.0
+        # filename -> info seen by hooks, used when yt-dlp returns no paths
+        self._hook_files = {}
+
+    def progress_hook(self, d):
+        if d.get("status") == "finished" and d.get("filename"):
+            self._remember_hook_file(d["filename"], d.get("info_dict") or {})
+
+    def postprocessor_hook(self, d):
+        info = d.get("info_dict") or {}
+        if d.get("status") == "finished" and info.get("filepath"):
+            self._remember_hook_file(info["filepath"], info)
+
+    def add(self, path, info=None, stage=DOWNLOADED):
+        info = info or {}
+        entry = {
+            "id": info.get("id"),
+            "extractor": info.get("extractor_key") or info.get("extractor"),
+            "title": info.get("title"),
+            "format_id": info.get("format_id"),
+            "path": path,
+            "stage": stage,
+            "updated": time.time(),
+        }
+        with self._lock:
+            self.entries.append(entry)
+        return entry
+
+    def add_result(self, info):
+        """Record every file of a processed info dict; returns the new paths"""
+        paths = []
+        if not info:
+            return paths
+        entries = info.get("entries") or [info]
+        for entry in entries:
+            if not entry:
+                continue
+            downloads = entry.get("requested_downloads") or []
+            found = [d for d in downloads if d.get("filepath")]
+            if not found:
+                found = self._hook_files_for(entry.get("id"))
+            for download in found:
+                merged = dict(entry)
+                merged.update(download)
+                self.add(download["filepath"], merged)
+                paths.append(download["filepath"])
+        return paths
+
+    def update(self, old_paths, new_path, stage):
+        """
+        Replace the entries for `old_paths` with one entry at `new_path`
+        and return a copy of it (None if none of the paths is known)
+        """
+        if isinstance(old_paths, str):
+            old_paths = [old_paths]
+        with self._lock:
+            matches = [e for e in self.entries if e["path"] in old_paths]
+            if not matches:
+                return None
+            keep = matches[0]
+            self.entries = [e for e in self.entries if e is keep or e not in matches]
+            keep["path"] = new_path
+            keep["stage"] = stage
+            keep["updated"] = time.time()
+            entry = dict(keep)
+        self.save()
+        return entry
+
+    def paths(self, stage=None):
+        with self._lock:
+            return [e["path"] for e in self.entries if stage is None or e["stage"] == stage]
+
+    def to_dict(self):
+        with self._lock:
+            return {"job_id": self.job_id, "entries": [dict(e) for e in self.entries]}
+
+    def save(self, force=False):
+        """
+        Write the manifest; without `force`, at most every SAVE_INTERVAL
+        (a long playlist updates it twice per entry)
+        """
+        if not self.store_dir:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_save < SAVE_INTERVAL:
+            return
+        self._last_save = now
+        path = os.path.join(self.store_dir, f"{self.job_id}.json")
+        try:
+            os.makedirs(self.store_dir, exist_ok=True)
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(self.to_dict(), f)
+            os.replace(path + ".tmp", path)
+        except OSError as e:
+            print(f"Could not save manifest: {e}")
+
+    def _remember_hook_file(self, filename, info):
+        with self._lock:
+            self._hook_files[filename] = {
+                "filepath": filename,
+                "id": info.get("id"),
+                "format_id": info.get("format_id"),
+            }
+
+    def _hook_files_for(self, video_id):
+        with self._lock:
+            return [
+                f
+                for f in self._hook_files.values()
+                if f["id"] == video_id and os.path.exists(f["filepath"])
+            ]
@@ -0,0 +1,125 @@
+"""Batched, de-duplicated media scanner requests for finished files."""
+
+import json
+import os
+import threading
+
+# Scan once this many files are waiting...
+BATCH_SIZE = 25
+# ...or once no new file has arrived for this long (seconds)
+DEBOUNCE_SECONDS = 2.0
+
+# Files remembered as indexed (oldest are forgotten first)
+MAX_REMEMBERED = 2000
+
+
+class MediaIndexer:
+    """
+    Collects finalized paths and hands them to `scan_batch(paths)` in
+    groups: when BATCH_SIZE files are pending, DEBOUNCE_SECONDS after the
+    last one, or on `flush()` (e.g. at the end of a job). Files already
+    scanned with the same size and mtime are skipped, so re-finalizing or
+    re-downloading a file does not trigger another scan.
+    """
+
+    def __init__(
+        self,
+        scan_batch,
+        state_path=None,
+        batch_size=BATCH_SIZE,
+        debounce=DEBOUNCE_SECONDS,
+    ):
+        self.scan_batch = scan_batch
+        self.state_path = state_path
+        self.batch_size = batch_size
+        self.debounce = debounce
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._timer = None
+        # path -> [size, mtime_ns] at the time it was scanned
+        self._indexed = {}
+        self.batches = 0
+        self.scanned = 0
+        self.skipped = 0
+        if state_path:
+            try:
+                with open(state_path, "r", encoding="utf-8") as f:
+                    self._indexed = json.load(f)
+            except (OSError, ValueError):
+                self._indexed = {}
+
+    def add(self, path):
+        """Queue `path` for scanning (any thread)"""
+        signature = self._signature(path)
+        if signature is None:
+            return
+        with self._lock:
+            if self._indexed.get(path) == signature:
+                self.skipped += 1
+                return
+            self._pending[path] = signature
+            full = len(self._pending) >= self.batch_size
+            if not full:
+                self._restart_timer_locked()
+        if full:
+            self.flush()
+
+    def flush(self):
+        """Scan everything pending now"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        try:
+            self.scan_batch(list(pending))
+        except Exception as e:
+            print(f"Media scan failed: {e}")
+            return
+        with self._lock:
+            for path, signature in pending.items():
+                # Re-insert so the most recently scanned are kept longest
+                self._indexed.pop(path, None)
+                self._indexed[path] = signature
+            while len(self._indexed) > MAX_REMEMBERED:
+                del self._indexed[next(iter(self._indexed))]
+            self.batches += 1
+            self.scanned += len(pending)
+            self._save_locked()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "batches": self.batches,
+                "scanned": self.scanned,
+                "skipped": self.skipped,
+                "pending": len(self._pending),
+            }
+
+    def _restart_timer_locked(self):
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(self.debounce, self.flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+    @staticmethod
+    def _signature(path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return [st.st_size, st.st_mtime_ns]
+
+    def _save_locked(self):
+        if not self.state_path:
+            return
+        tmp_path = self.state_path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._indexed, f)
+            os.replace(tmp_path, self.state_path)
+        except OSError as e:
+            print(f"Could not save media index: {e}")
@@ -0,0 +1,293 @@
+"""Per-job timelines (phases, first byte, throughput, retries) and their log."""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Phases the engine records, in pipeline order
+EXTRACT = "extract"
+DOWNLOAD = "download"
+POSTPROCESS = "postprocess"
+MOVE = "move"
+SCAN = "scan"
+PHASES = (EXTRACT, DOWNLOAD, POSTPROCESS, MOVE, SCAN)
+
+# Throughput is sampled at most this often (seconds)
+SAMPLE_INTERVAL = 1.0
+
+# Caps that keep one trace small; samples are thinned when full
+MAX_SAMPLES = 240
+MAX_EVENTS = 50
+
+# Rotating log: size of one file and how many old files are kept
+LOG_MAX_BYTES = 512 * 1024
+LOG_BACKUPS = 3
+
+
+class JobTrace:
+    """
+    Timeline of one job run: phases with start/end offsets, instant marks
+    (first byte), events (fallbacks, warnings), counters (retries) and
+    bytes/second over time. Safe to feed from hook and worker threads.
+    """
+
+    def __init__(self, job_id, url, format_type):
+        self.job_id = job_id
+        self.url = url
+        self.format_type = format_type
+        self.started = time.time()
+        self._t0 = time.monotonic()
+        self._lock = threading.Lock()
+        self.phases = []
+        self.marks = {}
+        self.events = []
+        self.counters = {}
+        self.samples = []
+        self.state = None
+        self.error = ""
+        self.seconds = None
+        self._interval = SAMPLE_INTERVAL
+        self._files = {}
+        self._last_sample = None
+
+    def _now(self):
+        return time.monotonic() - self._t0
+
+    @contextmanager
+    def phase(self, name):
+        start = self._now()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.phases.append(
+                    {"name": name, "start": round(start, 3), "end": round(self._now(), 3)}
+                )
+
+    def mark(self, name):
+        with self._lock:
+            self.marks.setdefault(name, round(self._now(), 3))
+
+    def event(self, kind, **fields):
+        with self._lock:
+            if len(self.events) < MAX_EVENTS:
+                self.events.append(dict(fields, kind=kind, t=round(self._now(), 3)))
+            self.counters[kind] = self.counters.get(kind, 0) + 1
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def progress_hook(self, d):
+        """Marks the first byte and samples bytes/second"""
+        if d.get("status") != "downloading":
+            return
+        downloaded = d.get("downloaded_bytes") or 0
+        if not downloaded:
+            return
+        now = self._now()
+        with self._lock:
+            self.marks.setdefault("first_byte", round(now, 3))
+            self._files[d.get("filename")] = downloaded
+            total = sum(self._files.values())
+            if self._last_sample is None:
+                self._last_sample = (now, total)
+                return
+            last_t, last_bytes = self._last_sample
+            if now - last_t < self._interval:
+                return
+            self.samples.append([round(now, 1), round((total - last_bytes) / (now - last_t))])
+            self._last_sample = (now, total)
+            if len(self.samples) >= MAX_SAMPLES:
+                # Keep the whole timeline at half the resolution
+                self.samples = self.samples[1::2]
+                self._interval *= 2
+
+    def finish(self, state, error=""):
+        with self._lock:
+            self.state = state
+            self.error = error
+            self.seconds = round(self._now(), 3)
+
+    def phase_totals(self):
+        """Seconds spent per phase name (repeated phases are summed)"""
+        with self._lock:
+            totals = {}
+            for p in self.phases:
+                totals[p["name"]] = round(totals.get(p["name"], 0) + p["end"] - p["start"], 3)
+            return totals
+
+    def to_dict(self):
+        totals = self.phase_totals()
+        with self._lock:
+            downloaded = sum(self._files.values())
+            return {
+                "job_id": self.job_id,
+                "url": self.url,
+                "format_type": self.format_type,
+                "started": self.started,
+                "seconds": self.seconds,
+                "state": self.state,
+                "error": self.error,
+                "bytes": downloaded,
+                "phase_totals": totals,
+                "phases": list(self.phases),
+                "marks": dict(self.marks),
+                "counters": dict(self.counters),
+                "events": list(self.events),
+                "samples": list(self.samples),
+            }
+
+
+class TraceLogger:
+    """yt-dlp logger that keeps warnings, errors and retries on the job's trace"""
+
+    def __init__(self, trace):
+        self.trace = trace
+
+    def _check_retry(self, msg):
+        if "Retrying" in msg:
+            self.trace.count("retries")
+
+    def debug(self, msg):
+        self._check_retry(msg)
+
+    def warning(self, msg):
+        self._check_retry(msg)
+        self.trace.event("warning", message=msg[:200])
+
+    def error(self, msg):
+        self.trace.event("error", message=msg[:200])
+
+
+class MetricsLog:
+    """Finished traces as JSON lines in a size-rotated file"""
+
+    def __init__(self, path, max_bytes=LOG_MAX_BYTES, backups=LOG_BACKUPS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._lock = threading.Lock()
+
+    def record(self, trace):
+        line = json.dumps(trace.to_dict()) + "\n"
+        with self._lock:
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                if (
+                    os.path.exists(self.path)
+                    and os.path.getsize(self.path) + len(line) > self.max_bytes
+                ):
+                    self._rotate_locked()
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line)
+            except OSError as e:
+                print(f"Could not write metrics: {e}")
+
+    def _rotate_locked(self):
+        for index in range(self.backups - 1, 0, -1):
+            older = f"{self.path}.{index}"
+            if os.path.exists(older):
+                os.replace(older, f"{self.path}.{index + 1}")
+        if self.backups:
+            os.replace(self.path, self.path + ".1")
+        else:
+            os.remove(self.path)
+
+    def recent(self, limit=100):
+        """Newest traces first, across the rotated files"""
+        traces = []
+        files = [self.path] + [f"{self.path}.{i}" for i in range(1, self.backups + 1)]
+        with self._lock:
+            for path in files:
+                try:
+                    with open(path, "r", encoding="utf-8") as f:
+                        lines = f.read().splitlines()
+                except OSError:
+                    continue
+                for line in reversed(lines):
+                    try:
+                        traces.append(json.loads(line))
+                    except ValueError:
+                        continue
+                    if len(traces) >= limit:
+                        return traces
+        return traces
+
+    def summary(self, limit=100):
+        return summarize(self.recent(limit))
+
+
+def _percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def summarize(traces):
+    """Where the time goes across `traces` (dicts from JobTrace.to_dict)"""
+    summary = {"jobs": len(traces), "states": {}, "phases": {}, "counters": {}}
+    if not traces:
+        return summary
+    phase_values = {}
+    first_bytes, rates = [], []
+    total_seconds = 0.0
+    for trace in traces:
+        state = trace.get("state") or "unknown"
+        summary["states"][state] = summary["states"].get(state, 0) + 1
+        total_seconds += trace.get("seconds") or 0
+        for name, seconds in (trace.get("phase_totals") or {}).items():
+            phase_values.setdefault(name, []).append(seconds)
+        for name, n in (trace.get("counters") or {}).items():
+            summary["counters"][name] = summary["counters"].get(name, 0) + n
+        if "first_byte" in (trace.get("marks") or {}):
+            first_bytes.append(trace["marks"]["first_byte"])
+        download = (trace.get("phase_totals") or {}).get(DOWNLOAD)
+        if download and trace.get("bytes"):
+            rates.append(trace["bytes"] / download)
+    for name, values in phase_values.items():
+        summary["phases"][name] = {
+            "count": len(values),
+            "mean": round(sum(values) / len(values), 3),
+            "p50": round(_percentile(values, 0.5), 3),
+            "p90": round(_percentile(values, 0.9), 3),
+            "share": round(sum(values) / total_seconds, 3) if total_seconds else 0,
+        }
+    if first_bytes:
+        summary["first_byte"] = {
+            "mean": round(sum(first_bytes) / len(first_bytes), 3),
+            "p90": round(_percentile(first_bytes, 0.9), 3),
+        }
+    if rates:
+        summary["download_rate"] = round(sum(rates) / len(rates))
+    return summary
+
+
+def format_summary(summary, cache=None):
+    """Human-readable lines for the in-app metrics view (`cache`: InfoCache.stats())"""
+    if not summary.get("jobs"):
+        return "No downloads recorded yet"
+    states = ", ".join(f"{n} {s}" for s, n in sorted(summary["states"].items()))
+    lines = [f"Last {summary['jobs']} jobs: {states}"]
+    if "first_byte" in summary:
+        fb = summary["first_byte"]
+        lines.append(f"First byte: {fb['mean']:.1f}s avg, {fb['p90']:.1f}s p90")
+    if "download_rate" in summary:
+        lines.append(f"Download rate: {summary['download_rate'] / (1024 * 1024):.2f} MB/s avg")
+    order = {name: i for i, name in enumerate(PHASES)}
+    for name in sorted(summary["phases"], key=lambda n: order.get(n, len(order))):
+        p = summary["phases"][name]
+        lines.append(
+            f"{name}: {p['mean']:.1f}s avg, {p['p90']:.1f}s p90, {p['share'] * 100:.0f}% of time"
+        )
+    if summary["counters"]:
+        counters = ", ".join(f"{k} {v}" for k, v in sorted(summary["counters"].items()))
+        lines.append(f"Events: {counters}")
+    if cache and cache["hits"] + cache["misses"]:
+        lines.append(
+            f"Info cache: {cache['hits']} hits, {cache['misses']} misses "
+            f"({cache['hit_rate'] * 100:.0f}%), {cache['seconds_saved']:.1f}s "
+            "of extraction saved"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,178 @@
+"""Connectivity state and the download policy that follows it."""
+
+import threading
+
+from .download_queue import PROMOTED
+from .formats import quality_height
+
+# Connection kinds reported by providers
+WIFI = "wifi"
+CELLULAR = "cellular"
+ETHERNET = "ethernet"
+OTHER = "other"
+OFFLINE = "none"
+UNKNOWN = "unknown"
+
+# Seconds between connectivity checks
+POLL_SECONDS = 5.0
+
+# Limits on metered links
+METERED_MAX_HEIGHT = 720
+METERED_MAX_FRAGMENTS = 4
+
+VIDEO_FORMATS = ("Video", "Both")
+
+
+class NetworkState:
+    """What the device is connected to right now"""
+
+    def __init__(self, kind=UNKNOWN, metered=False, connected=True):
+        self.kind = kind
+        self.metered = bool(metered)
+        self.connected = bool(connected) and kind != OFFLINE
+
+    def __eq__(self, other):
+        return isinstance(other, NetworkState) and self.as_tuple() == other.as_tuple()
+
+    def __hash__(self):
+        return hash(self.as_tuple())
+
+    def __repr__(self):
+        return (
+            f"NetworkState({self.kind!r}, metered={self.metered}, "
+            f"connected={self.connected})"
+        )
+
+    def as_tuple(self):
+        return (self.kind, self.metered, self.connected)
+
+    def to_dict(self):
+        return {"kind": self.kind, "metered": self.metered, "connected": self.connected}
+
+
+class StaticConnectivity:
+    """
+    Connectivity provider reporting a fixed state until `set()` is called:
+    the desktop default, and a fake for exercising the policy.
+    """
+
+    def __init__(self, state=None):
+        self.state = state or NetworkState()
+
+    def current(self):
+        return self.state
+
+    def set(self, state):
+        self.state = state
+
+
+class NetworkPolicy:
+    """
+    Picks per-job download settings and queue admission from the network
+    state. Offline, nothing starts. On a metered link, "Best" video jobs
+    wait for an unmetered one, other video qualities are capped at
+    `metered_max_height`, fragment concurrency at `metered_fragments` and
+    the global rate at `metered_rate_limit` (0 keeps the engine's own cap).
+    PROMOTED jobs are taken as the user insisting and only wait for a
+    connection.
+    """
+
+    def __init__(
+        self,
+        metered_max_height=METERED_MAX_HEIGHT,
+        metered_fragments=METERED_MAX_FRAGMENTS,
+        metered_rate_limit=0,
+        defer_best_on_metered=True,
+    ):
+        self.metered_max_height = metered_max_height
+        self.metered_fragments = metered_fragments
+        self.metered_rate_limit = metered_rate_limit
+        self.defer_best_on_metered = defer_best_on_metered
+
+    def defer_reason(self, job, state):
+        """Why `job` can't start on `state` yet, or None if it can"""
+        if not state.connected:
+            return "Waiting for a connection"
+        if job.priority >= PROMOTED or not state.metered:
+            return None
+        if (
+            self.defer_best_on_metered
+            and job.format_type in VIDEO_FORMATS
+            and quality_height(job.quality) is None
+        ):
+            return "Waiting for Wi-Fi"
+        return None
+
+    def quality(self, job, state):
+        """The quality label to download `job` at on `state`"""
+        if not state.metered or job.priority >= PROMOTED:
+            return job.quality
+        if job.format_type not in VIDEO_FORMATS or not self.metered_max_height:
+            return job.quality
+        height = quality_height(job.quality)
+        if height is None or height > self.metered_max_height:
+            return f"{self.metered_max_height}p"
+        return job.quality
+
+    def tuning(self, settings, state):
+        """Tuner suggestions with the link's limits applied"""
+        settings = dict(settings)
+        fragments = settings.get("concurrent_fragment_downloads")
+        if state.metered and self.metered_fragments and fragments:
+            settings["concurrent_fragment_downloads"] = min(
+                fragments, self.metered_fragments
+            )
+        return settings
+
+    def rate_limit(self, state, default=0):
+        if state.metered and self.metered_rate_limit:
+            if not default:
+                return self.metered_rate_limit
+            return min(default, self.metered_rate_limit)
+        return default
+
+
+class NetworkWatcher:
+    """Polls a connectivity provider and calls `on_change(state)` when it changes"""
+
+    def __init__(self, provider, on_change, interval=POLL_SECONDS):
+        self.provider = provider
+        self.on_change = on_change
+        self.interval = interval
+        self._lock = threading.Lock()
+        self.state = self._read()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def check(self):
+        """Read the provider now; returns the state, calling on_change if it differs"""
+        state = self._read()
+        with self._lock:
+            changed = state != self.state
+            self.state = state
+        if changed:
+            try:
+                self.on_change(state)
+            except Exception as e:
+                print(f"Network listener error: {e}")
+        return state
+
+    def _read(self):
+        try:
+            return self.provider.current()
+        except Exception as e:
+            print(f"Connectivity check failed: {e}")
+            return NetworkState()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
@@ -0,0 +1,438 @@
+"""Parallel playlist engine: flat extraction, fan-out downloads, pooled transcodes."""
+
+import itertools
+import json
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .download_queue import JobPaused
+from .info_cache import extract_unprocessed
+from .manifest import PROCESSED
+from .retry import call_with_retries
+from .transcode import TranscodeStage, fallback_plan, finish_audio, plan_audio
+
+# Playlist entries are saved as "<title> [<id>].<ext>" so they can be found again
+ENTRY_TEMPLATE = "%(title).80s [%(id)s].%(ext)s"
+
+_ENTRY_ID_RE = re.compile(r"\[([^\[\]]+)\]\.[A-Za-z0-9]+$")
+
+# Entries taken from the listing but not finished yet (downloading,
+# transcoding or waiting for either), per download worker
+ENTRIES_PER_WORKER = 2
+
+# Keys of a flat entry kept in the checkpoint to retry it without relisting
+_FLAT_KEYS = ("id", "url", "webpage_url", "title", "ie_key")
+
+SKIPPED = "skipped"
+DOWNLOADING = "downloading"
+TRANSCODING = "transcoding"
+ENTRY_DONE = "done"
+ENTRY_FAILED = "failed"
+
+
+def ids_on_disk(directories):
+    """Collect the entry IDs of every "... [<id>].<ext>" file in `directories`"""
+    ids = set()
+    for directory in directories:
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            continue
+        for name in names:
+            if name.endswith(".part"):
+                continue
+            match = _ENTRY_ID_RE.search(name)
+            if match:
+                ids.add(match.group(1))
+    return ids
+
+
+def entry_identity(entry):
+    """What tells a flat entry apart (feeds often list URLs without IDs)"""
+    entry = entry or {}
+    return entry.get("id") or entry.get("url") or entry.get("webpage_url")
+
+
+class PlaylistCheckpoint:
+    """
+    How far a playlist run got, saved to `path` as entries finish: every
+    entry before `cursor` is settled (done, skipped or failed) and `failed`
+    keeps the flat entries that failed. A run resumed after a crash, pause
+    or retry lists the playlist from the cursor and retries just the failed
+    entries before it. `last_id` is the entry at cursor - 1, to notice a
+    playlist that changed in between.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self._lock = threading.Lock()
+        self.cursor = 0
+        self.last_id = None
+        self.failed = {}
+        # Settled entries past the cursor, waiting for the ones before them
+        self._settled = {}
+        if path:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                self.cursor = int(data.get("cursor", 0))
+                self.last_id = data.get("last_id")
+                self.failed = {int(i): e for i, e in data.get("failed", {}).items()}
+            except (OSError, ValueError, TypeError, AttributeError):
+                self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.cursor = 0
+            self.last_id = None
+            self.failed = {}
+            self._settled = {}
+
+    def failed_before_cursor(self):
+        """(index, flat entry) of the failed entries the listing won't repeat"""
+        with self._lock:
+            return sorted((i, e) for i, e in self.failed.items() if i < self.cursor)
+
+    def settle(self, index, entry, failed=False):
+        """Record that entry `index` finished; moves the cursor past a contiguous run"""
+        with self._lock:
+            if failed:
+                self.failed[index] = {k: entry.get(k) for k in _FLAT_KEYS if entry.get(k)}
+            else:
+                self.failed.pop(index, None)
+            if index >= self.cursor:
+                self._settled[index] = entry_identity(entry)
+            while self.cursor in self._settled:
+                self.last_id = self._settled.pop(self.cursor)
+                self.cursor += 1
+            self._save_locked()
+
+    def finish(self):
+        """The whole playlist was walked: forget it unless entries failed"""
+        with self._lock:
+            if self.failed:
+                self._save_locked()
+                return
+        if self.path:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+    def _save_locked(self):
+        if not self.path:
+            return
+        data = {
+            "cursor": self.cursor,
+            "last_id": self.last_id,
+            "failed": {str(i): e for i, e in self.failed.items()},
+        }
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(self.path + ".tmp", self.path)
+        except OSError as e:
+            print(f"Could not save playlist checkpoint: {e}")
+
+
+class PlaylistDownloader:
+    """
+    Downloads a playlist's audio with separate limits for network and CPU work.
+
+    Entries are listed with flat extraction (no per-entry round-trips up
+    front) and taken from the listing lazily: at most `window` of them are
+    in flight, so a channel of thousands of videos holds a few resolved
+    info dicts at a time. They are downloaded as raw audio by
+    `download_workers` threads, and each
+    finished file is handed to a TranscodeStage (the shared `transcoder`, or
+    a private one with `transcode_workers` ffmpeg processes) while the next
+    downloads keep the link busy. With `require_mp3=False` streams that are
+    already in a playable codec are kept or remuxed instead of transcoded.
+
+    `on_entry(index, entry_id, status)` reports per-entry state,
+    `on_file(path)` receives every finished file, `manifest` (a
+    JobManifest) records every output path, and
+    `progress_hook(key, d)` gets yt-dlp progress with a per-entry key.
+    Entries for which `is_downloaded(entry)` returns True (e.g. found in
+    the download history) are skipped like files already on disk.
+    With a `retry_policy` (a RetryPolicy) each entry's download is retried
+    on transient failures and a failed remux falls back to a transcode.
+    A `checkpoint` (PlaylistCheckpoint) makes the run resumable mid-way;
+    `interrupt()` is called before each entry is started and may raise to
+    stop taking new ones (e.g. on pause).
+    """
+
+    def __init__(
+        self,
+        ydl_opts,
+        output_dir,
+        ffmpeg_location=None,
+        download_workers=3,
+        transcode_workers=None,
+        transcoder=None,
+        require_mp3=True,
+        manifest=None,
+        skip_dirs=(),
+        on_entry=None,
+        on_file=None,
+        progress_hook=None,
+        is_downloaded=None,
+        retry_policy=None,
+        checkpoint=None,
+        interrupt=None,
+        window=None,
+    ):
+        self.ydl_opts = ydl_opts
+        self.output_dir = output_dir
+        self.ffmpeg_location = ffmpeg_location
+        self.download_workers = max(1, download_workers)
+        self.transcode_workers = transcode_workers
+        self.transcoder = transcoder
+        self.require_mp3 = require_mp3
+        self.manifest = manifest
+        self.skip_dirs = tuple(skip_dirs)
+        self.on_entry = on_entry
+        self.on_file = on_file
+        self.progress_hook = progress_hook
+        self.is_downloaded = is_downloaded
+        self.retry_policy = retry_policy
+        self.checkpoint = checkpoint or PlaylistCheckpoint()
+        self.interrupt = interrupt
+        self.window = window or self.download_workers * ENTRIES_PER_WORKER
+        self._lock = threading.Lock()
+        self._slots = None
+        self._local = threading.local()
+        self._ydls = []
+        self.failed = []
+
+    def list_entries(self, url, start=0):
+        """
+        Flat-extract the playlist (following url results to it), yielding
+        (index, entry) lazily from `start` on. Paged listings fetch only
+        the pages from there; missing entries come through as None.
+        """
+        import yt_dlp
+        from yt_dlp.utils import PagedList
+
+        opts = dict(self.ydl_opts)
+        opts.update({"extract_flat": "in_playlist", "noplaylist": False})
+        with yt_dlp.YoutubeDL(opts) as ydl:
+            # Channel tabs, short links etc. come back as url results first
+            info = extract_unprocessed(ydl, url)
+            if not info:
+                return
+            entries = info.get("entries")
+            if entries is None:
+                # A single video, not a playlist
+                entries = [info]
+            if isinstance(entries, PagedList):
+                entries = _paged(entries, start)
+            else:
+                entries = itertools.islice(entries, start, None)
+            for index, entry in enumerate(entries, start):
+                yield index, entry
+
+    def run(self, url):
+        """Download every entry, returning the number of finished files"""
+        done_ids = ids_on_disk((self.output_dir,) + self.skip_dirs)
+        finished = [0]
+        transcoder = self.transcoder or TranscodeStage(
+            self.ffmpeg_location, self.transcode_workers
+        )
+        self._slots = threading.Semaphore(self.window)
+        self._local = threading.local()
+
+        def start(index, entry):
+            entry_id = entry.get("id")
+            if entry_id and (
+                entry_id in done_ids
+                or (self.is_downloaded and self.is_downloaded(entry))
+            ):
+                self._report(index, entry_id, SKIPPED)
+                self.checkpoint.settle(index, entry)
+                return
+            if self.interrupt:
+                self.interrupt()
+            # Blocks until an entry in flight is done, so the listing
+            # isn't read further ahead than the downloads
+            self._slots.acquire()
+            downloaders.submit(self._download_entry, index, entry, transcoder, finished)
+
+        try:
+            with ThreadPoolExecutor(
+                self.download_workers, thread_name_prefix="download"
+            ) as downloaders:
+                listing = self._listing(url)
+                # Entries that failed last time, then the rest of the playlist
+                for index, entry in self.checkpoint.failed_before_cursor():
+                    start(index, entry)
+                for index, entry in listing:
+                    if entry:
+                        start(index, entry)
+                    else:
+                        self.checkpoint.settle(index, {})
+            # Downloads are done; wait for the transcodes still in flight
+            for _ in range(self.window):
+                self._slots.acquire()
+            self.checkpoint.finish()
+        finally:
+            if transcoder is not self.transcoder:
+                transcoder.shutdown()
+            with self._lock:
+                ydls, self._ydls = self._ydls, []
+            for ydl in ydls:
+                ydl.close()
+        return finished[0]
+
+    def _listing(self, url):
+        """The listing from the checkpoint's cursor, or all of it if the playlist changed"""
+        cursor = self.checkpoint.cursor
+        if cursor:
+            # Start one early to check the entry before the cursor is still there
+            listing = self.list_entries(url, cursor - 1)
+            first = next(listing, None)
+            if first is not None and entry_identity(first[1]) == self.checkpoint.last_id:
+                return listing
+            print("Playlist changed since the checkpoint, walking it again")
+            listing.close()
+            self.checkpoint.reset()
+        return self.list_entries(url)
+
+    def _download_entry(self, index, entry, transcoder, finished):
+        """Download one entry and hand it to the transcoder; settles it on failure"""
+        try:
+            path, plan = self._fetch_entry(index, entry)
+            transcoder.submit(
+                self._transcode_entry, index, entry, path, plan, finished
+            )
+        except Exception as e:
+            if self._paused(e):
+                # Left unsettled, so the resumed run lists it again
+                self._slots.release()
+                return
+            self._fail(index, entry, e)
+
+    def _paused(self, error):
+        """Whether `error` is the job being paused (yt-dlp may wrap JobPaused)"""
+        if isinstance(error, JobPaused):
+            return True
+        if self.interrupt is None:
+            return False
+        try:
+            self.interrupt()
+        except JobPaused:
+            return True
+        return False
+
+    def _entry_ydl(self):
+        """
+        This download thread's YoutubeDL and its current entry key. It is
+        reused for every entry the thread takes: building one registers
+        all extractors, which costs more CPU than a short entry.
+        """
+        state = getattr(self._local, "ydl", None)
+        if state is None:
+            import yt_dlp
+
+            current = {"key": None}
+            opts = dict(self.ydl_opts)
+            opts.update(
+                {
+                    "format": "bestaudio/best",
+                    "noplaylist": True,
+                    "outtmpl": {
+                        "default": os.path.join(self.output_dir, ENTRY_TEMPLATE)
+                    },
+                    "postprocessors": [],
+                }
+            )
+            if self.progress_hook:
+                opts["progress_hooks"] = [
+                    lambda d: self.progress_hook(current["key"], d)
+                ]
+            state = self._local.ydl = (yt_dlp.YoutubeDL(opts), current)
+            with self._lock:
+                self._ydls.append(state[0])
+        return state
+
+    def _fetch_entry(self, index, entry):
+        entry_id = entry.get("id")
+        entry_url = entry.get("url") or entry.get("webpage_url")
+        ydl, current = self._entry_ydl()
+        current["key"] = f"{index}:{entry_id}"
+
+        def download():
+            info = ydl.extract_info(entry_url, download=True)
+            downloads = (info or {}).get("requested_downloads") or []
+            fmt = downloads[0] if downloads else (info or {})
+            return info, fmt, fmt.get("filepath") or ydl.prepare_filename(info)
+
+        self._report(index, entry_id, DOWNLOADING)
+        # A pause ends the waits between download attempts
+        info, fmt, path = self._with_retries(download, self.interrupt)
+        if self.manifest:
+            self.manifest.add(path, dict(info or {}, **fmt))
+        return path, plan_audio(fmt, self.require_mp3)
+
+    def _transcode_entry(self, index, entry, path, plan, finished):
+        entry_id = entry.get("id")
+        attempts = [0]
+
+        def finish():
+            current = fallback_plan(plan) if attempts[0] else plan
+            attempts[0] += 1
+            return finish_audio(self.ffmpeg_location, path, current)
+
+        self._report(index, entry_id, TRANSCODING)
+        try:
+            final_path = self._with_retries(finish)
+            if self.manifest:
+                self.manifest.update(path, final_path, PROCESSED)
+            if self.on_file:
+                self.on_file(final_path)
+        except Exception as e:
+            self._fail(index, entry, e)
+            return
+        with self._lock:
+            finished[0] += 1
+        self._report(index, entry_id, ENTRY_DONE)
+        self._settle(index, entry)
+
+    def _with_retries(self, fn, interrupt=None):
+        if self.retry_policy is None:
+            return fn()
+        return call_with_retries(fn, self.retry_policy, interrupt=interrupt)
+
+    def _fail(self, index, entry, error):
+        entry_id = entry.get("id")
+        print(f"Playlist entry {index} ({entry_id}) failed: {error}")
+        with self._lock:
+            self.failed.append((index, entry_id, str(error)[:200]))
+        self._report(index, entry_id, ENTRY_FAILED)
+        self._settle(index, entry, failed=True)
+
+    def _settle(self, index, entry, failed=False):
+        """An entry in flight is finished with: record it and free its slot"""
+        self.checkpoint.settle(index, entry, failed)
+        self._slots.release()
+
+    def _report(self, index, entry_id, status):
+        if self.on_entry:
+            try:
+                self.on_entry(index, entry_id, status)
+            except Exception as e:
+                print(f"Playlist listener error: {e}")
+
+
+def _paged(entries, start):
+    """Iterate a yt-dlp PagedList from `start` in page-sized slices"""
+    size = max(1, getattr(entries, "_pagesize", 0) or 50)
+    while True:
+        page = entries.getslice(start, start + size)
+        yield from page
+        if len(page) < size:
+            return
+        start += size
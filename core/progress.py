@@ -0,0 +1,166 @@
+"""Coalescing progress pipeline between yt-dlp hooks and the UI."""
+
+import collections
+import time
+
+# Seconds of samples used for the smoothed speed/ETA
+SPEED_WINDOW = 5.0
+
+# Marker event telling drain() to drop a job's state
+_FORGET = "_forget"
+
+
+def format_speed(speed_raw):
+    """Bytes per second -> "1.2 MB/s" (or "--")"""
+    if speed_raw is None:
+        return "--"
+    try:
+        if speed_raw >= 1024 * 1024:
+            return f"{speed_raw / (1024 * 1024):.1f} MB/s"
+        elif speed_raw >= 1024:
+            return f"{speed_raw / 1024:.1f} KB/s"
+        return f"{speed_raw:.0f} B/s"
+    except (TypeError, ValueError):
+        return "--"
+
+
+def format_eta(eta_raw):
+    """Seconds -> "m:ss" or "h:mm:ss" (or "--")"""
+    if eta_raw is None:
+        return "--"
+    try:
+        eta_seconds = int(eta_raw)
+    except (TypeError, ValueError):
+        return "--"
+    if eta_seconds >= 3600:
+        return f"{eta_seconds // 3600}:{(eta_seconds % 3600) // 60:02d}:{eta_seconds % 60:02d}"
+    return f"{eta_seconds // 60}:{eta_seconds % 60:02d}"
+
+
+def format_size(downloaded, total):
+    """Bytes -> "12.3 MB / 45.6 MB" (empty when the total is unknown)"""
+    if not total:
+        return ""
+    return f"{downloaded / (1024 * 1024):.1f} MB / {total / (1024 * 1024):.1f} MB"
+
+
+class ProgressSnapshot:
+    """Latest coalesced progress of one job, as published to the UI"""
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self.status = "downloading"
+        self.filename = None
+        self.downloaded = 0
+        self.total = 0
+        self.speed = None
+        self.eta = None
+        self.updated = 0.0
+
+    @property
+    def percent(self):
+        if self.status == "finished":
+            return 100.0
+        if self.total > 0:
+            return min(100.0, self.downloaded * 100.0 / self.total)
+        return 0.0
+
+
+class ProgressAggregator:
+    """
+    Collects hook events from any number of worker threads and publishes
+    one coalesced snapshot per job when the UI calls `drain()`.
+
+    `report()` only appends to a deque (atomic under the GIL), so hooks
+    never block on a lock or schedule anything on the main loop.
+    """
+
+    def __init__(self, window=SPEED_WINDOW):
+        self.window = window
+        self._events = collections.deque()
+        self._snapshots = {}
+        self._samples = {}
+        # Count of hook calls vs. drains, to see how much coalescing saves
+        self.events_received = 0
+        self.publishes = 0
+
+    def report(self, job_id, d):
+        """Record a yt-dlp progress dict (worker thread)"""
+        total = d.get("total_bytes") or d.get("total_bytes_estimate") or 0
+        self._events.append(
+            (
+                job_id,
+                time.monotonic(),
+                d.get("status"),
+                d.get("filename"),
+                d.get("downloaded_bytes") or 0,
+                total,
+            )
+        )
+
+    def forget(self, job_id):
+        """Drop a finished job on the next drain (worker thread)"""
+        self._events.append((job_id, time.monotonic(), _FORGET, None, 0, 0))
+
+    def drain(self):
+        """Apply pending events and return the snapshots that changed (UI thread)"""
+        changed = {}
+        events = self._events
+        while True:
+            try:
+                job_id, now, status, filename, downloaded, total = events.popleft()
+            except IndexError:
+                break
+            self.events_received += 1
+
+            if status == _FORGET:
+                self._snapshots.pop(job_id, None)
+                self._samples.pop(job_id, None)
+                changed.pop(job_id, None)
+                continue
+
+            snap = self._snapshots.get(job_id)
+            if snap is None:
+                snap = self._snapshots[job_id] = ProgressSnapshot(job_id)
+                self._samples[job_id] = collections.deque()
+            samples = self._samples[job_id]
+
+            # A new file (video then audio stream) restarts the byte counter
+            if filename != snap.filename or downloaded < snap.downloaded:
+                samples.clear()
+
+            snap.status = status or snap.status
+            snap.filename = filename
+            snap.downloaded = downloaded
+            snap.total = total
+            snap.updated = now
+
+            samples.append((now, downloaded))
+            while samples and now - samples[0][0] > self.window:
+                samples.popleft()
+            changed[job_id] = snap
+
+        for snap in changed.values():
+            self._update_rates(snap)
+        if changed:
+            self.publishes += 1
+        return list(changed.values())
+
+    def snapshot(self, job_id):
+        return self._snapshots.get(job_id)
+
+    def _update_rates(self, snap):
+        if snap.status != "downloading":
+            snap.speed = snap.eta = None
+            return
+        samples = self._samples.get(snap.job_id)
+        if not samples or len(samples) < 2:
+            return
+        (t0, b0), (t1, b1) = samples[0], samples[-1]
+        if t1 - t0 <= 0:
+            return
+        snap.speed = (b1 - b0) / (t1 - t0)
+        if snap.speed > 0 and snap.total > snap.downloaded:
+            snap.eta = (snap.total - snap.downloaded) / snap.speed
+        else:
+            snap.eta = None
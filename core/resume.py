@@ -0,0 +1,135 @@
+"""Stable output names and a ledger of partial downloads, for resuming after restarts."""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+# How often (seconds) progress is written to the ledger while downloading
+SAVE_INTERVAL = 2.0
+
+# Partial downloads untouched for this long are given up and deleted
+STALE_AFTER = 7 * 24 * 3600
+
+
+def content_key(canonical_key, *options):
+    """Stable short name for a (video, format choices) pair"""
+    raw = "|".join([canonical_key] + [str(o) for o in options])
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+class ResumeLedger:
+    """
+    Remembers every unfinished download by content key: which job owns it,
+    its partial files and how far it got (bytes, fragment index).
+
+    Since output names are derived from the key, a re-queued URL writes to
+    the same `.part` / `.ytdl` files and yt-dlp continues from there.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._last_save = 0.0
+        if path:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError):
+                self._entries = {}
+
+    def acquire(self, key, job_id, url):
+        """
+        Claim `key` for `job_id` and return (name_key, resumed_entry).
+        If another running job holds the key, a job-specific key is returned
+        so the two never write the same files.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry.get("job_id") != job_id and entry.get("active"):
+                key = f"{key}_{job_id}"
+                entry = self._entries.get(key)
+            resumed = dict(entry) if entry and entry.get("bytes") else None
+            self._entries[key] = dict(
+                entry or {},
+                url=url,
+                job_id=job_id,
+                active=True,
+                started=(entry or {}).get("started", time.time()),
+                updated=time.time(),
+            )
+            self._save_locked(force=True)
+        return key, resumed
+
+    def progress_hook(self, key, d):
+        """Record partial state from a yt-dlp progress dict"""
+        if d.get("status") != "downloading":
+            return
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            files = entry.setdefault("files", [])
+            tmp_name = d.get("tmpfilename")
+            if tmp_name and tmp_name not in files:
+                files.append(tmp_name)
+            entry["bytes"] = d.get("downloaded_bytes") or entry.get("bytes", 0)
+            if d.get("fragment_index") is not None:
+                entry["fragment_index"] = d["fragment_index"]
+                entry["fragment_count"] = d.get("fragment_count")
+            entry["updated"] = time.time()
+            self._save_locked()
+
+    def release(self, key, finished):
+        """Job stopped: forget the entry if finished, otherwise keep it for resume"""
+        with self._lock:
+            if finished:
+                self._entries.pop(key, None)
+            elif key in self._entries:
+                self._entries[key]["active"] = False
+            self._save_locked(force=True)
+
+    def reset_active(self):
+        """At startup no job is running, whatever the ledger says"""
+        with self._lock:
+            for entry in self._entries.values():
+                entry["active"] = False
+            self._save_locked(force=True)
+
+    def prune(self, max_age=STALE_AFTER):
+        """Delete partial files of downloads abandoned for longer than `max_age`"""
+        now = time.time()
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                if entry.get("active") or now - entry.get("updated", 0) < max_age:
+                    continue
+                for path in entry.get("files", []):
+                    for leftover in (path, path + ".ytdl"):
+                        try:
+                            os.remove(leftover)
+                        except OSError:
+                            pass
+                del self._entries[key]
+            self._save_locked(force=True)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            return dict(entry) if entry else None
+
+    def _save_locked(self, force=False):
+        if not self.path:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_save < SAVE_INTERVAL:
+            return
+        self._last_save = now
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Could not save resume ledger: {e}")
@@ -0,0 +1,205 @@
+"""Failure classification and retry timing for downloads and post-processing."""
+
+import random
+import time
+
+# Failure categories
+NETWORK = "network"
+THROTTLED = "throttled"
+FORBIDDEN = "forbidden"
+EXTRACTOR = "extractor"
+POSTPROCESSOR = "postprocessor"
+UNKNOWN = "unknown"
+
+# Exception class names (anywhere in the MRO) per category, so yt-dlp
+# doesn't have to be imported to tell its errors apart
+_NETWORK_ERRORS = (
+    "TransportError",
+    "URLError",
+    "TimeoutError",
+    "timeout",
+    "ConnectionError",
+    "IncompleteRead",
+    "ContentTooShortError",
+    "SSLError",
+    "RemoteDisconnected",
+)
+_EXTRACTOR_ERRORS = ("ExtractorError", "UnsupportedError", "GeoRestrictedError")
+_POSTPROCESSOR_ERRORS = ("PostProcessingError", "FFmpegError")
+
+# Messages of errors yt-dlp only reports as text
+_NETWORK_MESSAGES = (
+    "timed out",
+    "connection reset",
+    "connection refused",
+    "network is unreachable",
+    "temporary failure in name resolution",
+    "unable to download video data",
+    "did not get any data blocks",
+)
+
+
+class RetryRule:
+    """How often and how patiently one failure category is retried"""
+
+    def __init__(self, attempts, base, cap, refresh_info=False):
+        self.attempts = attempts
+        self.base = base
+        self.cap = cap
+        # Signed media URLs expire; extract again before retrying
+        self.refresh_info = refresh_info
+
+
+DEFAULT_RULES = {
+    NETWORK: RetryRule(attempts=4, base=2.0, cap=60.0),
+    THROTTLED: RetryRule(attempts=3, base=15.0, cap=120.0),
+    FORBIDDEN: RetryRule(attempts=2, base=1.0, cap=5.0, refresh_info=True),
+    POSTPROCESSOR: RetryRule(attempts=2, base=1.0, cap=5.0),
+}
+
+
+def _causes(error):
+    """`error` and everything it wraps (yt-dlp's exc_info/cause, __cause__, ...)"""
+    seen = set()
+    pending = [error]
+    while pending:
+        current = pending.pop(0)
+        if current is None or id(current) in seen:
+            continue
+        seen.add(id(current))
+        yield current
+        exc_info = getattr(current, "exc_info", None)
+        if isinstance(exc_info, tuple) and len(exc_info) > 1:
+            pending.append(exc_info[1])
+        for attr in ("cause", "__cause__", "__context__"):
+            cause = getattr(current, attr, None)
+            if isinstance(cause, BaseException):
+                pending.append(cause)
+
+
+def _class_names(error):
+    return {cls.__name__ for cls in type(error).__mro__}
+
+
+def http_status(error):
+    """HTTP status code carried by `error` or anything it wraps, or None"""
+    for cause in _causes(error):
+        for attr in ("status", "code"):
+            status = getattr(cause, attr, None)
+            if isinstance(status, int) and 100 <= status < 600:
+                return status
+    return None
+
+
+def retry_after(error):
+    """Seconds from a Retry-After header on the failed response, or None"""
+    for cause in _causes(error):
+        response = getattr(cause, "response", None) or cause
+        headers = getattr(response, "headers", None)
+        if headers is None:
+            continue
+        try:
+            return float(headers.get("Retry-After"))
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def classify(error):
+    """Failure category of an exception raised by a download or its post-processing"""
+    status = http_status(error)
+    if status == 429:
+        return THROTTLED
+    if status == 403:
+        return FORBIDDEN
+    if status is not None and status >= 500:
+        return NETWORK
+    if status is not None and status >= 400:
+        return EXTRACTOR
+
+    causes = list(_causes(error))
+    names = set()
+    for cause in causes:
+        names |= _class_names(cause)
+    if names & set(_POSTPROCESSOR_ERRORS):
+        return POSTPROCESSOR
+    if names & set(_NETWORK_ERRORS):
+        return NETWORK
+    # Extractor errors caused by the network (e.g. a timed out webpage) are
+    # caught above; the rest (private, removed, unsupported) won't go away
+    if names & set(_EXTRACTOR_ERRORS):
+        return EXTRACTOR
+
+    message = " ".join(str(cause) for cause in causes).lower()
+    if any(text in message for text in _NETWORK_MESSAGES):
+        return NETWORK
+    return UNKNOWN
+
+
+def backoff(attempt, base, cap, rng=random):
+    """Exponential delay for retry `attempt` (0-based), half of it jittered"""
+    delay = min(cap, base * (2**attempt))
+    return delay / 2 + rng.uniform(0, delay / 2)
+
+
+class RetryPolicy:
+    """
+    Decides whether a failed step is tried again and after how long.
+    Categories without a rule (extractor errors, unknown ones) fail at once.
+    """
+
+    def __init__(self, rules=None, rng=None):
+        self.rules = dict(DEFAULT_RULES if rules is None else rules)
+        self.rng = rng or random.Random()
+
+    def rule(self, category):
+        return self.rules.get(category)
+
+    def delay(self, error, category, attempt):
+        """Seconds to wait before retry `attempt` (0-based), or None to give up"""
+        rule = self.rules.get(category)
+        if rule is None or attempt >= rule.attempts:
+            return None
+        delay = backoff(attempt, rule.base, rule.cap, self.rng)
+        hinted = retry_after(error) if category == THROTTLED else None
+        if hinted is not None:
+            delay = max(delay, min(hinted, rule.cap))
+        return delay
+
+
+def call_with_retries(fn, policy, on_retry=None, interrupt=None):
+    """
+    Call `fn()` until it succeeds or `policy` gives up on its failure.
+    Attempts are counted per category. `on_retry(error, category, attempt,
+    delay)` runs before each wait and may raise to stop retrying;
+    `interrupt()` runs first on every failure and during waits (e.g. to
+    honour a pause).
+    """
+    attempts = {}
+    while True:
+        try:
+            return fn()
+        except Exception as error:
+            if interrupt is not None:
+                interrupt()
+            category = classify(error)
+            attempt = attempts.get(category, 0)
+            delay = policy.delay(error, category, attempt)
+            if delay is None:
+                raise
+            attempts[category] = attempt + 1
+            if on_retry is not None:
+                on_retry(error, category, attempt, delay)
+            sleep(delay, interrupt)
+
+
+def sleep(seconds, interrupt=None, step=0.25):
+    """Wait `seconds`, calling `interrupt()` (which may raise) every `step`"""
+    deadline = time.monotonic() + seconds
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        time.sleep(min(step, remaining))
+        if interrupt is not None:
+            interrupt()
@@ -0,0 +1,42 @@
+"""Startup timing: how long until the first frame and until downloads are ready."""
+
+import json
+import os
+import threading
+import time
+
+# Keep only the most recent launches in the timing log
+MAX_LOGGED_STARTS = 50
+
+
+class StartupTimer:
+    """Named milestones in milliseconds since `start` (process start by default)"""
+
+    def __init__(self, start=None):
+        self.start = start if start is not None else time.perf_counter()
+        self.marks = {}
+        self._lock = threading.Lock()
+
+    def mark(self, name):
+        elapsed = (time.perf_counter() - self.start) * 1000
+        with self._lock:
+            self.marks.setdefault(name, round(elapsed, 1))
+        return elapsed
+
+    def as_dict(self):
+        with self._lock:
+            return dict(self.marks)
+
+    def save(self, path):
+        """Append this launch to a JSON-lines log, trimmed to MAX_LOGGED_STARTS"""
+        record = dict(self.as_dict(), time=time.time())
+        try:
+            lines = []
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    lines = f.read().splitlines()
+            lines = lines[-(MAX_LOGGED_STARTS - 1) :] + [json.dumps(record)]
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+        except OSError as e:
+            print(f"Could not save startup timings: {e}")
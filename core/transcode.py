@@ -0,0 +1,173 @@
+"""Post-processing stage: FFmpeg transcodes and merges off the download threads."""
+
+import os
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+# Audio codecs phones play natively, and the container each belongs in
+NATIVE_AUDIO_CONTAINERS = {
+    "mp4a": "m4a",
+    "aac": "m4a",
+    "opus": "opus",
+    "vorbis": "ogg",
+    "mp3": "mp3",
+    "flac": "flac",
+}
+
+# What to do with a downloaded audio stream
+KEEP = "keep"
+REMUX = "remux"
+TRANSCODE = "transcode"
+
+
+class FFmpegError(RuntimeError):
+    """ffmpeg exited with an error; the input files are left in place"""
+
+
+def ffmpeg_binary(ffmpeg_location=None):
+    """Path of the ffmpeg executable (get_ffmpeg_location() returns its folder)"""
+    if ffmpeg_location:
+        if os.path.isdir(ffmpeg_location):
+            return os.path.join(ffmpeg_location, "ffmpeg")
+        return ffmpeg_location
+    return "ffmpeg"
+
+
+def run_ffmpeg(ffmpeg_location, args):
+    """Run ffmpeg with `args`, raising FFmpegError with its stderr on failure"""
+    cmd = [ffmpeg_binary(ffmpeg_location), "-y", "-hide_banner", "-nostdin"] + args
+    result = subprocess.run(
+        cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, check=False
+    )
+    if result.returncode != 0:
+        error = result.stderr.decode("utf-8", "replace").strip().splitlines()
+        raise FFmpegError(f"ffmpeg failed: {error[-1] if error else result.returncode}")
+
+
+def extract_audio_mp3(ffmpeg_location, source_path, bitrate="192k"):
+    """Transcode `source_path` to an mp3 next to it and return the new path"""
+    target_path = os.path.splitext(source_path)[0] + ".mp3"
+    if target_path == source_path:
+        return source_path
+    run_ffmpeg(
+        ffmpeg_location,
+        ["-i", source_path, "-vn", "-c:a", "libmp3lame", "-b:a", bitrate, target_path],
+    )
+    try:
+        os.remove(source_path)
+    except OSError:
+        pass
+    return target_path
+
+
+def plan_audio(fmt, require_mp3=True):
+    """
+    Decide from yt-dlp format info how a downloaded audio stream is finished.
+
+    Returns (action, ext): KEEP the file as is, REMUX it into its native
+    container without re-encoding, or TRANSCODE it to mp3.
+    """
+    codec = (fmt.get("acodec") or "").split(".")[0].lower()
+    ext = (fmt.get("ext") or "").lower()
+
+    if require_mp3 or codec not in NATIVE_AUDIO_CONTAINERS:
+        if codec == "mp3" and ext == "mp3":
+            return KEEP, ext
+        return TRANSCODE, "mp3"
+
+    native_ext = NATIVE_AUDIO_CONTAINERS[codec]
+    if ext == native_ext:
+        return KEEP, ext
+    return REMUX, native_ext
+
+
+def remux_audio(ffmpeg_location, source_path, ext):
+    """Copy the audio track into a `.ext` container and return the new path"""
+    target_path = os.path.splitext(source_path)[0] + "." + ext
+    if target_path == source_path:
+        return source_path
+    run_ffmpeg(
+        ffmpeg_location, ["-i", source_path, "-vn", "-c:a", "copy", target_path]
+    )
+    try:
+        os.remove(source_path)
+    except OSError:
+        pass
+    return target_path
+
+
+def fallback_plan(plan):
+    """What to try after `plan` failed: a stream that won't remux is transcoded"""
+    if plan[0] == REMUX:
+        return TRANSCODE, "mp3"
+    return plan
+
+
+def finish_audio(ffmpeg_location, source_path, plan):
+    """Apply a plan_audio() result to a downloaded file, returning the final path"""
+    action, ext = plan
+    if action == KEEP:
+        return source_path
+    if action == REMUX:
+        return remux_audio(ffmpeg_location, source_path, ext)
+    return extract_audio_mp3(ffmpeg_location, source_path)
+
+
+def merge_streams(ffmpeg_location, stream_paths, output_path, repair=False):
+    """
+    Mux separately downloaded video/audio streams without re-encoding.
+    With `repair`, missing or broken timestamps are regenerated and
+    interleaving is relaxed, which fixes most streams a plain mux rejects.
+    """
+    args = ["-fflags", "+genpts+discardcorrupt"] if repair else []
+    for path in stream_paths:
+        args += ["-i", path]
+    for index in range(len(stream_paths)):
+        args += ["-map", str(index)]
+    if repair:
+        args += ["-avoid_negative_ts", "make_zero", "-max_interleave_delta", "0"]
+    args += ["-c", "copy", "-strict", "-2", output_path]
+    run_ffmpeg(ffmpeg_location, args)
+    for path in stream_paths:
+        if path != output_path:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    return output_path
+
+
+class TranscodeStage:
+    """
+    Bounded pool of ffmpeg processes, one per CPU core by default.
+
+    Each worker thread only waits on its ffmpeg child process, so the pool
+    size caps how many transcodes run at once while download threads hand
+    files over and go straight back to the network.
+    """
+
+    def __init__(self, ffmpeg_location=None, workers=None):
+        self.ffmpeg_location = ffmpeg_location
+        self.workers = max(1, workers or os.cpu_count() or 2)
+        self._executor = ThreadPoolExecutor(
+            self.workers, thread_name_prefix="transcode"
+        )
+
+    def submit(self, fn, *args, **kwargs):
+        """Run any post-processing callable on a transcode slot"""
+        return self._executor.submit(fn, *args, **kwargs)
+
+    def extract_audio(self, source_path, bitrate="192k"):
+        """Future resolving to the mp3 path"""
+        return self.submit(
+            extract_audio_mp3, self.ffmpeg_location, source_path, bitrate
+        )
+
+    def merge(self, stream_paths, output_path):
+        """Future resolving to the merged file path"""
+        return self.submit(
+            merge_streams, self.ffmpeg_location, stream_paths, output_path
+        )
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,183 @@
+"""Adaptive fragment concurrency and chunk size, learned per host and network."""
+
+import json
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+# Fragment concurrency levels the tuner moves between
+FRAGMENT_LEVELS = (1, 2, 4, 8, 16)
+DEFAULT_FRAGMENTS = 8
+
+# http_chunk_size bounds; the chunk aims to take CHUNK_SECONDS to fetch
+MIN_CHUNK = 1024 * 1024
+MAX_CHUNK = 20 * 1024 * 1024
+DEFAULT_CHUNK = 10 * 1024 * 1024
+CHUNK_SECONDS = 4
+
+# Weight of the newest measurement in the running average
+EMA_WEIGHT = 0.4
+
+# Re-check a neighbouring level every N jobs in case the network changed
+EXPLORE_EVERY = 5
+
+# Downloads shorter than this say little about the link
+MIN_SAMPLE_BYTES = 2 * 1024 * 1024
+
+
+class ThroughputMeter:
+    """Measures achieved bytes/second of one download from progress hooks"""
+
+    def __init__(self):
+        self._start = None
+        self._end = None
+        self._files = {}
+        # Only fragmented downloads say anything about fragment concurrency
+        self.fragmented = False
+        # Set by the engine when the cap or other jobs shaped the throughput
+        self.contended = False
+
+    def sample(self, d):
+        if d.get("status") not in ("downloading", "finished"):
+            return
+        if d.get("fragment_count"):
+            self.fragmented = True
+        now = time.monotonic()
+        if self._start is None:
+            self._start = now
+        self._end = now
+        downloaded = d.get("downloaded_bytes") or d.get("total_bytes") or 0
+        self._files[d.get("filename")] = downloaded
+
+    @property
+    def bytes(self):
+        return sum(self._files.values())
+
+    @property
+    def seconds(self):
+        if self._start is None:
+            return 0.0
+        return self._end - self._start
+
+    @property
+    def throughput(self):
+        return self.bytes / self.seconds if self.seconds > 0 else 0.0
+
+
+def host_key(url):
+    host = (urlsplit(url).hostname or "").lower()
+    for prefix in ("www.", "m."):
+        if host.startswith(prefix):
+            host = host[len(prefix) :]
+    return host or "unknown"
+
+
+class AdaptiveTuner:
+    """
+    Hill-climbs `concurrent_fragment_downloads` between jobs and sizes
+    `http_chunk_size` from the measured throughput, keeping what it learned
+    per (host, network type) in a small JSON file.
+    """
+
+    def __init__(self, store_path=None):
+        self.store_path = store_path
+        self._lock = threading.Lock()
+        self._state = {}
+        if store_path:
+            try:
+                with open(store_path, "r", encoding="utf-8") as f:
+                    self._state = json.load(f)
+            except (OSError, ValueError):
+                self._state = {}
+
+    def suggest(self, url, network="unknown"):
+        """yt-dlp options to use for the next download from `url`"""
+        with self._lock:
+            state = self._state.get(self._key(url, network))
+            if not state:
+                return {
+                    "concurrent_fragment_downloads": DEFAULT_FRAGMENTS,
+                    "http_chunk_size": DEFAULT_CHUNK,
+                }
+            return {
+                "concurrent_fragment_downloads": self._next_level(state),
+                "http_chunk_size": self._chunk_size(state),
+            }
+
+    def record(self, url, network, settings, meter):
+        """
+        Feed back what a download achieved with `settings`. Downloads held
+        back by the bandwidth cap or running next to other jobs are
+        ignored: their throughput isn't the link's. Every other one sizes
+        the chunks; only fragmented ones score a fragment concurrency.
+        """
+        if meter.contended:
+            return
+        if meter.bytes < MIN_SAMPLE_BYTES or meter.seconds <= 0:
+            return
+        level = str(settings.get("concurrent_fragment_downloads", DEFAULT_FRAGMENTS))
+        throughput = meter.throughput
+        with self._lock:
+            state = self._state.setdefault(
+                self._key(url, network), {"scores": {}, "jobs": 0}
+            )
+            if meter.fragmented:
+                scores = state["scores"]
+                old = scores.get(level)
+                scores[level] = (
+                    throughput
+                    if old is None
+                    else old + EMA_WEIGHT * (throughput - old)
+                )
+                state["jobs"] += 1
+            old_rate = state.get("throughput")
+            state["throughput"] = (
+                throughput
+                if old_rate is None
+                else old_rate + EMA_WEIGHT * (throughput - old_rate)
+            )
+            self._save_locked()
+
+    def _key(self, url, network):
+        return f"{host_key(url)}|{network}"
+
+    def _next_level(self, state):
+        scores = {int(k): v for k, v in state["scores"].items()}
+        if not scores:
+            # Only unfragmented downloads so far
+            return DEFAULT_FRAGMENTS
+        best = max(scores, key=scores.get)
+        index = FRAGMENT_LEVELS.index(best) if best in FRAGMENT_LEVELS else 3
+        neighbours = [
+            FRAGMENT_LEVELS[i]
+            for i in (index + 1, index - 1)
+            if 0 <= i < len(FRAGMENT_LEVELS)
+        ]
+
+        # Try untested neighbours of the best level first
+        for level in neighbours:
+            if level not in scores:
+                return level
+        # Then revisit one now and then, alternating up and down
+        if neighbours and state["jobs"] % EXPLORE_EVERY == 0:
+            return neighbours[(state["jobs"] // EXPLORE_EVERY) % len(neighbours)]
+        return best
+
+    def _chunk_size(self, state):
+        throughput = state.get("throughput")
+        if not throughput:
+            return DEFAULT_CHUNK
+        chunk = int(throughput * CHUNK_SECONDS)
+        return max(MIN_CHUNK, min(MAX_CHUNK, chunk))
+
+    def _save_locked(self):
+        if not self.store_path:
+            return
+        tmp_path = self.store_path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._state, f)
+            os.replace(tmp_path, self.store_path)
+        except OSError as e:
+            print(f"Could not save tuning state: {e}")
@@ -1,30 +1,70 @@
 """YouTube Downloader - A Kivy app for downloading videos and audio."""
 
+import time
+
+# Reference point for the startup timings
+_PROCESS_START = time.perf_counter()
+
 import threading
 import os
-import certifi
-
-os.environ["SSL_CERT_FILE"] = certifi.where()
 
 from kivy.app import App
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.textinput import TextInput
 from kivy.uix.label import Label
 from kivy.uix.spinner import Spinner
+from kivy.uix.popup import Popup
+from kivy.uix.scrollview import ScrollView
 from kivy.clock import Clock
 from kivy.core.window import Window
 from kivy.utils import platform
-import yt_dlp
 
 # Import from local modules
 from utils import (
-    get_download_path,
-    get_ffmpeg_location,
-    scan_media_file,
-    copy_to_public_downloads,
+    environment,
     request_storage_permission,
+    start_download_service,
+    stop_download_service,
+    build_engine,
+    service_endpoint,
+)
+from ui import (
+    StyledBoxLayout,
+    StyledProgressBar,
+    GradientButton,
+    FrameMeter,
+    JobListView,
 )
-from ui import StyledBoxLayout, StyledProgressBar, GradientButton
+from core import (
+    RemoteEngine,
+    StartupTimer,
+    format_string,
+    format_summary,
+    DEFAULT_QUALITIES,
+    format_speed,
+    format_eta,
+    format_size,
+    DONE,
+    FAILED,
+    PAUSED,
+    PROCESSING,
+    PROMOTED,
+    QUEUED,
+    RUNNING,
+)
+
+
+# How often progress is pushed to the widgets (per second)
+PROGRESS_FPS = 10
+
+# Seconds the URL must stay unchanged before formats are prefetched
+PREFETCH_DELAY = 0.6
+
+# Seconds to wait for the download service before downloading in-process
+SERVICE_ATTACH_TIMEOUT = 20
+
+# Set to log frame times while downloads run (a Clock callback every frame)
+MEASURE_FRAMES = bool(os.environ.get("DOWNLOADER_MEASURE_FRAMES"))
 
 
 # Set window background color
@@ -34,9 +74,21 @@ Window.clearcolor = (0.08, 0.08, 0.12, 1)  # Dark background
 class DownloaderApp(App):
     def build(self):
         self.title = "Video Downloader"
+        self.startup = StartupTimer(_PROCESS_START)
+        self.startup.mark("build")
 
-        # Request storage permissions on Android
-        request_storage_permission()
+        # The engine (yt-dlp, storage paths, ffmpeg, queue) is warmed up on a
+        # background thread after the first frame; until then downloads wait
+        self._ready = threading.Event()
+        self._pending_jobs = []
+        self.engine = None
+
+        # Frame times while downloads run, logged when the queue drains
+        self.frame_meter = FrameMeter() if MEASURE_FRAMES else None
+
+        # Progress from all jobs is coalesced and drawn at PROGRESS_FPS
+        Clock.schedule_interval(self._flush_progress, 1.0 / PROGRESS_FPS)
+        Window.bind(on_draw=self._on_first_frame)
 
         # Main container
         main_layout = BoxLayout(orientation="vertical", padding=20, spacing=15)
@@ -81,6 +133,13 @@ class DownloaderApp(App):
             padding=[15, 12],
         )
         url_card.add_widget(self.url_input)
+
+        # Fetch formats shortly after a URL is pasted
+        self._prefetch_url = ""
+        self._prefetch_trigger = Clock.create_trigger(
+            self._start_prefetch, PREFETCH_DELAY
+        )
+        self.url_input.bind(text=self._on_url_changed)
         main_layout.add_widget(url_card)
 
         # Options Card
@@ -144,7 +203,7 @@ class DownloaderApp(App):
 
         self.quality_spinner = Spinner(
             text="Best",
-            values=("Best", "1080p", "720p", "480p", "360p"),
+            values=DEFAULT_QUALITIES,
             size_hint=(1, 0.7),
             background_color=(0.25, 0.25, 0.35, 1),
             color=(1, 1, 1, 1),
@@ -152,27 +211,71 @@ class DownloaderApp(App):
         quality_box.add_widget(self.quality_spinner)
         options_row.add_widget(quality_box)
 
+        # Audio output: always MP3, or keep the original codec (no re-encode)
+        audio_box = BoxLayout(orientation="vertical", spacing=5)
+        audio_label = Label(
+            text="Audio",
+            size_hint=(1, 0.3),
+            halign="left",
+            color=(0.6, 0.6, 0.7, 1),
+            font_size="12sp",
+        )
+        audio_label.bind(size=audio_label.setter("text_size"))
+        audio_box.add_widget(audio_label)
+
+        self.audio_spinner = Spinner(
+            text="MP3",
+            values=("MP3", "Original"),
+            size_hint=(1, 0.7),
+            background_color=(0.25, 0.25, 0.35, 1),
+            color=(1, 1, 1, 1),
+        )
+        audio_box.add_widget(self.audio_spinner)
+        options_row.add_widget(audio_box)
+
         options_card.add_widget(options_row)
         main_layout.add_widget(options_card)
 
-        # Download Button
+        # Download Button, with smaller ones for the statistics and history
+        button_row = BoxLayout(orientation="horizontal", spacing=10, size_hint=(1, 0.12))
         self.download_btn = GradientButton(
             text="Download",
-            size_hint=(1, 0.12),
+            size_hint=(0.56, 1),
             font_size="18sp",
             bold=True,
             color=(1, 1, 1, 1),
             gradient_colors=[(0.4, 0.2, 0.8, 1)],
         )
         self.download_btn.bind(on_press=self.start_download)
-        main_layout.add_widget(self.download_btn)
+        button_row.add_widget(self.download_btn)
+
+        stats_btn = GradientButton(
+            text="Stats",
+            size_hint=(0.22, 1),
+            font_size="14sp",
+            color=(1, 1, 1, 1),
+            gradient_colors=[(0.25, 0.25, 0.35, 1)],
+        )
+        stats_btn.bind(on_press=self.show_stats)
+        button_row.add_widget(stats_btn)
+
+        history_btn = GradientButton(
+            text="History",
+            size_hint=(0.22, 1),
+            font_size="14sp",
+            color=(1, 1, 1, 1),
+            gradient_colors=[(0.25, 0.25, 0.35, 1)],
+        )
+        history_btn.bind(on_press=self.show_history)
+        button_row.add_widget(history_btn)
+        main_layout.add_widget(button_row)
 
         # Progress Card
         progress_card = StyledBoxLayout(
             orientation="vertical",
             padding=20,
             spacing=10,
-            size_hint=(1, 0.35),
+            size_hint=(1, 0.28),
             bg_color=(0.12, 0.12, 0.18, 1),
         )
 
@@ -242,8 +345,136 @@ class DownloaderApp(App):
 
         main_layout.add_widget(progress_card)
 
+        # Every queued, running and finished job; only visible rows are widgets
+        list_card = StyledBoxLayout(
+            orientation="vertical",
+            padding=10,
+            size_hint=(1, 0.35),
+            bg_color=(0.12, 0.12, 0.18, 1),
+        )
+        self.job_list = JobListView()
+        self.job_list.bind(on_job_action=self._on_job_action)
+        list_card.add_widget(self.job_list)
+        main_layout.add_widget(list_card)
+
         return main_layout
 
+    def _on_first_frame(self, *args):
+        Window.unbind(on_draw=self._on_first_frame)
+        self.startup.mark("first_frame")
+
+        # Request storage permissions on Android (needs the UI thread)
+        request_storage_permission()
+
+        threading.Thread(target=self._warm_up, daemon=True).start()
+
+    def _warm_up(self):
+        """Load the download engine off the UI thread"""
+        try:
+            self._load_engine()
+        except Exception as e:
+            print(f"Startup error: {e}")
+            error_msg = str(e)[:100]
+            Clock.schedule_once(lambda dt: self.download_error(error_msg))
+            return
+        Clock.schedule_once(lambda dt: self._on_ready())
+
+    def _load_engine(self):
+        """Import yt-dlp and set up storage, ffmpeg and the queue (worker thread)"""
+        # On Android the engine lives in the download service, so downloads
+        # survive the activity; this process only attaches to it. If the
+        # service can't start, downloads run here as on the desktop.
+        try:
+            started = start_download_service()
+        except Exception as e:
+            print(f"Download service failed to start: {e}")
+            started = False
+        if started and self._attach_service():
+            return
+
+        import certifi
+
+        os.environ["SSL_CERT_FILE"] = certifi.where()
+
+        # Hundreds of extractor modules; by far the slowest import
+        import yt_dlp  # noqa: F401
+
+        self.startup.mark("yt_dlp_loaded")
+
+        download_path = environment.download_path()
+
+        # Queue, caches, tuning and ffmpeg stage, shared with service.py
+        self.engine = build_engine(
+            on_job_change=self._on_job_change,
+            on_status=self._on_job_status,
+            on_network_change=self._on_network_change,
+        )
+        self.engine.start()
+        self._startup_done(download_path)
+
+    def _attach_service(self):
+        """Connect to the download service; False if it didn't come up (worker thread)"""
+        engine = RemoteEngine(
+            service_endpoint(),
+            on_job_change=self._on_job_change,
+            on_status=self._on_job_status,
+            on_network_change=self._on_network_change,
+        )
+        engine.start()
+        if not engine.connected.wait(SERVICE_ATTACH_TIMEOUT):
+            print("Download service did not attach, downloading in-process")
+            engine.stop()
+            # Two engines must never share the queue and partial files
+            try:
+                stop_download_service()
+            except Exception as e:
+                print(f"Could not stop the download service: {e}")
+            return False
+        self.engine = engine
+        self.startup.mark("service_attached")
+        self._startup_done(environment.private_path())
+        return True
+
+    def _startup_done(self, folder):
+        self.startup.mark("ready")
+        print(f"Startup (ms): {self.startup.as_dict()}")
+        self.startup.save(os.path.join(folder, ".startup_times.jsonl"))
+
+    def _on_ready(self):
+        self._ready.set()
+        # Jobs restored from the last run
+        for job in self.engine.queue.jobs():
+            self.job_list.upsert(job.id, **self._job_row(job))
+        for args in self._pending_jobs:
+            self._engine_call(self.engine.add, *args)
+        self._pending_jobs = []
+        self._show_queue_status()
+        # A URL typed during startup can be prefetched now
+        self._prefetch_url = ""
+        self._prefetch_trigger()
+
+    def on_resume(self):
+        # Storage access may have been granted in Settings meanwhile
+        if environment.refresh_permissions():
+            print(f"Storage access changed: {environment.as_dict()}")
+        # The link may have changed while the app was in the background
+        if self._ready.is_set():
+            # The service may have ended itself while idle
+            if isinstance(self.engine, RemoteEngine):
+                start_download_service()
+            threading.Thread(target=self._check_network, daemon=True).start()
+
+    def _check_network(self):
+        try:
+            self.engine.check_network()
+        except Exception as e:
+            print(f"Network check failed: {e}")
+
+    def on_stop(self):
+        # A RemoteEngine only detaches; the service keeps downloading
+        if self._ready.is_set():
+            self.engine.stop()
+
     def start_download(self, instance):
         url = self.url_input.text.strip()
         if not url:
@@ -252,241 +483,314 @@ class DownloaderApp(App):
             return
 
         self.reset_progress()
-        self.download_btn.disabled = True
+        job_args = (
+            url,
+            self.format_spinner.text,
+            self.quality_spinner.text,
+            {"audio": self.audio_spinner.text},
+        )
+        if self._ready.is_set():
+            self._engine_call(self.engine.add, *job_args)
+        else:
+            # Queued as soon as the engine has finished loading
+            self._pending_jobs.append(job_args)
+        self.url_input.text = ""
+        self.quality_spinner.text = "Best"
+        self._show_queue_status()
+
+    def _engine_call(self, fn, *args):
+        """Run a queue action off the UI thread (the service may be slow or gone)"""
+
+        def run():
+            try:
+                fn(*args)
+            except Exception as e:
+                print(f"Engine call failed: {e}")
+                error_msg = str(e)[:100]
+                Clock.schedule_once(lambda dt: self.download_error(error_msg))
+                return
+            Clock.schedule_once(lambda dt: self._show_queue_status())
 
-        # Start download in background thread
-        threading.Thread(
-            target=self.run_download,
-            args=(url, self.format_spinner.text, self.quality_spinner.text),
-            daemon=True,
-        ).start()
+        threading.Thread(target=run, daemon=True).start()
 
     def get_format_string(self, format_type, quality):
         """Generate yt-dlp format string based on user selection"""
-        quality_map = {
-            "Best": "",
-            "1080p": "[height<=1080]",
-            "720p": "[height<=720]",
-            "480p": "[height<=480]",
-            "360p": "[height<=360]",
-        }
-        q = quality_map.get(quality, "")
-
-        if format_type == "Audio" or format_type == "Playlist (Audio)":
-            return "bestaudio/best"
-        elif format_type == "Video":
-            return f"bestvideo{q}/best{q}"
-        else:  # Both (Video + Audio)
-            # Prefer pre-muxed formats to avoid FFmpeg merge issues
-            if q:
-                return f"best{q}/bestvideo{q}+bestaudio/best"
-            return "best/bestvideo+bestaudio"
-
-    def run_download(self, url, format_type, quality):
-        """Main download function with fallback handling"""
+        return format_string(format_type, quality)
+
+    def _on_url_changed(self, instance, text):
+        self._prefetch_trigger()
+
+    def _start_prefetch(self, dt):
+        """Fetch video info in the background once the URL stops changing"""
+        url = self.url_input.text.strip()
+        if url == self._prefetch_url:
+            return
+        self._prefetch_url = url
+        self.quality_spinner.values = DEFAULT_QUALITIES
+        if not url.startswith(("http://", "https://")) or not self._ready.is_set():
+            return
+        # Full playlists are too heavy to resolve speculatively
+        if self.format_spinner.text == "Playlist (Audio)":
+            return
+        threading.Thread(target=self._prefetch_info, args=(url,), daemon=True).start()
+
+    def _prefetch_info(self, url):
+        """Warm the info cache and collect the real qualities (worker thread)"""
         try:
-            format_string = self.get_format_string(format_type, quality)
-            download_path = get_download_path()
-
-            # Custom logger for Android compatibility
-            class QuietLogger:
-                def debug(self, msg):
-                    pass
-
-                def warning(self, msg):
-                    pass
-
-                def error(self, msg):
-                    pass
-
-            from datetime import datetime
-
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-
-            # Base yt-dlp options
-            ydl_opts = {
-                "format": format_string,
-                "outtmpl": {
-                    "default": os.path.join(
-                        download_path, f"download_{timestamp}.%(ext)s"
-                    )
-                },
-                "progress_hooks": [self.progress_hook],
-                "quiet": True,
-                "no_warnings": True,
-                "noprogress": True,
-                "logger": QuietLogger(),
-                "concurrent_fragment_downloads": 8,
-                "buffersize": 1024 * 64,
-                "http_chunk_size": 10485760,
-                "format_sort": ["res", "ext:mp4:m4a:webm", "proto:https"],
-            }
-
-            # Playlist handling
-            if format_type == "Playlist (Audio)":
-                ydl_opts["noplaylist"] = False  # Enable playlist downloads
-                ydl_opts["postprocessors"] = [
-                    {
-                        "key": "FFmpegExtractAudio",
-                        "preferredcodec": "mp3",
-                        "preferredquality": "192",
-                    }
-                ]
-            else:
-                ydl_opts["noplaylist"] = True  # Single video only
-
-            # Set FFmpeg location
-            ffmpeg_loc = get_ffmpeg_location()
-            if ffmpeg_loc:
-                ydl_opts["ffmpeg_location"] = ffmpeg_loc
-
-            # Audio format handling
-            if format_type == "Audio":
-                ydl_opts["postprocessors"] = [
-                    {
-                        "key": "FFmpegExtractAudio",
-                        "preferredcodec": "mp3",
-                        "preferredquality": "192",
-                    }
-                ]
-            elif format_type == "Both":
-                ydl_opts["merge_output_format"] = "mkv"
-                ydl_opts["postprocessor_args"] = {
-                    "ffmpeg": ["-c", "copy", "-strict", "-2"]
-                }
-
-            # Try download with fallback for "Both" format
+            options = self.engine.quality_options(url)
+        except Exception as e:
+            print(f"Prefetch failed: {e}")
+            return
+        if options:
+            Clock.schedule_once(lambda dt: self._apply_quality_options(url, options))
+
+    def _apply_quality_options(self, url, options):
+        # Ignore results for a URL the user has already replaced
+        if url != self._prefetch_url:
+            return
+        self.quality_spinner.values = ("Best",) + tuple(options)
+
+    def show_stats(self, instance):
+        """Summary of recent job timelines, read off the UI thread"""
+        if self.engine is None:
+            self._open_stats("Downloader is still starting")
+            return
+
+        def load():
             try:
-                self._do_download(ydl_opts, url)
-            except Exception as merge_error:
-                # If merge fails for "Both", fallback to pre-muxed video
-                if format_type == "Both" and "post" in str(merge_error).lower():
-                    Clock.schedule_once(
-                        lambda dt: self.update_progress(
-                            "Merge failed, trying fallback...", 50, "--", "--", ""
-                        )
-                    )
-                    # Retry with simple "best" format (already has audio)
-                    ydl_opts["format"] = "best"
-                    ydl_opts.pop("merge_output_format", None)
-                    ydl_opts.pop("postprocessor_args", None)
-                    self._do_download(ydl_opts, url)
-                else:
-                    raise  # Re-raise if not a merge error
+                text = format_summary(
+                    self.engine.metrics.summary(), self.engine.info_cache.stats()
+                )
+            except Exception as e:
+                text = f"Could not read statistics: {e}"
+            Clock.schedule_once(lambda dt: self._open_stats(text))
 
-            Clock.schedule_once(lambda dt: self.download_complete())
+        threading.Thread(target=load, daemon=True).start()
 
-        except Exception as e:
-            error_msg = str(e)[:100]
-            Clock.schedule_once(lambda dt: self.download_error(error_msg))
+    def _open_stats(self, text):
+        label = Label(
+            text=text,
+            size_hint_y=None,
+            halign="left",
+            valign="top",
+            color=(0.8, 0.8, 0.9, 1),
+            font_size="13sp",
+        )
+        label.bind(
+            width=lambda inst, w: setattr(inst, "text_size", (w, None)),
+            texture_size=lambda inst, size: setattr(inst, "height", size[1]),
+        )
+        scroll = ScrollView()
+        scroll.add_widget(label)
+        Popup(title="Download statistics", content=scroll, size_hint=(0.9, 0.6)).open()
+
+    def show_history(self, instance):
+        """Searchable list of past downloads"""
+        content = BoxLayout(orientation="vertical", spacing=8)
+        search_input = TextInput(
+            hint_text="Search titles and links",
+            multiline=False,
+            size_hint=(1, 0.12),
+            background_color=(0.18, 0.18, 0.25, 1),
+            foreground_color=(1, 1, 1, 1),
+            hint_text_color=(0.5, 0.5, 0.6, 1),
+            cursor_color=(0.4, 0.6, 1, 1),
+            padding=[15, 12],
+        )
+        content.add_widget(search_input)
 
-    def _do_download(self, ydl_opts, url):
-        """Execute the actual download and copy to public folder"""
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=True)
-            if info:
-                # Handle playlist (multiple entries) or single video
-                entries = info.get("entries", [info])
-                for entry in entries:
-                    if entry:
-                        # Get the expected filename
-                        expected_path = ydl.prepare_filename(entry)
-                        base_path = os.path.splitext(expected_path)[0]
-
-                        # Try to find the actual file (extension may differ after post-processing)
-                        possible_extensions = [
-                            ".mp3",
-                            ".m4a",
-                            ".mkv",
-                            ".mp4",
-                            ".webm",
-                            ".opus",
-                            ".ogg",
-                        ]
-                        actual_path = None
-
-                        # First check if expected file exists
-                        if os.path.exists(expected_path):
-                            actual_path = expected_path
-                        else:
-                            # Search for file with different extension
-                            for ext in possible_extensions:
-                                test_path = base_path + ext
-                                if os.path.exists(test_path):
-                                    actual_path = test_path
-                                    break
-
-                        if actual_path and os.path.exists(actual_path):
-                            filename_only = os.path.basename(actual_path)
-
-                            # Copy to public Downloads
-                            success = copy_to_public_downloads(
-                                actual_path, filename_only
-                            )
-                            if success:
-                                print(f"Saved to public: {filename_only}")
-                                try:
-                                    os.remove(actual_path)
-                                except Exception:
-                                    pass
-                            else:
-                                # Fallback: at least scan the private file
-                                print(f"Copy failed, file at: {actual_path}")
-                                scan_media_file(actual_path)
-                        else:
-                            print(f"File not found: {expected_path}")
-
-    def progress_hook(self, d):
-        if d["status"] == "downloading":
-            percent = d.get("downloaded_bytes", 0) or 0
-            total = d.get("total_bytes") or d.get("total_bytes_estimate", 0) or 0
-
-            # Format speed
-            speed_raw = d.get("speed")
-            if speed_raw is not None:
-                try:
-                    if speed_raw >= 1024 * 1024:
-                        speed = f"{speed_raw / (1024 * 1024):.1f} MB/s"
-                    elif speed_raw >= 1024:
-                        speed = f"{speed_raw / 1024:.1f} KB/s"
-                    else:
-                        speed = f"{speed_raw:.0f} B/s"
-                except (TypeError, ValueError):
-                    speed = "--"
-            else:
-                speed = "--"
-
-            # Format ETA
-            eta_raw = d.get("eta")
-            if eta_raw is not None:
+        results = Label(
+            text="",
+            size_hint_y=None,
+            halign="left",
+            valign="top",
+            color=(0.8, 0.8, 0.9, 1),
+            font_size="13sp",
+        )
+        results.bind(
+            width=lambda inst, w: setattr(inst, "text_size", (w, None)),
+            texture_size=lambda inst, size: setattr(inst, "height", size[1]),
+        )
+        scroll = ScrollView()
+        scroll.add_widget(results)
+        content.add_widget(scroll)
+
+        # Searches run on a thread once typing pauses; only the latest is shown
+        generation = [0]
+
+        def search(*args):
+            if self.engine is None:
+                results.text = "Downloader is still starting"
+                return
+            generation[0] += 1
+            current = generation[0]
+            text = search_input.text
+
+            def run():
                 try:
-                    eta_seconds = int(eta_raw)
-                    if eta_seconds >= 3600:
-                        eta = f"{eta_seconds // 3600}:{(eta_seconds % 3600) // 60:02d}:{eta_seconds % 60:02d}"
-                    else:
-                        eta = f"{eta_seconds // 60}:{eta_seconds % 60:02d}"
-                except (TypeError, ValueError):
-                    eta = "--"
-            else:
-                eta = "--"
-
-            if total > 0:
-                progress_pct = (percent / total) * 100
-                downloaded_mb = percent / (1024 * 1024)
-                total_mb = total / (1024 * 1024)
-                size_text = f"{downloaded_mb:.1f} MB / {total_mb:.1f} MB"
-            else:
-                progress_pct = 0
-                size_text = ""
-
-            Clock.schedule_once(
-                lambda dt, p=progress_pct, s=speed, e=eta, sz=size_text: self.update_progress(
-                    "Downloading...", p, s, e, sz
-                )
+                    rows = self.engine.history.search(text)
+                    total = self.engine.history.count()
+                    lines = [f"{total} downloads in history"]
+                    lines += [
+                        f"{row['title'] or row['video_id']}\n"
+                        f"    {row['variant']}  {os.path.basename(row['path'])}"
+                        for row in rows
+                    ]
+                    message = "\n".join(lines)
+                except Exception as e:
+                    message = f"Could not read history: {e}"
+
+                def show(dt):
+                    if generation[0] == current:
+                        results.text = message
+
+                Clock.schedule_once(show)
+
+            threading.Thread(target=run, daemon=True).start()
+
+        trigger = Clock.create_trigger(search, 0.3)
+        search_input.bind(text=lambda *args: trigger())
+        search()
+        Popup(title="Download history", content=content, size_hint=(0.9, 0.7)).open()
+
+    def _flush_progress(self, dt):
+        """Publish coalesced progress at a fixed rate (main thread)"""
+        if self.engine is None:
+            return
+        snapshots = self.engine.progress.drain()
+        if not snapshots:
+            return
+        for s in snapshots:
+            self._update_job_row(s)
+        # The single progress card follows the most recently updated job
+        snap = max(snapshots, key=lambda s: s.updated)
+        if snap.status == "finished":
+            self.update_progress("Processing...", 100, "--", "--", "")
+        else:
+            self.update_progress(
+                "Downloading...",
+                snap.percent,
+                format_speed(snap.speed),
+                format_eta(snap.eta),
+                format_size(snap.downloaded, snap.total),
+            )
+
+    def _on_job_change(self, job):
+        """Queue listener, called from worker threads"""
+        state, error = job.state, job.error[:100]
+        row = self._job_row(job)
+        Clock.schedule_once(lambda dt: self.job_list.upsert(job.id, **row))
+        if state == DONE:
+            Clock.schedule_once(lambda dt: self.download_complete())
+        elif state == FAILED:
+            Clock.schedule_once(lambda dt: self.download_error(error))
+        elif state == PAUSED:
+            Clock.schedule_once(lambda dt: self._show_queue_status())
+
+    def _job_row(self, job):
+        """Job list fields for the job's current state (any thread)"""
+        row = {
+            "title": job.url,
+            "state": job.state,
+            "promotable": job.priority < PROMOTED,
+        }
+        manifest = getattr(job, "manifest", None)
+        if job.state == DONE:
+            files = manifest.paths() if manifest else []
+            row["percent"] = 100
+            row["detail"] = (
+                os.path.basename(files[0]) + (f" +{len(files) - 1}" if len(files) > 1 else "")
+                if files
+                else "Done"
+            )
+        elif job.state == FAILED:
+            row["detail"] = job.error[:100]
+        elif job.state == PAUSED:
+            row["detail"] = "Paused"
+        elif job.state == PROCESSING:
+            row["percent"] = 100
+            row["detail"] = "Processing..."
+        elif job.state == QUEUED:
+            row["percent"] = 0
+            row["detail"] = f"{job.format_type} · {job.quality}"
+            reason = self.engine.defer_reason(job) if self.engine else None
+            if reason:
+                row["detail"] += f" · {reason}"
+        return row
+
+    def _update_job_row(self, snap):
+        """Progress snapshot -> its job's row (playlist entries share a row)"""
+        job_id, _, entry = snap.job_id.partition("/")
+        if snap.status == "finished":
+            detail = "Processing..."
+        else:
+            detail = (
+                f"{format_speed(snap.speed)} · ETA {format_eta(snap.eta)} · "
+                f"{format_size(snap.downloaded, snap.total)}"
+            )
+        if entry:
+            # Entry keys are "<index>:<video id>"
+            detail = f"Item {int(entry.split(':')[0]) + 1}: {detail}"
+        self.job_list.upsert(job_id, percent=snap.percent, detail=detail)
+
+    def _on_job_action(self, instance, job_id, action):
+        if self.engine is None:
+            return
+        if action == "pause":
+            self._engine_call(self.engine.queue.pause, job_id)
+        elif action == "resume":
+            self._engine_call(self.engine.queue.resume, job_id)
+        elif action == "promote":
+            self._engine_call(self.engine.promote, job_id)
+
+    def _on_network_change(self, state):
+        """Network listener, called from the watcher thread"""
+        if self.engine is None:
+            return
+        rows = [(job.id, self._job_row(job)) for job in self.engine.queue.jobs((QUEUED,))]
+
+        def show(dt):
+            for job_id, row in rows:
+                self.job_list.upsert(job_id, **row)
+            self._show_queue_status()
+
+        Clock.schedule_once(show)
+
+    def _on_job_status(self, job, message):
+        """Engine status messages, called from worker threads"""
+        Clock.schedule_once(
+            lambda dt: self.update_progress(message, 50, "--", "--", "")
+        )
+
+    def _show_queue_status(self):
+        if not self._ready.is_set():
+            if self._pending_jobs:
+                self.status_label.text = "Preparing downloader..."
+                self.status_label.color = (1, 0.8, 0.2, 1)
+            return
+        counts = self.engine.queue.counts()
+        active = counts[RUNNING] + counts[QUEUED] + counts[PROCESSING]
+        if self.frame_meter is not None:
+            self._measure_frames(active)
+        if active:
+            self.status_label.text = (
+                f"Downloading {counts[RUNNING]}, queued {counts[QUEUED]}"
             )
-        elif d["status"] == "finished":
-            Clock.schedule_once(
-                lambda dt: self.update_progress("Processing...", 100, "--", "--", "")
+            if counts[PROCESSING]:
+                self.status_label.text += f", processing {counts[PROCESSING]}"
+            if not self.engine.network.state.connected:
+                self.status_label.text += " · offline"
+            elif self.engine.network.state.metered:
+                self.status_label.text += " · metered"
+            self.status_label.color = (1, 0.8, 0.2, 1)
+
+    def _measure_frames(self, active):
+        if active and not self.frame_meter.running:
+            self.frame_meter.start()
+        elif not active and self.frame_meter.running:
+            self.frame_meter.stop()
+            self.frame_meter.save(
+                os.path.join(environment.private_path(), ".frame_times.jsonl")
             )
 
     def update_progress(self, status, percent, speed, eta, size_text):
@@ -506,7 +810,7 @@ class DownloaderApp(App):
         self.speed_label.text = "Speed: --"
         self.eta_label.text = "ETA: Done!"
         self.size_label.text = ""
-        self.download_btn.disabled = False
+        self._show_queue_status()
 
     def download_error(self, error):
         self.status_label.text = f"Error: {error}"
@@ -516,7 +820,7 @@ class DownloaderApp(App):
         self.speed_label.text = ""
         self.eta_label.text = ""
         self.size_label.text = ""
-        self.download_btn.disabled = False
+        self._show_queue_status()
 
     def reset_progress(self):
         self.status_label.text = "Starting download..."
@@ -0,0 +1,71 @@
+"""Foreground download service: runs the download engine outside the activity.
+
+Started by the app on Android (python-for-android service "Downloader",
+see buildozer.spec). The engine keeps downloading while the activity is
+in the background or destroyed; the UI attaches through core.ipc and
+detaches again without stopping anything. The service ends itself once
+no job is queued or running and no UI has been attached for IDLE_SECONDS.
+"""
+
+import os
+import time
+
+import certifi
+
+from core import PROCESSING, QUEUED, RUNNING, EngineServer, write_endpoint
+from utils import build_engine, service_endpoint
+
+# Seconds the service lingers with nothing to do and nobody attached
+IDLE_SECONDS = 60
+
+# Seconds between idle checks
+CHECK_SECONDS = 5
+
+
+def _stop_auto_restart():
+    """Keep Android from restarting a service that ended on purpose"""
+    try:
+        from jnius import autoclass
+
+        autoclass("org.kivy.android.PythonService").mService.setAutoRestartService(False)
+    except Exception as e:
+        print(f"Could not turn off service restart: {e}")
+
+
+def main():
+    os.environ["SSL_CERT_FILE"] = certifi.where()
+
+    server = EngineServer()
+    engine = build_engine(
+        on_job_change=server.job_changed,
+        on_status=server.job_status,
+        on_network_change=server.network_changed,
+    )
+    server.serve(engine)
+    endpoint_path = service_endpoint()
+    write_endpoint(endpoint_path, server.address, server.token)
+    engine.start()
+    print(f"Download service on {server.address[0]}:{server.address[1]}")
+
+    idle_since = None
+    while not server.stopped.wait(CHECK_SECONDS):
+        counts = engine.queue.counts()
+        if counts[QUEUED] or counts[RUNNING] or counts[PROCESSING] or server.attached:
+            idle_since = None
+        elif idle_since is None:
+            idle_since = time.monotonic()
+        elif time.monotonic() - idle_since >= IDLE_SECONDS:
+            break
+
+    print("Download service stopping")
+    server.close()
+    try:
+        os.remove(endpoint_path)
+    except OSError:
+        pass
+    engine.stop(wait=True)
+    _stop_auto_restart()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+"""Shared fixtures: a local benchmarks.media_server per test."""
+
+import argparse
+
+import pytest
+
+from benchmarks.downloads import start_server
+
+
+@pytest.fixture
+def media_server():
+    """Start media servers with `media_server(**options)`; returns the base URL"""
+    processes = []
+
+    def start(size="1M", segments=4, latency=0.0, bandwidth="0", total_bandwidth="0"):
+        args = argparse.Namespace(
+            size=size,
+            segments=segments,
+            latency=latency,
+            bandwidth=bandwidth,
+            total_bandwidth=total_bandwidth,
+        )
+        process, base_url = start_server(args)
+        processes.append(process)
+        return base_url
+
+    yield start
+    for process in processes:
+        process.terminate()
+        process.wait(timeout=5)
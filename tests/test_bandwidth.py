@@ -0,0 +1,64 @@
+"""BandwidthScheduler pacing real transfers from the throttled media server."""
+
+import threading
+import time
+import urllib.request
+
+from core import BACKGROUND, NORMAL, BandwidthScheduler
+
+CAP = 512 * 1024
+READ_SIZE = 16 * 1024
+WARMUP = 1.0
+MEASURE = 3.0
+
+
+def test_cap_is_shared_by_priority(media_server):
+    # The server alone would give each connection twice the whole cap
+    base_url = media_server(size="64M", bandwidth="1M", total_bandwidth="4M")
+    scheduler = BandwidthScheduler(CAP)
+    received = {"normal": 0, "background": 0}
+    stop = threading.Event()
+
+    def download(job_id, priority):
+        scheduler.register(job_id, priority)
+        try:
+            with urllib.request.urlopen(base_url + "/progressive.mp4") as response:
+                while not stop.is_set():
+                    chunk = response.read(READ_SIZE)
+                    if not chunk:
+                        break
+                    received[job_id] += len(chunk)
+                    # What yt-dlp's progress hooks report
+                    scheduler.throttle(
+                        job_id,
+                        {
+                            "status": "downloading",
+                            "downloaded_bytes": received[job_id],
+                            "tmpfilename": job_id + ".part",
+                        },
+                    )
+        finally:
+            scheduler.unregister(job_id)
+
+    threads = [
+        threading.Thread(target=download, args=("normal", NORMAL)),
+        threading.Thread(target=download, args=("background", BACKGROUND)),
+    ]
+    for thread in threads:
+        thread.start()
+    try:
+        time.sleep(WARMUP)
+        start = dict(received)
+        time.sleep(MEASURE)
+        end = dict(received)
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join(10)
+
+    normal = (end["normal"] - start["normal"]) / MEASURE
+    background = (end["background"] - start["background"]) / MEASURE
+    assert normal + background <= CAP * 1.1
+    assert normal + background >= CAP * 0.7
+    # NORMAL weighs four times BACKGROUND
+    assert 2.5 <= normal / background <= 6
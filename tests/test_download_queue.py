@@ -0,0 +1,97 @@
+"""DownloadQueue ordering, persistence and post-processing hand-off."""
+
+import threading
+import time
+from concurrent.futures import Future
+
+from core import (
+    BACKGROUND,
+    DONE,
+    NORMAL,
+    PAUSED,
+    PROCESSING,
+    PROMOTED,
+    QUEUED,
+    DownloadJob,
+    DownloadQueue,
+)
+from core.download_queue import JobStore
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_highest_priority_first_then_oldest():
+    started = []
+    queue = DownloadQueue(lambda job: started.append(job.url), concurrency=1)
+    queue.add("a", "Both", "Best")
+    background = queue.add("b", "Both", "Best", priority=BACKGROUND)
+    queue.add("c", "Both", "Best")
+    queue.add("d", "Both", "Best", priority=BACKGROUND)
+    assert queue.set_priority(background.id, PROMOTED)
+
+    queue.start()
+    try:
+        assert wait_for(lambda: queue.counts()[DONE] == 4)
+    finally:
+        queue.stop()
+    assert started == ["b", "a", "c", "d"]
+
+
+def test_jobs_survive_a_reload(tmp_path):
+    path = str(tmp_path / "queue.json")
+    queue = DownloadQueue(lambda job: None, store_path=path)
+    kept = queue.add("a", "Audio", "720p", {"audio": "Original"}, priority=BACKGROUND)
+    paused = queue.add("b", "Video", "Best")
+    assert queue.pause(paused.id)
+    assert queue.set_priority(kept.id, PROMOTED)
+
+    reloaded = {job.id: job for job in DownloadQueue(lambda job: None, store_path=path).jobs()}
+    assert reloaded[kept.id].to_dict() == kept.to_dict()
+    assert reloaded[kept.id].priority == PROMOTED
+    assert reloaded[paused.id].state == PAUSED
+
+
+def test_interrupted_jobs_are_queued_again(tmp_path):
+    path = str(tmp_path / "queue.json")
+    JobStore(path).save(
+        [
+            DownloadJob("a", "Both", "Best", state="running"),
+            DownloadJob("b", "Both", "Best", state="processing"),
+            DownloadJob("c", "Both", "Best", state=DONE),
+        ]
+    )
+    states = [job.state for job in DownloadQueue(lambda job: None, store_path=path).jobs()]
+    assert states == [QUEUED, QUEUED, DONE]
+
+
+def test_post_processing_frees_the_slot_and_cannot_be_paused():
+    transcode = Future()
+    started = threading.Event()
+
+    def runner(job):
+        if job.url == "merge":
+            return transcode
+        started.set()
+
+    queue = DownloadQueue(runner, concurrency=1)
+    merge = queue.add("merge", "Both", "Best", priority=NORMAL)
+    queue.start()
+    try:
+        assert wait_for(lambda: merge.state == PROCESSING)
+        assert queue.pause(merge.id) is False
+
+        # The next download doesn't wait for the transcode
+        queue.add("next", "Both", "Best")
+        assert started.wait(5)
+
+        transcode.set_result(None)
+        assert wait_for(lambda: merge.state == DONE)
+    finally:
+        queue.stop()
@@ -0,0 +1,52 @@
+"""DownloadEngine without a UI, against the local media server."""
+
+import os
+import threading
+import time
+
+from core import DONE, FAILED, PAUSED, DownloadEngine
+
+FINISHED = (DONE, FAILED, PAUSED)
+
+
+def test_download_then_already_downloaded(tmp_path, media_server):
+    base_url = media_server(size="256K")
+    statuses = []
+    finished = threading.Condition()
+
+    def on_job_change(job):
+        if job.state in FINISHED:
+            with finished:
+                finished.notify_all()
+
+    def wait_finished(job, timeout=60):
+        deadline = time.monotonic() + timeout
+        with finished:
+            while job.state not in FINISHED and time.monotonic() < deadline:
+                finished.wait(0.1)
+        return job.state
+
+    engine = DownloadEngine(
+        str(tmp_path),
+        persist_queue=False,
+        on_job_change=on_job_change,
+        on_status=lambda job, message: statuses.append((job.id, message)),
+    )
+    engine.start()
+    try:
+        first = engine.add(base_url + "/progressive.mp4", "Video", "Best")
+        assert wait_finished(first) == DONE, first.error
+        paths = first.manifest.paths()
+        assert len(paths) == 1
+        assert os.path.getsize(paths[0]) == 256 * 1024
+
+        # The second run is answered from the history, without a download
+        second = engine.add(base_url + "/progressive.mp4", "Video", "Best")
+        assert wait_finished(second) == DONE, second.error
+        assert second.manifest.paths() == paths
+        assert any(
+            job_id == second.id and message.startswith("Already downloaded")
+            for job_id, message in statuses
+        )
+    finally:
+        engine.stop(wait=True)
@@ -0,0 +1,93 @@
+"""Moving finished files into place: in place, rename, or streaming copy."""
+
+import errno
+import os
+
+import pytest
+
+from core import finalize
+from core.finalize import FinalizeStats, finalize_file, stream_copy
+
+PAYLOAD = os.urandom(300 * 1024)
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "work" / "clip.mp4"
+    path.parent.mkdir()
+    path.write_bytes(PAYLOAD)
+    return str(path)
+
+
+def test_file_already_in_place(source):
+    stats = FinalizeStats()
+    assert finalize_file(source, os.path.dirname(source), stats_obj=stats) == source
+    assert stats.as_dict()["in_place_files"] == 1
+
+
+def test_same_filesystem_renames(source, tmp_path):
+    stats = FinalizeStats()
+    dest = finalize_file(source, str(tmp_path / "public"), "final.mp4", stats)
+    assert dest == str(tmp_path / "public" / "final.mp4")
+    assert open(dest, "rb").read() == PAYLOAD
+    assert not os.path.exists(source)
+    assert stats.as_dict()["renamed_files"] == 1
+
+
+def test_refused_rename_falls_back_to_copy(source, tmp_path, monkeypatch):
+    real_replace = os.replace
+
+    def replace(src, dst):
+        # Storage that reports one device but won't rename across it
+        if src == source:
+            raise OSError(errno.EXDEV, "Invalid cross-device link")
+        return real_replace(src, dst)
+
+    monkeypatch.setattr(finalize.os, "replace", replace)
+    stats = FinalizeStats()
+    dest = finalize_file(source, str(tmp_path / "public"), stats_obj=stats)
+    assert open(dest, "rb").read() == PAYLOAD
+    assert not os.path.exists(source)
+    assert not os.path.exists(dest + ".part")
+    assert stats.as_dict() == {
+        "in_place_files": 0,
+        "renamed_files": 0,
+        "renamed_bytes": 0,
+        "copied_files": 1,
+        "copied_bytes": len(PAYLOAD),
+    }
+
+
+def test_other_filesystem_copies(source, tmp_path, monkeypatch):
+    monkeypatch.setattr(finalize, "same_filesystem", lambda a, b: False)
+    stats = FinalizeStats()
+    dest = finalize_file(source, str(tmp_path / "public"), stats_obj=stats)
+    assert open(dest, "rb").read() == PAYLOAD
+    assert stats.as_dict()["copied_files"] == 1
+
+
+def test_failed_copy_keeps_the_source(source, tmp_path, monkeypatch):
+    def broken_copy(src, dest):
+        with open(dest, "wb") as f:
+            f.write(b"partial")
+        raise OSError(errno.ENOSPC, "No space left on device")
+
+    monkeypatch.setattr(finalize, "same_filesystem", lambda a, b: False)
+    monkeypatch.setattr(finalize, "stream_copy", broken_copy)
+    with pytest.raises(OSError):
+        finalize_file(source, str(tmp_path / "public"))
+    assert open(source, "rb").read() == PAYLOAD
+    assert os.listdir(str(tmp_path / "public")) == []
+
+
+def test_stream_copy_without_sendfile(source, tmp_path, monkeypatch):
+    def no_sendfile(*args):
+        raise OSError(errno.EINVAL, "sendfile not supported")
+
+    # Small buffers and syncs so the loop goes round several times
+    monkeypatch.setattr(finalize, "COPY_BUFFER", 64 * 1024)
+    monkeypatch.setattr(finalize, "FSYNC_EVERY", 128 * 1024)
+    monkeypatch.setattr(finalize.os, "sendfile", no_sendfile, raising=False)
+    dest = str(tmp_path / "copy.mp4")
+    assert stream_copy(source, dest) == len(PAYLOAD)
+    assert open(dest, "rb").read() == PAYLOAD
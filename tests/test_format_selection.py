@@ -0,0 +1,39 @@
+"""Format selection on cached info dicts."""
+
+from core import DownloadEngine, DownloadJob, JobTrace, canonical_url_key
+
+URL = "http://127.0.0.1/video"
+
+RAW_INFO = {
+    "id": "clip",
+    "title": "Clip",
+    "extractor": "generic",
+    "extractor_key": "Generic",
+    "webpage_url": URL,
+    "duration": 10,
+    "formats": [
+        {"format_id": "v", "url": URL + "/v.mp4", "ext": "mp4", "vcodec": "avc1", "acodec": "none", "height": 720},
+        {"format_id": "a", "url": URL + "/a.m4a", "ext": "m4a", "vcodec": "none", "acodec": "mp4a"},
+        {"format_id": "pm", "url": URL + "/pm.mp4", "ext": "mp4", "vcodec": "avc1", "acodec": "mp4a", "height": 360},
+    ],
+}
+
+
+def select(engine, fmt):
+    job = DownloadJob(URL, "Both", "Best")
+    job.trace = JobTrace(job.id, URL, "Both")
+    opts = {"format": fmt, "quiet": True, "no_warnings": True, "noplaylist": True}
+    return engine._select_format(opts, job)
+
+
+def test_cached_info_is_selected_afresh(tmp_path):
+    engine = DownloadEngine(str(tmp_path), persist_queue=False)
+    engine.info_cache.put(canonical_url_key(URL), RAW_INFO)
+
+    merged = select(engine, "v+a")
+    assert [f["format_id"] for f in merged["requested_formats"]] == ["v", "a"]
+
+    # A later pre-muxed pick must not inherit the merge selection
+    single = select(engine, "pm")
+    assert single["format_id"] == "pm"
+    assert "requested_formats" not in single
@@ -0,0 +1,70 @@
+"""EngineServer and RemoteEngine talking over localhost."""
+
+import time
+
+from core import (
+    PAUSED,
+    RUNNING,
+    DownloadEngine,
+    EngineServer,
+    RemoteEngine,
+    write_endpoint,
+)
+
+
+def wait_for(predicate, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+    return predicate()
+
+
+def test_round_trip(tmp_path, media_server):
+    # Slow enough that the job is still running when it's paused
+    base_url = media_server(size="8M", bandwidth="512K")
+    server = EngineServer(host="127.0.0.1")
+    engine = DownloadEngine(
+        str(tmp_path / "downloads"),
+        persist_queue=False,
+        on_job_change=server.job_changed,
+        on_status=server.job_status,
+        on_network_change=server.network_changed,
+    )
+    server.serve(engine)
+    engine.start()
+
+    wrong_path = str(tmp_path / "wrong.json")
+    write_endpoint(wrong_path, server.address, "not-the-token")
+    intruder = RemoteEngine(wrong_path, timeout=5)
+    endpoint_path = str(tmp_path / "service.json")
+    write_endpoint(endpoint_path, server.address, server.token)
+    remote = RemoteEngine(endpoint_path, timeout=5)
+    try:
+        intruder.start()
+        assert not intruder.connected.wait(1.0)
+        assert server.attached == 0
+
+        remote.start()
+        assert remote.connected.wait(5)
+        assert wait_for(lambda: server.attached == 1)
+
+        job = remote.add(base_url + "/progressive.mp4", "Video", "Best")
+        assert job.id in {j.id for j in engine.queue.jobs()}
+
+        pushed = []
+        assert wait_for(
+            lambda: pushed.extend(remote.progress.drain())
+            or any(snap.job_id == job.id and snap.downloaded for snap in pushed)
+        )
+        assert remote.queue.get(job.id).state == RUNNING
+
+        assert remote.queue.pause(job.id) is True
+        assert wait_for(lambda: remote.queue.get(job.id).state == PAUSED)
+        assert engine.queue.get(job.id).state == PAUSED
+    finally:
+        intruder.stop()
+        remote.stop()
+        server.close()
+        engine.stop(wait=True)
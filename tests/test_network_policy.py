@@ -0,0 +1,104 @@
+"""Network policy decisions and how the engine holds and releases jobs on them."""
+
+import threading
+import time
+
+from core import (
+    DONE,
+    PAUSED,
+    PROMOTED,
+    RUNNING,
+    DownloadEngine,
+    DownloadJob,
+    NetworkPolicy,
+    NetworkState,
+    NetworkWatcher,
+    StaticConnectivity,
+)
+
+WIFI = NetworkState("wifi")
+CELLULAR = NetworkState("cellular", metered=True)
+OFFLINE = NetworkState("none")
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_policy_on_metered_and_offline_links():
+    policy = NetworkPolicy(metered_max_height=720, metered_fragments=4)
+    best = DownloadJob("http://example.com/v", "Video", "Best")
+    capped = DownloadJob("http://example.com/v", "Video", "1080p")
+    audio = DownloadJob("http://example.com/a", "Audio", "Best")
+
+    assert policy.defer_reason(best, WIFI) is None
+    assert policy.defer_reason(best, OFFLINE) == "Waiting for a connection"
+    assert policy.defer_reason(best, CELLULAR) == "Waiting for Wi-Fi"
+    assert policy.defer_reason(audio, CELLULAR) is None
+    best.priority = PROMOTED
+    assert policy.defer_reason(best, CELLULAR) is None
+
+    assert policy.quality(capped, WIFI) == "1080p"
+    assert policy.quality(capped, CELLULAR) == "720p"
+
+    settings = {"concurrent_fragment_downloads": 8, "http_chunk_size": 1 << 20}
+    assert policy.tuning(settings, WIFI) == settings
+    limited = policy.tuning(settings, CELLULAR)
+    assert limited["concurrent_fragment_downloads"] == 4
+    assert limited["http_chunk_size"] == 1 << 20
+    assert settings["concurrent_fragment_downloads"] == 8
+
+
+def test_watcher_reports_changes_only():
+    connectivity = StaticConnectivity(WIFI)
+    changes = []
+    watcher = NetworkWatcher(connectivity, changes.append)
+
+    assert watcher.check() == WIFI
+    connectivity.set(CELLULAR)
+    assert watcher.check() == CELLULAR
+    assert watcher.check() == CELLULAR
+    assert changes == [CELLULAR]
+
+
+def test_engine_holds_and_releases_running_job(tmp_path):
+    connectivity = StaticConnectivity(WIFI)
+    engine = DownloadEngine(
+        str(tmp_path), persist_queue=False, connectivity=connectivity
+    )
+    runs = []
+    finish = threading.Event()
+
+    def runner(job):
+        # Stands in for yt-dlp: progress hooks until paused or told to finish
+        runs.append(job.id)
+        while not finish.wait(0.01):
+            engine.queue.raise_if_paused(job)
+
+    engine.queue.runner = runner
+    engine.network.interval = 0.02
+    engine.start()
+    try:
+        job = engine.add("http://example.com/v", "Video", "Best")
+        assert wait_for(lambda: job.state == RUNNING)
+
+        # Picked up by the watcher thread while the worker is downloading
+        connectivity.set(CELLULAR)
+        assert wait_for(lambda: job.state == PAUSED)
+        assert engine.defer_reason(job) == "Waiting for Wi-Fi"
+        assert job.id in engine._held_jobs
+
+        connectivity.set(WIFI)
+        assert wait_for(lambda: len(runs) == 2 and job.state == RUNNING)
+        assert job.id not in engine._held_jobs
+
+        finish.set()
+        assert wait_for(lambda: job.state == DONE)
+    finally:
+        finish.set()
+        engine.stop()
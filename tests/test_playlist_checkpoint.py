@@ -0,0 +1,79 @@
+"""PlaylistCheckpoint round trips and entries interrupted by a pause."""
+
+import os
+import threading
+
+from core import JobPaused
+from core.playlist import PlaylistCheckpoint, PlaylistDownloader
+
+
+def entry(n):
+    return {"id": f"e{n}", "url": f"https://example.com/{n}", "title": f"Entry {n}", "duration": 60}
+
+
+def test_cursor_moves_over_contiguous_settled_entries(tmp_path):
+    path = str(tmp_path / "playlist.json")
+    checkpoint = PlaylistCheckpoint(path)
+    # Parallel downloads finish out of order
+    checkpoint.settle(1, entry(1))
+    checkpoint.settle(2, entry(2), failed=True)
+    assert checkpoint.cursor == 0
+    checkpoint.settle(0, entry(0))
+    assert checkpoint.cursor == 3
+    checkpoint.settle(4, entry(4))
+
+    reloaded = PlaylistCheckpoint(path)
+    assert reloaded.cursor == 3
+    assert reloaded.last_id == checkpoint.last_id
+    # Only the flat keys needed to retry without listing again are kept
+    assert reloaded.failed_before_cursor() == [
+        (2, {"id": "e2", "url": "https://example.com/2", "title": "Entry 2"})
+    ]
+
+    # A retried entry that succeeds is no longer failed
+    reloaded.settle(2, entry(2))
+    assert reloaded.failed_before_cursor() == []
+
+
+def test_finish_keeps_the_checkpoint_only_with_failures(tmp_path):
+    path = str(tmp_path / "playlist.json")
+    checkpoint = PlaylistCheckpoint(path)
+    checkpoint.settle(0, entry(0), failed=True)
+    checkpoint.finish()
+    assert os.path.exists(path)
+
+    checkpoint.settle(0, entry(0))
+    checkpoint.finish()
+    assert not os.path.exists(path)
+
+
+def test_unreadable_checkpoint_starts_over(tmp_path):
+    path = tmp_path / "playlist.json"
+    path.write_text("{not json")
+    checkpoint = PlaylistCheckpoint(str(path))
+    assert (checkpoint.cursor, checkpoint.last_id, checkpoint.failed) == (0, None, {})
+
+
+def test_paused_entry_is_left_for_the_resumed_run(tmp_path):
+    paused = threading.Event()
+
+    def interrupt():
+        if paused.is_set():
+            raise JobPaused()
+
+    checkpoint = PlaylistCheckpoint(str(tmp_path / "playlist.json"))
+    downloader = PlaylistDownloader({}, str(tmp_path), checkpoint=checkpoint, interrupt=interrupt)
+    downloader._slots = threading.Semaphore(0)
+
+    def fetch(index, entry):
+        # yt-dlp reports the JobPaused from a hook as its own error
+        paused.set()
+        raise RuntimeError("ERROR: interrupted")
+
+    downloader._fetch_entry = fetch
+    downloader._download_entry(0, entry(0), None, [0])
+
+    assert downloader.failed == []
+    assert checkpoint.failed == {}
+    assert checkpoint.cursor == 0
+    assert downloader._slots.acquire(blocking=False)
@@ -0,0 +1,71 @@
+"""ResumeLedger round trips across restarts, and content keys."""
+
+import os
+
+from core import ResumeLedger, content_key
+
+
+def downloading(path, downloaded, fragment=None):
+    d = {"status": "downloading", "tmpfilename": path, "downloaded_bytes": downloaded}
+    if fragment is not None:
+        d.update(fragment_index=fragment, fragment_count=10)
+    return d
+
+
+def test_content_key_is_stable_and_depends_on_every_choice():
+    key = content_key("youtube:abc", "Both", 720, "MP3")
+    assert key == content_key("youtube:abc", "Both", 720, "MP3")
+    assert len(key) == 16
+    assert key != content_key("youtube:abc", "Both", 1080, "MP3")
+    assert key != content_key("youtube:abd", "Both", 720, "MP3")
+
+
+def test_unfinished_download_resumes_after_a_restart(tmp_path):
+    path = str(tmp_path / "resume.json")
+    key = content_key("example:1", "Video", None)
+    part = str(tmp_path / f"download_{key}.mp4.part")
+
+    ledger = ResumeLedger(path)
+    name_key, resumed = ledger.acquire(key, "job1", "https://example.com/1")
+    assert (name_key, resumed) == (key, None)
+    ledger.progress_hook(key, downloading(part, 4096, fragment=3))
+    ledger.release(key, finished=False)
+
+    # A new process: nothing runs yet, the re-queued job gets the same files
+    restarted = ResumeLedger(path)
+    restarted.reset_active()
+    name_key, resumed = restarted.acquire(key, "job2", "https://example.com/1")
+    assert name_key == key
+    assert resumed["bytes"] == 4096
+    assert resumed["files"] == [part]
+    assert resumed["fragment_index"] == 3
+
+    restarted.release(key, finished=True)
+    assert ResumeLedger(path).get(key) is None
+
+
+def test_concurrent_jobs_never_share_files(tmp_path):
+    ledger = ResumeLedger()
+    key = content_key("example:1", "Audio")
+    assert ledger.acquire(key, "job1", "u")[0] == key
+    assert ledger.acquire(key, "job2", "u")[0] == f"{key}_job2"
+    # The owner itself gets its key back
+    assert ledger.acquire(key, "job1", "u")[0] == key
+
+
+def test_prune_deletes_abandoned_partial_files(tmp_path):
+    ledger = ResumeLedger(str(tmp_path / "resume.json"))
+    part = tmp_path / "download_x.mp4.part"
+    part.write_bytes(b"x" * 10)
+    (tmp_path / "download_x.mp4.part.ytdl").write_text("{}")
+    ledger.acquire("x", "job1", "u")
+    ledger.progress_hook("x", downloading(str(part), 10))
+
+    ledger.prune(max_age=-1)
+    assert part.exists()  # still active
+
+    ledger.release("x", finished=False)
+    ledger.prune(max_age=-1)
+    assert not part.exists()
+    assert not os.path.exists(str(part) + ".ytdl")
+    assert ledger.get("x") is None
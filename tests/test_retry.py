@@ -0,0 +1,158 @@
+"""Failure classification and the retry budget per category."""
+
+import random
+
+import pytest
+
+from core import retry
+from core.retry import (
+    EXTRACTOR,
+    FORBIDDEN,
+    NETWORK,
+    POSTPROCESSOR,
+    THROTTLED,
+    UNKNOWN,
+    RetryPolicy,
+    RetryRule,
+    backoff,
+    call_with_retries,
+    classify,
+)
+
+
+class HTTPError(Exception):
+    def __init__(self, status, headers=None):
+        super().__init__(f"HTTP Error {status}")
+        self.status = status
+        self.headers = headers or {}
+
+
+class DownloadError(Exception):
+    """yt-dlp's wrapper: the original error sits in exc_info"""
+
+    def __init__(self, message, cause):
+        super().__init__(message)
+        self.exc_info = (type(cause), cause, None)
+
+
+class TransportError(Exception):
+    pass
+
+
+class ExtractorError(Exception):
+    pass
+
+
+class PostProcessingError(Exception):
+    pass
+
+
+@pytest.mark.parametrize(
+    "error, category",
+    [
+        (HTTPError(429), THROTTLED),
+        (HTTPError(403), FORBIDDEN),
+        (HTTPError(503), NETWORK),
+        (HTTPError(404), EXTRACTOR),
+        (TransportError("reset"), NETWORK),
+        (ConnectionResetError(), NETWORK),
+        (DownloadError("ERROR: unable to download", HTTPError(429)), THROTTLED),
+        (DownloadError("ERROR: wrapped", TransportError()), NETWORK),
+        (ExtractorError("Private video"), EXTRACTOR),
+        (PostProcessingError("Conversion failed"), POSTPROCESSOR),
+        (Exception("ERROR: Read timed out."), NETWORK),
+        (ValueError("something else"), UNKNOWN),
+    ],
+)
+def test_classify(error, category):
+    assert classify(error) == category
+
+
+def test_chained_network_cause_beats_extractor_error():
+    try:
+        try:
+            raise TimeoutError("webpage")
+        except TimeoutError as e:
+            raise ExtractorError("Unable to download webpage") from e
+    except ExtractorError as error:
+        assert classify(error) == NETWORK
+
+
+def test_backoff_grows_and_is_capped():
+    rng = random.Random(1)
+    for attempt in range(8):
+        delay = backoff(attempt, 2.0, 60.0, rng)
+        full = min(60.0, 2.0 * 2**attempt)
+        assert full / 2 <= delay <= full
+
+
+@pytest.fixture
+def no_sleep(monkeypatch):
+    waits = []
+    monkeypatch.setattr(retry, "sleep", lambda seconds, interrupt=None: waits.append(seconds))
+    return waits
+
+
+def failing(errors):
+    """fn raising `errors` in turn, then returning "ok"; counts its calls"""
+    calls = []
+
+    def fn():
+        calls.append(1)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return "ok"
+
+    return fn, calls
+
+
+def test_budget_is_per_category(no_sleep):
+    policy = RetryPolicy(
+        {NETWORK: RetryRule(2, 1.0, 5.0), THROTTLED: RetryRule(1, 1.0, 5.0)},
+        rng=random.Random(0),
+    )
+    fn, calls = failing([TransportError(), HTTPError(429), TransportError()])
+    assert call_with_retries(fn, policy) == "ok"
+    assert len(calls) == 4
+    assert len(no_sleep) == 3
+
+    fn, calls = failing([TransportError()] * 3)
+    with pytest.raises(TransportError):
+        call_with_retries(fn, policy)
+    assert len(calls) == 3
+
+
+def test_unretried_categories_fail_at_once(no_sleep):
+    fn, calls = failing([ExtractorError("Video unavailable")])
+    with pytest.raises(ExtractorError):
+        call_with_retries(fn, RetryPolicy())
+    assert len(calls) == 1
+    assert no_sleep == []
+
+
+def test_retry_after_is_honoured_up_to_the_cap():
+    policy = RetryPolicy({THROTTLED: RetryRule(3, 1.0, 30.0)}, rng=random.Random(0))
+    assert policy.delay(HTTPError(429, {"Retry-After": "20"}), THROTTLED, 0) == 20
+    assert policy.delay(HTTPError(429, {"Retry-After": "600"}), THROTTLED, 0) == 30
+    assert policy.delay(HTTPError(429), THROTTLED, 3) is None
+
+
+def test_on_retry_and_interrupt_can_stop_retrying(no_sleep):
+    class Stop(Exception):
+        pass
+
+    def on_retry(error, category, attempt, delay):
+        raise Stop()
+
+    fn, calls = failing([TransportError()] * 2)
+    with pytest.raises(Stop):
+        call_with_retries(fn, RetryPolicy(), on_retry=on_retry)
+    assert len(calls) == 1
+
+    def interrupt():
+        raise Stop()
+
+    fn, calls = failing([TransportError()])
+    with pytest.raises(Stop):
+        call_with_retries(fn, RetryPolicy(), interrupt=interrupt)
+    assert no_sleep == []
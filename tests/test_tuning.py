@@ -0,0 +1,72 @@
+"""AdaptiveTuner learning from simulated downloads."""
+
+from core import AdaptiveTuner
+from core.tuning import DEFAULT_CHUNK, DEFAULT_FRAGMENTS, MAX_CHUNK, MIN_CHUNK
+
+URL = "https://www.example.com/watch?v=1"
+MB = 1024 * 1024
+
+# Throughput of the simulated link per fragment concurrency, peaking at 4
+LINK = {1: 1 * MB, 2: 2 * MB, 4: 3 * MB, 8: 2.5 * MB, 16: 1.5 * MB}
+
+
+class Meter:
+    """What ThroughputMeter reports after a download"""
+
+    def __init__(self, throughput, seconds=10.0, fragmented=True, contended=False):
+        self.throughput = throughput
+        self.seconds = seconds
+        self.bytes = int(throughput * seconds)
+        self.fragmented = fragmented
+        self.contended = contended
+
+
+def test_fragment_concurrency_converges_on_the_best_level():
+    tuner = AdaptiveTuner()
+    suggested = []
+    for _ in range(40):
+        settings = tuner.suggest(URL, "wifi")
+        level = settings["concurrent_fragment_downloads"]
+        suggested.append(level)
+        tuner.record(URL, "wifi", settings, Meter(LINK[level]))
+
+    # Mostly the best level, with an occasional look at a neighbour
+    late = suggested[-20:]
+    assert late.count(4) >= 15
+    assert set(late) <= {2, 4, 8}
+    # Chunks sized for CHUNK_SECONDS at the measured rate, within bounds
+    chunk = tuner.suggest(URL, "wifi")["http_chunk_size"]
+    assert MIN_CHUNK <= chunk <= MAX_CHUNK
+    assert chunk > DEFAULT_CHUNK
+
+
+def test_progressive_downloads_size_chunks_only():
+    tuner = AdaptiveTuner()
+    settings = tuner.suggest(URL, "cellular")
+    tuner.record(URL, "cellular", settings, Meter(0.5 * MB, fragmented=False))
+    tuned = tuner.suggest(URL, "cellular")
+    assert tuned["concurrent_fragment_downloads"] == DEFAULT_FRAGMENTS
+    assert tuned["http_chunk_size"] == 2 * MB
+
+
+def test_contended_and_short_samples_are_ignored():
+    tuner = AdaptiveTuner()
+    settings = tuner.suggest(URL, "wifi")
+    tuner.record(URL, "wifi", settings, Meter(0.5 * MB, contended=True))
+    tuner.record(URL, "wifi", settings, Meter(0.5 * MB, seconds=0.1))
+    assert tuner.suggest(URL, "wifi") == settings
+
+
+def test_state_is_kept_per_host_and_network(tmp_path):
+    path = str(tmp_path / "tuning.json")
+    tuner = AdaptiveTuner(path)
+    settings = tuner.suggest(URL, "wifi")
+    tuner.record(URL, "wifi", settings, Meter(LINK[8]))
+
+    reloaded = AdaptiveTuner(path)
+    # www. and m. hosts share what was learned, other networks don't
+    assert reloaded.suggest("https://m.example.com/x", "wifi") == tuner.suggest(URL, "wifi")
+    assert reloaded.suggest(URL, "cellular") == {
+        "concurrent_fragment_downloads": DEFAULT_FRAGMENTS,
+        "http_chunk_size": DEFAULT_CHUNK,
+    }
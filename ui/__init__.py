@@ -1,5 +1,18 @@
 """UI package for YouTube Downloader app."""
 
-from .components import StyledBoxLayout, StyledProgressBar, GradientButton
+from .components import (
+    StyledBoxLayout,
+    StyledProgressBar,
+    GradientButton,
+)
+from .frame_meter import FrameMeter
+from .job_list import JobListView, JobRow
 
-__all__ = ["StyledBoxLayout", "StyledProgressBar", "GradientButton"]
+__all__ = [
+    "StyledBoxLayout",
+    "StyledProgressBar",
+    "GradientButton",
+    "FrameMeter",
+    "JobListView",
+    "JobRow",
+]
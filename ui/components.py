@@ -1,5 +1,6 @@
 """Custom UI components for the YouTube Downloader app."""
 
+from kivy.clock import Clock
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.button import Button
 from kivy.uix.widget import Widget
@@ -27,30 +28,74 @@ class StyledBoxLayout(BoxLayout):
 
 
 class StyledProgressBar(Widget):
-    """Custom progress bar with gradient styling"""
+    """
+    Rounded progress bar that builds its canvas once and afterwards only
+    moves/resizes the fill. Forward progress glides towards the new value
+    over a few frames, so sparse updates (e.g. 10 per second) still
+    animate smoothly; going backwards or `animate=False` jumps straight there.
+    """
 
     progress = NumericProperty(0)
+    # Value currently drawn, trails `progress` while animating
+    shown = NumericProperty(0)
 
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        self.bind(pos=self._update, size=self._update, progress=self._update)
-        self._update()
+    # Seconds for the fill to cover most of the gap to a new value
+    ease_time = 0.15
 
-    def _update(self, *args):
-        self.canvas.clear()
+    def __init__(self, animate=True, **kwargs):
+        super().__init__(**kwargs)
+        self.animate = animate
+        self._anim = None
+        self._fill_radius = 8
         with self.canvas:
             # Background
             Color(0.2, 0.2, 0.28, 1)
-            RoundedRectangle(pos=self.pos, size=self.size, radius=[10])
+            self._bg = RoundedRectangle(pos=self.pos, size=self.size, radius=[10])
             # Progress fill
-            if self.progress > 0:
-                Color(0.4, 0.6, 1, 1)  # Bright blue
-                fill_width = (self.width - 4) * (self.progress / 100)
-                RoundedRectangle(
-                    pos=(self.x + 2, self.y + 2),
-                    size=(fill_width, self.height - 4),
-                    radius=[8],
-                )
+            self._fill_color = Color(0.4, 0.6, 1, 1)  # Bright blue
+            self._fill = RoundedRectangle(pos=self.pos, size=(0, 0), radius=[8])
+        self.bind(pos=self._update_rect, size=self._update_rect)
+        self.bind(progress=self._on_progress, shown=self._update_fill)
+
+    def _update_rect(self, *args):
+        self._bg.pos = self.pos
+        self._bg.size = self.size
+        self._update_fill()
+
+    def _on_progress(self, instance, value):
+        if not self.animate or value <= self.shown:
+            self._stop_anim()
+            self.shown = value
+        elif self._anim is None:
+            self._anim = Clock.schedule_interval(self._step, 0)
+
+    def _step(self, dt):
+        gap = self.progress - self.shown
+        if abs(gap) < 0.05:
+            self.shown = self.progress
+            self._stop_anim()
+            return False
+        # Exponential ease: frame-rate independent
+        self.shown += gap * min(1.0, dt / self.ease_time)
+
+    def _stop_anim(self):
+        if self._anim is not None:
+            self._anim.cancel()
+            self._anim = None
+
+    def _update_fill(self, *args):
+        fill_width = max(0.0, (self.width - 4) * min(self.shown, 100) / 100)
+        fill_height = max(0.0, self.height - 4)
+        self._fill.pos = (self.x + 2, self.y + 2)
+        if fill_width <= 0:
+            self._fill.size = (0, 0)
+            return
+        self._fill.size = (fill_width, fill_height)
+        # Keep the corners round while the fill is narrower than its radius
+        radius = min(8, fill_width / 2, fill_height / 2)
+        if radius != self._fill_radius:
+            self._fill_radius = radius
+            self._fill.radius = [radius]
 
 
 class GradientButton(Button):
@@ -0,0 +1,91 @@
+"""Frame-time measurement, to check the UI keeps up while downloads run."""
+
+import collections
+import json
+import os
+import time
+
+from kivy.clock import Clock
+
+# Frame rate the intervals are judged against
+TARGET_FPS = 60
+
+# Frames kept for the statistics (one minute at 60 fps)
+MAX_FRAMES = 3600
+
+# Measured runs kept in the log file
+MAX_LOGGED_RUNS = 50
+
+
+class FrameMeter:
+    """
+    Records the interval between main-loop frames while running. Kivy only
+    redraws when something changed, so the Clock tick (capped at the
+    display rate) is measured rather than buffer flips; a slow draw or a
+    long callback shows up as a long interval. A frame counts as dropped
+    when it took more than 1.5 frame periods at TARGET_FPS.
+    """
+
+    def __init__(self, target_fps=TARGET_FPS, max_frames=MAX_FRAMES):
+        self.target_fps = target_fps
+        self.intervals = collections.deque(maxlen=max_frames)
+        self.running = False
+        self._last = None
+        self._event = None
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self._last = None
+        self.intervals.clear()
+        self._event = Clock.schedule_interval(self._tick, 0)
+
+    def stop(self):
+        if not self.running:
+            return self.stats()
+        self.running = False
+        self._event.cancel()
+        self._event = None
+        return self.stats()
+
+    def _tick(self, dt):
+        now = time.perf_counter()
+        if self._last is not None:
+            self.intervals.append(now - self._last)
+        self._last = now
+
+    def save(self, path):
+        """Append the current stats to a JSON-lines log, trimmed to MAX_LOGGED_RUNS"""
+        record = dict(self.stats(), time=time.time())
+        try:
+            lines = []
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    lines = f.read().splitlines()
+            lines = lines[-(MAX_LOGGED_RUNS - 1) :] + [json.dumps(record)]
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+        except OSError as e:
+            print(f"Could not save frame times: {e}")
+
+    def stats(self):
+        frames = sorted(self.intervals)
+        if not frames:
+            return {"frames": 0}
+        seconds = sum(frames)
+        budget = 1.5 / self.target_fps
+
+        def pct(fraction):
+            return round(frames[min(len(frames) - 1, int(fraction * len(frames)))] * 1000, 2)
+
+        return {
+            "frames": len(frames),
+            "fps": round(len(frames) / seconds, 1) if seconds else 0,
+            "mean_ms": round(seconds / len(frames) * 1000, 2),
+            "p50_ms": pct(0.5),
+            "p95_ms": pct(0.95),
+            "p99_ms": pct(0.99),
+            "max_ms": round(frames[-1] * 1000, 2),
+            "dropped": sum(1 for f in frames if f > budget),
+        }
@@ -0,0 +1,201 @@
+"""Virtualized list of download jobs (only visible rows are widgets)."""
+
+from kivy.metrics import dp
+from kivy.uix.boxlayout import BoxLayout
+from kivy.uix.button import Button
+from kivy.uix.label import Label
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
+
+from .components import StyledBoxLayout, StyledProgressBar
+
+ROW_HEIGHT = dp(78)
+
+# Rows kept; beyond this the oldest finished jobs are dropped in one go
+MAX_ROWS = 500
+TRIM_BATCH = 50
+
+STATE_COLORS = {
+    "queued": (0.7, 0.7, 0.8, 1),
+    "running": (0.4, 0.7, 1, 1),
+    "processing": (0.6, 0.5, 1, 1),
+    "paused": (1, 0.8, 0.2, 1),
+    "failed": (1, 0.4, 0.4, 1),
+    "done": (0.4, 0.9, 0.5, 1),
+}
+
+# Row button per job state: (label, action)
+STATE_ACTIONS = {
+    "queued": ("Pause", "pause"),
+    "running": ("Pause", "pause"),
+    "paused": ("Resume", "resume"),
+    "failed": ("Retry", "resume"),
+}
+
+FINISHED_STATES = ("done", "failed")
+
+
+class JobRow(RecycleDataViewBehavior, StyledBoxLayout):
+    """One job card; instances are recycled between jobs while scrolling"""
+
+    def __init__(self, **kwargs):
+        super().__init__(
+            orientation="vertical",
+            padding=[12, 6],
+            spacing=4,
+            bg_color=(0.16, 0.16, 0.23, 1),
+            corner_radius=10,
+            **kwargs,
+        )
+        self.job_id = None
+        self.action = None
+        self._rv = None
+
+        top = BoxLayout(orientation="horizontal", spacing=8, size_hint=(1, 0.4))
+        self.title_label = Label(
+            size_hint=(0.45, 1),
+            halign="left",
+            valign="middle",
+            shorten=True,
+            shorten_from="right",
+            color=(0.9, 0.9, 0.95, 1),
+            font_size="13sp",
+        )
+        self.title_label.bind(size=self.title_label.setter("text_size"))
+        top.add_widget(self.title_label)
+
+        self.state_label = Label(size_hint=(0.2, 1), halign="right", font_size="12sp")
+        self.state_label.bind(size=self.state_label.setter("text_size"))
+        top.add_widget(self.state_label)
+
+        # Moves the job ahead of the queue and of background playlists
+        self.promote_btn = Button(
+            text="Boost",
+            size_hint=(0.15, 1),
+            font_size="12sp",
+            background_normal="",
+            background_color=(0.3, 0.25, 0.5, 1),
+        )
+        self.promote_btn.bind(on_press=self._on_promote)
+        top.add_widget(self.promote_btn)
+
+        self.action_btn = Button(
+            size_hint=(0.2, 1),
+            font_size="12sp",
+            background_normal="",
+            background_color=(0.25, 0.25, 0.35, 1),
+        )
+        self.action_btn.bind(on_press=self._on_action)
+        top.add_widget(self.action_btn)
+        self.add_widget(top)
+
+        self.bar = StyledProgressBar(size_hint=(1, 0.22))
+        self.add_widget(self.bar)
+
+        self.detail_label = Label(
+            size_hint=(1, 0.38),
+            halign="left",
+            valign="middle",
+            shorten=True,
+            color=(0.55, 0.55, 0.65, 1),
+            font_size="11sp",
+        )
+        self.detail_label.bind(size=self.detail_label.setter("text_size"))
+        self.add_widget(self.detail_label)
+
+    def refresh_view_attrs(self, rv, index, data):
+        """Show `data`; called when the row is (re)bound to a job"""
+        self._rv = rv
+        same_job = data["job_id"] == self.job_id
+        self.job_id = data["job_id"]
+        state = data.get("state", "")
+
+        self.title_label.text = data.get("title", "")
+        self.state_label.text = state.capitalize()
+        self.state_label.color = STATE_COLORS.get(state, (0.7, 0.7, 0.8, 1))
+        self.detail_label.text = data.get("detail", "")
+
+        # A recycled row jumps to its new job's value instead of animating
+        self.bar.animate = same_job
+        self.bar.progress = data.get("percent", 0)
+        self.bar.animate = True
+
+        label, self.action = STATE_ACTIONS.get(state, ("", None))
+        self.action_btn.text = label
+        self.action_btn.disabled = self.action is None
+        self.action_btn.opacity = 1 if self.action else 0
+
+        promotable = bool(data.get("promotable")) and state in ("queued", "running")
+        self.promote_btn.disabled = not promotable
+        self.promote_btn.opacity = 1 if promotable else 0
+
+    def _on_action(self, instance):
+        if self._rv is not None and self.action:
+            self._rv.dispatch("on_job_action", self.job_id, self.action)
+
+    def _on_promote(self, instance):
+        if self._rv is not None:
+            self._rv.dispatch("on_job_action", self.job_id, "promote")
+
+
+class JobListView(RecycleView):
+    """
+    Scrollable job list backed by plain dicts in `data`; only the rows on
+    screen exist as widgets, so hundreds of jobs cost a few dicts each.
+    Rows have a fixed height, so updating one job never re-measures the
+    others. Dispatches `on_job_action(job_id, action)` for row buttons
+    ("pause", "resume", or "promote" for rows marked "promotable").
+    """
+
+    __events__ = ("on_job_action",)
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.viewclass = JobRow
+        layout = RecycleBoxLayout(
+            orientation="vertical",
+            default_size=(None, ROW_HEIGHT),
+            default_size_hint=(1, None),
+            size_hint=(1, None),
+            spacing=dp(6),
+        )
+        layout.bind(minimum_height=layout.setter("height"))
+        self.add_widget(layout)
+        self._index = {}
+
+    def on_job_action(self, job_id, action):
+        pass
+
+    def upsert(self, job_id, **fields):
+        """Add a job or update some of its fields (main thread)"""
+        index = self._index.get(job_id)
+        if index is None:
+            row = {"job_id": job_id, "title": "", "state": "", "percent": 0, "detail": ""}
+            row.update(fields)
+            self._index[job_id] = len(self.data)
+            self.data.append(row)
+            if len(self.data) > MAX_ROWS:
+                self._trim()
+            return
+        current = self.data[index]
+        if all(current.get(k) == v for k, v in fields.items()):
+            return
+        # Replacing the item refreshes just this row
+        self.data[index] = dict(current, **fields)
+
+    def get(self, job_id):
+        index = self._index.get(job_id)
+        return dict(self.data[index]) if index is not None else None
+
+    def _trim(self):
+        """Drop the oldest finished jobs (one relayout per TRIM_BATCH jobs)"""
+        excess = len(self.data) - MAX_ROWS + TRIM_BATCH
+        kept = []
+        for row in self.data:
+            if excess > 0 and row.get("state") in FINISHED_STATES:
+                excess -= 1
+                continue
+            kept.append(row)
+        self.data = kept
+        self._index = {row["job_id"]: i for i, row in enumerate(kept)}
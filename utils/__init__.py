@@ -4,14 +4,33 @@ from .android_helpers import (
     get_download_path,
     get_ffmpeg_location,
     scan_media_file,
+    scan_media_files,
     copy_to_public_downloads,
     request_storage_permission,
+    public_downloads_writable,
+    start_download_service,
+    stop_download_service,
+    PUBLIC_DOWNLOAD_DIR,
 )
+from .connectivity import AndroidConnectivity, connectivity_provider
+from .environment import EnvironmentProbe, environment
+from .app_engine import build_engine, service_endpoint
 
 __all__ = [
     "get_download_path",
     "get_ffmpeg_location",
     "scan_media_file",
+    "scan_media_files",
     "copy_to_public_downloads",
     "request_storage_permission",
+    "public_downloads_writable",
+    "start_download_service",
+    "stop_download_service",
+    "PUBLIC_DOWNLOAD_DIR",
+    "AndroidConnectivity",
+    "connectivity_provider",
+    "EnvironmentProbe",
+    "environment",
+    "build_engine",
+    "service_endpoint",
 ]
@@ -1,18 +1,36 @@
 """Android-specific helper functions for the Video Downloader app."""
 
 import os
-import shutil
 from kivy.utils import platform
 
+from core.finalize import finalize_file
+
+# Public folder that finished downloads are moved into
+PUBLIC_DOWNLOAD_DIR = "/storage/emulated/0/Download/Video-Downloader"
+
+# Class python-for-android generates for `services = Downloader:...` in buildozer.spec
+DOWNLOAD_SERVICE_CLASS = "org.pyapp.videodownloader.ServiceDownloader"
+
+
+def app_context():
+    """
+    The application Context, from the activity in the app process or from
+    the running PythonService in the download service's process
+    """
+    from jnius import autoclass, cast
+    from android import mActivity
+
+    owner = mActivity
+    if owner is None:
+        owner = autoclass("org.kivy.android.PythonService").mService
+    return cast("android.content.Context", owner.getApplicationContext())
+
 
 def get_download_path():
     """Get a writable path that works on Android 10+ without special permissions"""
     if platform == "android":
-        from jnius import autoclass, cast
-        from android import mActivity
-
         # Use App-Specific External Storage
-        context = cast("android.content.Context", mActivity.getApplicationContext())
+        context = app_context()
         file_p = context.getExternalFilesDir(None)
         download_path = os.path.join(file_p.getAbsolutePath(), "Download")
     else:
@@ -23,15 +41,42 @@ def get_download_path():
     return download_path
 
 
+def get_private_path():
+    """Folder only this app can read (the download service's endpoint lives here)"""
+    if platform == "android":
+        return app_context().getFilesDir().getAbsolutePath()
+    return get_download_path()
+
+
+def start_download_service():
+    """
+    Start the foreground download service (a no-op if it is running).
+    Returns False where there is none, i.e. off Android.
+    """
+    if platform != "android":
+        return False
+    from jnius import autoclass
+    from android import mActivity
+
+    autoclass(DOWNLOAD_SERVICE_CLASS).start(mActivity, "")
+    return True
+
+
+def stop_download_service():
+    """Stop the download service (e.g. after it failed to come up in time)"""
+    if platform != "android":
+        return
+    from jnius import autoclass
+    from android import mActivity
+
+    autoclass(DOWNLOAD_SERVICE_CLASS).stop(mActivity)
+
+
 def get_ffmpeg_location():
     """Locate the pre-installed 'fake library' FFmpeg"""
     if platform == "android":
         try:
-            from jnius import autoclass, cast
-            from android import mActivity
-
-            Context = autoclass("android.content.Context")
-            context = cast(Context, mActivity.getApplicationContext())
+            context = app_context()
             app_info = context.getApplicationInfo()
             native_lib_dir = app_info.nativeLibraryDir
 
@@ -67,7 +112,6 @@ def scan_media_file(filepath):
     """Make downloaded file visible in Android gallery/file manager"""
     if platform == "android":
         try:
-            from android import mActivity
             from jnius import autoclass
 
             Intent = autoclass("android.content.Intent")
@@ -76,11 +120,28 @@ def scan_media_file(filepath):
 
             intent = Intent(Intent.ACTION_MEDIA_SCANNER_SCAN_FILE)
             intent.setData(Uri.fromFile(File(filepath)))
-            mActivity.sendBroadcast(intent)
+            app_context().sendBroadcast(intent)
         except Exception:
             pass
 
 
+def scan_media_files(paths):
+    """
+    Index several files with one MediaScannerConnection.scanFile call
+    instead of a broadcast per file.
+    """
+    if platform == "android" and paths:
+        try:
+            from jnius import autoclass
+
+            MediaScannerConnection = autoclass("android.media.MediaScannerConnection")
+            MediaScannerConnection.scanFile(app_context(), list(paths), None, None)
+        except Exception as e:
+            print(f"Batch media scan failed, scanning one by one: {e}")
+            for path in paths:
+                scan_media_file(path)
+
+
 def request_storage_permission():
     """
     Request MANAGE_EXTERNAL_STORAGE permission (Android 11+).
@@ -99,6 +160,8 @@ def request_storage_permission():
                     Permission.INTERNET,
                     Permission.READ_EXTERNAL_STORAGE,
                     Permission.WRITE_EXTERNAL_STORAGE,
+                    # Android 13+: the download service's notification
+                    "android.permission.POST_NOTIFICATIONS",
                 ]
             )
 
@@ -122,10 +185,23 @@ def request_storage_permission():
     return True
 
 
-def copy_to_public_downloads(private_file_path, filename):
+def public_downloads_writable():
+    """True if downloads can be written straight into the public folder"""
+    if platform == "android":
+        try:
+            os.makedirs(PUBLIC_DOWNLOAD_DIR, exist_ok=True)
+            return os.access(PUBLIC_DOWNLOAD_DIR, os.W_OK)
+        except OSError:
+            return False
+    return False
+
+
+def copy_to_public_downloads(private_file_path, filename, scan=True):
     """
-    Copies a file from the app-private folder to the public Download folder.
-    Uses simple shutil.move with MANAGE_EXTERNAL_STORAGE permission.
+    Moves a file from the app-private folder to the public Download folder.
+    Renames when both are on the same filesystem and only falls back to a
+    streaming copy when it has to (see core.finalize). Pass scan=False if
+    the caller runs the media scan itself.
     """
     if platform == "android":
         try:
@@ -134,17 +210,12 @@ def copy_to_public_downloads(private_file_path, filename):
                 return False
 
             # Direct path to public Downloads
-            public_dir = "/storage/emulated/0/Download/Video-Downloader"
-            os.makedirs(public_dir, exist_ok=True)
-
-            dest_path = os.path.join(public_dir, filename)
-
-            # Move the file
-            shutil.move(private_file_path, dest_path)
+            dest_path = finalize_file(private_file_path, PUBLIC_DOWNLOAD_DIR, filename)
             print(f"Moved to: {dest_path}")
 
             # Scan so it shows up immediately
-            scan_media_file(dest_path)
+            if scan:
+                scan_media_file(dest_path)
             return True
 
         except Exception as e:
@@ -0,0 +1,72 @@
+"""The app's download engine setup, shared by the UI process and the download service."""
+
+import os
+
+from core import DownloadEngine, finalize_stats
+
+from .android_helpers import (
+    PUBLIC_DOWNLOAD_DIR,
+    copy_to_public_downloads,
+    scan_media_files,
+)
+from .connectivity import connectivity_provider
+from .environment import environment
+
+# How many downloads run at the same time
+MAX_PARALLEL_DOWNLOADS = 3
+
+# Parallel entry downloads in "Playlist (Audio)" mode (transcodes use all cores)
+PLAYLIST_DOWNLOAD_WORKERS = 3
+
+# Bytes/second shared by all downloads (0 = no cap)
+RATE_LIMIT = 0
+
+# Port and token of the running download service, in private storage
+SERVICE_ENDPOINT_FILE = ".service.json"
+
+
+def publish_file(actual_path):
+    """Move a finished file to the public Downloads folder (worker thread)"""
+    filename_only = os.path.basename(actual_path)
+
+    # Move to public Downloads (rename when possible, copy as a last resort);
+    # the engine queues a batched media scan for whichever path this returns
+    success = copy_to_public_downloads(actual_path, filename_only, scan=False)
+    if success:
+        print(f"Saved to public: {filename_only}")
+        print(f"Finalize: {finalize_stats.as_dict()}")
+        return os.path.join(PUBLIC_DOWNLOAD_DIR, filename_only)
+    # Fallback: the private file still gets scanned
+    print(f"Copy failed, file at: {actual_path}")
+    return actual_path
+
+
+def direct_output_dir():
+    """Folder that downloads without post-processing can be written into"""
+    # Once per job: in the service process no on_resume re-checks access
+    # after the user grants it in Settings (one cheap JNI call)
+    environment.refresh_permissions()
+    return PUBLIC_DOWNLOAD_DIR if environment.public_writable() else None
+
+
+def service_endpoint():
+    return os.path.join(environment.private_path(), SERVICE_ENDPOINT_FILE)
+
+
+def build_engine(on_job_change=None, on_status=None, on_network_change=None):
+    """Queue, caches, tuning and ffmpeg stage with the app's settings (worker thread)"""
+    return DownloadEngine(
+        environment.download_path(),
+        ffmpeg_location=environment.ffmpeg_location(),
+        concurrency=MAX_PARALLEL_DOWNLOADS,
+        playlist_workers=PLAYLIST_DOWNLOAD_WORKERS,
+        rate_limit=RATE_LIMIT,
+        skip_dirs=(PUBLIC_DOWNLOAD_DIR,),
+        publish=publish_file,
+        scan_batch=scan_media_files,
+        direct_output_dir=direct_output_dir,
+        connectivity=connectivity_provider(),
+        on_job_change=on_job_change,
+        on_status=on_status,
+        on_network_change=on_network_change,
+    )
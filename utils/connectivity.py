@@ -0,0 +1,62 @@
+"""Connectivity providers for the download engine's network policy."""
+
+from kivy.utils import platform
+
+from .android_helpers import app_context
+from core.network import (
+    CELLULAR,
+    ETHERNET,
+    OFFLINE,
+    OTHER,
+    WIFI,
+    NetworkState,
+    StaticConnectivity,
+)
+
+
+class AndroidConnectivity:
+    """
+    Reads the active network from ConnectivityManager (needs
+    ACCESS_NETWORK_STATE). "Metered" is Android's own verdict, so a Wi-Fi
+    hotspot the user marked as metered counts as one.
+    """
+
+    def __init__(self):
+        self._manager = None
+        self._caps = None
+
+    def _connectivity_manager(self):
+        if self._manager is None:
+            from jnius import autoclass, cast
+
+            Context = autoclass("android.content.Context")
+            self._manager = cast(
+                "android.net.ConnectivityManager",
+                app_context().getSystemService(Context.CONNECTIVITY_SERVICE),
+            )
+            self._caps = autoclass("android.net.NetworkCapabilities")
+        return self._manager
+
+    def current(self):
+        manager = self._connectivity_manager()
+        network = manager.getActiveNetwork()
+        caps = manager.getNetworkCapabilities(network) if network else None
+        if caps is None or not caps.hasCapability(self._caps.NET_CAPABILITY_INTERNET):
+            return NetworkState(OFFLINE, connected=False)
+
+        if caps.hasTransport(self._caps.TRANSPORT_WIFI):
+            kind = WIFI
+        elif caps.hasTransport(self._caps.TRANSPORT_CELLULAR):
+            kind = CELLULAR
+        elif caps.hasTransport(self._caps.TRANSPORT_ETHERNET):
+            kind = ETHERNET
+        else:
+            kind = OTHER
+        return NetworkState(kind, metered=bool(manager.isActiveNetworkMetered()))
+
+
+def connectivity_provider():
+    """The platform's provider; desktops report an unmetered, unknown link"""
+    if platform == "android":
+        return AndroidConnectivity()
+    return StaticConnectivity()
@@ -0,0 +1,87 @@
+"""One-time probe of the device environment (paths, ffmpeg, storage access)."""
+
+import threading
+from kivy.utils import platform
+
+from .android_helpers import (
+    get_download_path,
+    get_ffmpeg_location,
+    get_private_path,
+    public_downloads_writable,
+)
+
+
+def _has_all_files_access():
+    if platform == "android":
+        try:
+            from jnius import autoclass
+
+            Environment = autoclass("android.os.Environment")
+            return bool(Environment.isExternalStorageManager())
+        except Exception:
+            return False
+    return True
+
+
+class EnvironmentProbe:
+    """
+    Resolves ffmpeg, the download folders and storage capabilities once
+    per process and serves them from memory afterwards. The JNI calls,
+    stat() and symlink checks behind them are slow on low-end phones and
+    their answers only change when the app is upgraded (a new process) or
+    a permission is granted or revoked (see `refresh_permissions`).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _get(self, name, resolve):
+        with self._lock:
+            if name not in self._values:
+                self._values[name] = resolve()
+            return self._values[name]
+
+    def download_path(self):
+        return self._get("download_path", get_download_path)
+
+    def ffmpeg_location(self):
+        return self._get("ffmpeg_location", get_ffmpeg_location)
+
+    def private_path(self):
+        return self._get("private_path", get_private_path)
+
+    def public_writable(self):
+        """Whether files can be written straight into the public folder"""
+        return self._get("public_writable", public_downloads_writable)
+
+    def all_files_access(self):
+        return self._get("all_files_access", _has_all_files_access)
+
+    def refresh_permissions(self):
+        """
+        Re-check storage access (e.g. after returning from Settings) and
+        drop the capabilities that depend on it if it changed.
+        Returns True if anything changed.
+        """
+        granted = _has_all_files_access()
+        with self._lock:
+            previous = self._values.get("all_files_access")
+            if previous == granted:
+                return False
+            self._values["all_files_access"] = granted
+            self._values.pop("public_writable", None)
+        # Nothing was known before the first check, so nothing changed
+        return previous is not None
+
+    def invalidate(self):
+        with self._lock:
+            self._values.clear()
+
+    def as_dict(self):
+        with self._lock:
+            return dict(self._values)
+
+
+# Shared by the whole app
+environment = EnvironmentProbe()